@@ -172,6 +172,8 @@ class EventDispatcher:
 
     See the module docstring for usage.
     """
+    __slots__ = ()
+
     # Placeholder empty stack; real stack is created only if needed
     _event_stack = ()
 
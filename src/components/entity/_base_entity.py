@@ -67,10 +67,7 @@ class BaseEntity(_EventDispatcher):
         self._scene = scene 
         self.name = name
         self._grid = self._scene.board if scene is not None else _Grid()
-        init_cell = self._grid.random_cell()
-        while not init_cell.passable:
-            init_cell = self._grid.random_cell()
-        self._cell = init_cell 
+        self._cell = self._grid.spawn_cell()
         self._cell_name = self._cell.designation
         self._cell_history = []
         self._last_cell = None
@@ -11,6 +11,8 @@ class DynamicEntity(_BaseEntity):
         self._last_cell = None
         self._cell_history = []
         self._path = []
+        self._planner = None
+        self._pending_path = None
         self._traveling = False
         self._movements = 10
         self._register_event_type('on_move')
@@ -22,7 +24,12 @@ class DynamicEntity(_BaseEntity):
 
     def _set_destination(self, direction=None):
         if len(self._path) > 1:
-            self._destination = self._grid.cells[self._path.pop(0)]
+            step = self._path.pop(0)
+            if step == self._cell_name:
+                # A wait in a team plan, see _plan_team; it takes a movement like a step.
+                self._movements -= 1
+                return
+            self._destination = self._grid.cells[step]
         else:
             self._destination = self._grid.cells[self._path[0]]
 
@@ -36,11 +43,95 @@ class DynamicEntity(_BaseEntity):
 
     def _get_path_to(self, _destination):
         _logging.info(f'Get path from {self._cell_name} to {self._grid[_destination].designation}')
-        p = self._grid.get_path(self._cell_name, _destination)
-        p.remove(self._cell_name)
-        self._path = p
+        start, goal = self._cell.cell_index, self._grid.get_cell(_destination).cell_index
+        if not self._grid.regions.connected(start, goal):
+            _logging.info(f'No path to {_destination}.')
+            self._path = []
+            return
+        # The planner is kept between calls, so replanning after a move or a change on the map repairs
+        # the last search instead of starting over.
+        if self._planner is None:
+            self._planner = self._grid.planner(start, goal)
+        else:
+            self._planner.move_start(start)
+            self._planner.move_goal(goal)
+        p = self._planner.path()
+        if p is None:
+            _logging.info(f'No path to {_destination}.')
+            self._path = []
+            return
+        self._path = [self._grid.get_cell(n).designation for n in p[1:]]
+
+    def _request_path_to(self, _destination):
+        """Asks the grid's path service for a path and stands still until it arrives, see _receive_path.
+        A request still pending from before is cancelled."""
+        _logging.info(f'Request path from {self._cell_name} to {self._grid[_destination].designation}')
+        if self._pending_path is not None:
+            self._pending_path.cancel()
+        self._path = []
+        self._destination = None
+        self._traveling = False
+        self._pending_path = self._grid.get_path_async(self._cell_name, _destination)
+
+    def _receive_path(self):
+        future = self._pending_path
+        if future is None or not future.done():
+            return
+        self._pending_path = None
+        if future.cancelled():
+            return
+        p = future.result()
+        if p is None:
+            _logging.info('No path to the requested cell.')
+            return
+        if p[0] != self._cell_name:
+            _logging.info(f'Discarding a path from {p[0]}; the entity is at {self._cell_name}.')
+            return
+        self._path = p[1:]
+        self._traveling = True
+
+    def _movement_range(self):
+        """Returns the designations of the cells the entity can reach with the movements it has left."""
+        reach = self._grid.reachable(self._cell_name, self._movements)
+        return [self._grid.get_cell(n).designation for n in reach.indices.tolist()]
+
+    def _move_within_range(self, reach, index):
+        """Takes the path to a cell of a Reachable from Grid.reachable instead of a search."""
+        p = reach.path_to(index)
+        if p is None:
+            _logging.info(f'{self._grid.get_cell(index).designation} is out of reach.')
+            self._path = []
+            return
+        self._path = [self._grid.get_cell(n).designation for n in p[1:]]
+
+    def _follow_field(self, field):
+        """Takes the path to a FlowField's target from the field's next steps instead of a search."""
+        p = field.path_from(self._cell.cell_index)
+        if p is None:
+            _logging.info(f'No path to {self._grid.get_cell(field.target).designation}.')
+            self._path = []
+            return
+        self._path = [self._grid.get_cell(n).designation for n in p[1:]]
+
+    @staticmethod
+    def _plan_team(team):
+        """Plans the moves of several entities at once so that they keep out of each other's way, see
+        Grid.plan_team. `team` maps each entity to its destination, highest priority first."""
+        team = list(team.items())
+        if not team:
+            return
+        grid = team[0][0]._grid
+        window = max(entity._movements for entity, _ in team)
+        paths = grid.plan_team([(entity._cell_name, destination) for entity, destination in team], window)
+        for (entity, destination), p in zip(team, paths):
+            if p is None:
+                _logging.info(f'No path to {destination}.')
+            entity._path = p[1:] if p is not None else []
+            entity._destination = None
+            entity._traveling = bool(entity._path)
 
     def _update(self):
+        self._receive_path()
         if self._destination == self._cell:
             self._destination = None
             self._path = []
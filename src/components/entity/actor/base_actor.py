@@ -175,7 +175,8 @@ class _BaseActor(_DynamicEntity):
             skill.level += 1
 
     def _process(self):
-        self._get_path_to(self._grid.random_cell().designation)
+        region = self._grid.regions.label_of(self._cell.cell_index)
+        self._get_path_to(self._grid.random_cell(region if region >= 0 else None).designation)
         while self._path:
             self._set_destination()
             self.move()
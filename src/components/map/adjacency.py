@@ -0,0 +1,105 @@
+from collections.abc import Mapping as _Mapping
+from typing import Callable as _Callable, Sequence as _Sequence
+
+import numpy as _np
+
+# Rank and file offsets of the eight neighbours, in the order Nw, N, Ne, E, Se, S, Sw, W.
+_NEIGHBOR_RANK_OFFSETS = _np.array([-1, -1, -1, 0, 1, 1, 1, 0])
+_NEIGHBOR_FILE_OFFSETS = _np.array([-1, 0, 1, 1, 1, 0, -1, -1])
+
+
+class AdjacencyGraph:
+    """
+    The 8-connected neighbourhood of a rectangular grid stored in compressed sparse row form.
+
+    The neighbours of cell `n` are `indices[offsets[n]:offsets[n + 1]]`, listed in the order
+    Nw, N, Ne, E, Se, S, Sw, W with the ones falling off the map left out.
+
+    Args:
+        height (int): The number of ranks in the grid.
+        width (int): The number of files in the grid.
+    """
+    __slots__ = ('height', 'width', 'offsets', 'indices', '_lists')
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.offsets, self.indices = self._build(height, width)
+        self._lists = None
+
+    @classmethod
+    def from_arrays(cls, height: int, width: int, offsets: _np.ndarray, indices: _np.ndarray):
+        """Wraps existing CSR arrays, e.g. the columns of a loaded grid file."""
+        graph = cls.__new__(cls)
+        graph.height = height
+        graph.width = width
+        graph.offsets = offsets
+        graph.indices = indices
+        graph._lists = None
+        return graph
+
+    @staticmethod
+    def _build(height, width):
+        ranks = _np.arange(height)[:, None, None] + _NEIGHBOR_RANK_OFFSETS
+        files = _np.arange(width)[None, :, None] + _NEIGHBOR_FILE_OFFSETS
+        valid = (ranks >= 0) & (ranks < height) & (files >= 0) & (files < width)
+        # Boolean indexing walks the (rank, file, direction) array in C order, so the neighbours of
+        # each cell come out contiguous and in direction order.
+        indices = (ranks * width + files)[valid].astype(_np.int32)
+        offsets = _np.zeros(height * width + 1, dtype=_np.int32)
+        _np.cumsum(valid.sum(axis=2).ravel(), out=offsets[1:])
+        return offsets, indices
+
+    def __len__(self):
+        return self.height * self.width
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.indices.nbytes
+
+    def lists(self):
+        """Returns the offsets and indices as Python lists, which are faster than the arrays for the
+        scalar lookups of a search loop. They are built once and kept."""
+        if self._lists is None:
+            self._lists = (self.offsets.tolist(), self.indices.tolist())
+        return self._lists
+
+    def neighbors(self, index: int):
+        """Returns the cell indices adjacent to the given cell index."""
+        return self.indices[self.offsets[index]:self.offsets[index + 1]]
+
+    def degree(self, index: int):
+        """Returns the number of cells adjacent to the given cell index."""
+        return int(self.offsets[index + 1] - self.offsets[index])
+
+    def is_adjacent(self, a: int, b: int):
+        """Checks whether two cell indices are neighbours."""
+        ra, fa = divmod(a, self.width)
+        rb, fb = divmod(b, self.width)
+        return a != b and abs(ra - rb) <= 1 and abs(fa - fb) <= 1
+
+
+class DesignationGraph(_Mapping):
+    """
+    A read-only view of an AdjacencyGraph keyed by cell designation. The designation lists are built
+    on access and never stored.
+
+    Args:
+        graph (AdjacencyGraph): The graph to view.
+        designations (list): The cell designations, indexed by cell index.
+        index_of (callable): Resolves a designation to its cell index.
+    """
+
+    def __init__(self, graph: AdjacencyGraph, designations: _Sequence[str], index_of: _Callable[[str], int]):
+        self._adjacency = graph
+        self._designations = designations
+        self._index_of = index_of
+
+    def __getitem__(self, designation):
+        return [self._designations[n] for n in self._adjacency.neighbors(self._index_of(designation))]
+
+    def __iter__(self):
+        return iter(self._designations)
+
+    def __len__(self):
+        return len(self._designations)
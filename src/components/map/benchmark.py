@@ -0,0 +1,119 @@
+import time as _time
+from functools import partial as _partial
+from typing import Optional as _Optional, Sequence as _Sequence
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .grid_blueprint import BOARD_VALUES as _BOARD_VALUES
+from .hierarchical import HierarchicalPlanner as _HierarchicalPlanner
+
+# Times the path search strategies against each other on the Board's map, generated for a seed. Nothing
+# here needs pyglet:
+#     python -m src.components.map.benchmark --grid-scale 4 --queries 200 --seed 11
+
+# The draws sample_queries makes per query asked for before it gives up.
+_ATTEMPTS_PER_QUERY = 1000
+
+# name -> factory(graph, passable) returning search(bitmap, start, goal, stats).
+STRATEGIES = {
+    'astar': lambda graph, passable: _partial(_pathfinding.astar, graph),
+    'jps': lambda graph, passable: _partial(_pathfinding.jps, graph),
+    'hpa': lambda graph, passable: _built_hierarchy(graph, passable).find_path,
+}
+
+
+def _built_hierarchy(graph, passable):
+    planner = _HierarchicalPlanner(graph, passable)
+    planner._rebuild()
+    return planner
+
+
+def sample_queries(passable: _np.ndarray, width: int, count: int, seed: int = 0, min_distance: float = 0.0,
+                   labels: _Optional[_np.ndarray] = None):
+    """Draws `count` (start, goal) pairs of passable cells at least `min_distance` steps apart. Given the
+    region labels from label_regions, only pairs within one region, which a path joins, are drawn. On a
+    map with too few such pairs it stops after _ATTEMPTS_PER_QUERY draws per query and returns fewer."""
+    rng = _np.random.default_rng(seed)
+    cells = _np.flatnonzero(passable)
+    queries = []
+    if not len(cells):
+        return queries
+    for _ in range(count * _ATTEMPTS_PER_QUERY):
+        if len(queries) == count:
+            break
+        start, goal = (int(cell) for cell in rng.choice(cells, 2))
+        if labels is not None and labels[start] != labels[goal]:
+            continue
+        if start != goal and _pathfinding.octile(start, goal, width) >= min_distance:
+            queries.append((start, goal))
+    return queries
+
+
+def path_cost(path, width: int):
+    return sum(_pathfinding.step_cost(a, b, width) for a, b in zip(path, path[1:]))
+
+
+def run(graph, passable: _np.ndarray, queries, strategies: _Sequence[str] = ('astar', 'jps')):
+    """Runs every query with each strategy and returns {strategy: results}, where results holds the
+    total 'seconds', the total nodes 'expanded', the number of paths 'found' and their total 'cost'.
+    Strategy setup, such as building HPA*'s abstract graph, is timed apart as 'setup'."""
+    bitmap = bytearray(passable.astype(_np.uint8).tobytes())
+    results = {}
+    for name in strategies:
+        began = _time.perf_counter()
+        search = STRATEGIES[name](graph, passable)
+        setup = _time.perf_counter() - began
+        totals = {'setup': setup, 'seconds': 0.0, 'expanded': 0, 'found': 0, 'cost': 0.0}
+        for start, goal in queries:
+            stats = {}
+            began = _time.perf_counter()
+            path = search(bitmap, start, goal, stats)
+            totals['seconds'] += _time.perf_counter() - began
+            totals['expanded'] += stats['expanded']
+            if path is not None:
+                totals['found'] += 1
+                totals['cost'] += path_cost(path, graph.width)
+        results[name] = totals
+    return results
+
+
+def main(argv: _Optional[_Sequence[str]] = None):
+    import argparse as _argparse
+    from .blueprint_cache import default_cache as _default_cache
+
+    parser = _argparse.ArgumentParser(description="Compare path search strategies on the Board's map.")
+    parser.add_argument('--grid-scale', type=int, default=_BOARD_VALUES['grid_scale'])
+    parser.add_argument('--cell-size', type=int, default=_BOARD_VALUES['cell_size'])
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--min-distance', type=float, default=None,
+                        help='Shortest straight-line query in cells; a quarter of the map width by default.')
+    parser.add_argument('--strategies', nargs='+', default=['astar', 'jps'], choices=list(STRATEGIES))
+    parser.add_argument('--unreachable', action='store_true',
+                        help='Also draw queries between regions, which have no path.')
+    args = parser.parse_args(argv)
+
+    blueprint = _default_cache().load_or_generate(**dict(_BOARD_VALUES, cell_size=args.cell_size,
+                                                         grid_scale=args.grid_scale), seed=args.seed)
+    graph, passable = blueprint._adjacency, _np.asarray(blueprint._passable, dtype=bool)
+    graph.lists()
+    min_distance = args.min_distance if args.min_distance is not None else graph.width / 4
+    queries = sample_queries(passable, graph.width, args.queries, args.seed, min_distance,
+                             None if args.unreachable else blueprint._region)
+    if len(queries) < args.queries:
+        print(f'Only found {len(queries)} of {args.queries} queries on this map.')
+        if not queries:
+            return {}
+    results = run(graph, passable, queries, args.strategies)
+    print(f'{graph.width}x{graph.height} cells, {len(queries)} queries')
+    print(f'{"strategy":<10}{"setup s":>10}{"ms/query":>10}{"expanded":>12}{"found":>8}{"mean cost":>11}')
+    for name, totals in results.items():
+        found = max(totals['found'], 1)
+        print(f'{name:<10}{totals["setup"]:>10.3f}{1000 * totals["seconds"] / len(queries):>10.2f}'
+              f'{totals["expanded"] // len(queries):>12}{totals["found"]:>8}{totals["cost"] / found:>11.2f}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import hashlib as _hashlib
+import json as _json
+import logging as _logging
+import os as _os
+import threading as _threading
+import time as _time
+from typing import Optional as _Optional
+
+from .grid_blueprint import (
+    GENERATOR_VERSION,
+    GridBlueprint as _GridBlueprint,
+    blueprint_parameters as _blueprint_parameters,
+    save_grid as _save_grid,
+)
+
+_logging.basicConfig(level=_logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_DEFAULT_DIRECTORY = _os.path.join(_os.path.expanduser('~'), '.cache', 'newgame', 'blueprints')
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+_INDEX_NAME = 'index.json'
+
+
+def _file_digest(path):
+    digest = _hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BlueprintCache:
+    """
+    An on-disk cache of generated blueprints, stored as grid files and addressed by a hash of the
+    generation parameters, seed and generator version.
+
+    An index beside the files records the content hash, size, modification time and last use of every
+    entry. The hash is taken when an entry is written; a hit only checks the file's size and modification
+    time, so that loading stays a memory map rather than a read of the whole file. Entries whose file
+    changed are dropped, and the least recently used entries are evicted once the cache grows past
+    `max_bytes`. Blueprints generated without a seed are not cached, since nothing asks for their
+    freshly drawn seed again.
+
+    Args:
+        directory (str): Where the cached grid files are kept.
+        max_bytes (int): The most disk space the cached files may take up.
+    """
+
+    def __init__(self, directory: _Optional[str] = None, max_bytes: int = _DEFAULT_MAX_BYTES):
+        self.directory = directory if directory is not None else _DEFAULT_DIRECTORY
+        self.max_bytes = max_bytes
+        self._lock = _threading.Lock()
+        self._index_path = _os.path.join(self.directory, _INDEX_NAME)
+        self._index = self._read_index()
+
+    @staticmethod
+    def key(parameters: dict):
+        """Returns the cache key of a complete set of blueprint parameters."""
+        keyed = dict(parameters, generator_version=GENERATOR_VERSION)
+        return _hashlib.sha256(_json.dumps(keyed, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return _os.path.join(self.directory, key + '.grid')
+
+    def journal_path(self, parameters: dict):
+        """Returns where a grid built from `parameters` keeps its journal checkpoint, beside its cached file.
+        Only seeded grids have one."""
+        if parameters.get('seed') is None:
+            raise ValueError('A grid without a seed has no journal path')
+        return _os.path.join(self.directory, self.key(parameters) + '.state.json')
+
+    def _read_index(self):
+        try:
+            with open(self._index_path, 'r') as file:
+                return _json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        temporary = self._index_path + '.tmp'
+        with open(temporary, 'w') as file:
+            _json.dump(self._index, file)
+        _os.replace(temporary, self._index_path)
+
+    def _discard(self, key):
+        self._index.pop(key, None)
+        try:
+            _os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, parameters: dict):
+        """Returns the cached blueprint for `parameters`, or None if there is no valid entry."""
+        if parameters.get('seed') is None:
+            return None
+        key = self.key(parameters)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            path = self._path(key)
+            try:
+                stat = _os.stat(path)
+                if 'mtime_ns' in entry:
+                    valid = stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+                else:
+                    # Entries indexed before modification times were recorded are hashed once.
+                    valid = _file_digest(path) == entry['sha256']
+                    entry['mtime_ns'] = stat.st_mtime_ns
+            except OSError:
+                valid = False
+            if not valid:
+                _logging.warning(f'Discarding invalid cached blueprint {key}.')
+                self._discard(key)
+                self._write_index()
+                return None
+            entry['used'] = _time.time()
+            self._write_index()
+        return _GridBlueprint.from_file(path)
+
+    def put(self, blueprint: _GridBlueprint):
+        """Stores a blueprint and evicts the least recently used entries past the size cap."""
+        key = self.key(blueprint.parameters)
+        path = self._path(key)
+        with self._lock:
+            _os.makedirs(self.directory, exist_ok=True)
+            temporary = path + '.tmp'
+            _save_grid(blueprint, temporary)
+            _os.replace(temporary, path)
+            stat = _os.stat(path)
+            self._index[key] = {'sha256': _file_digest(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                'used': _time.time()}
+            self._evict()
+            self._write_index()
+        return key
+
+    def _evict(self):
+        total = sum(entry['size'] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]['size']
+            self._discard(key)
+
+    def load_or_generate(self, workers: _Optional[int] = None, **parameters):
+        """Returns the cached blueprint for the given parameters, generating and caching it on a miss.
+        Without a seed a new world is generated every time and not cached. `workers` is passed on to the
+        generator."""
+        parameters = _blueprint_parameters(**parameters)
+        blueprint = self.get(parameters)
+        if blueprint is not None:
+            _logging.info('Loaded blueprint from cache.')
+            return blueprint
+        blueprint = _GridBlueprint(**parameters, workers=workers)
+        if parameters['seed'] is None:
+            return blueprint
+        try:
+            self.put(blueprint)
+        except OSError as e:
+            _logging.warning(f'Could not cache blueprint: {e}')
+        return blueprint
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Returns the shared cache in the default directory."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = BlueprintCache()
+    return _default_cache
@@ -1,15 +1,17 @@
 import logging as _logging
-import math
 import random
-from collections import defaultdict
 import pyglet.window
 import pyglet.graphics
 import pyglet.gl
 from pyglet.gl import *
+import pyglet.math
+
+import numpy as _np
 
 from src.components.core.scene import *
 from src.components.core.turn import *
 from src.components.map.grid import Grid as _Grid, _TERRAIN_DICT
+from src.components.map.grid_blueprint import BOARD_VALUES as _BOARD_VALUES, _TERRAIN_COLOR_TABLE, new_seed as _new_seed
 from src.components.entity.actor.base_actor import _BaseActor
 
 # from src.components.player.actor._base_actor import _BaseActor
@@ -19,7 +21,35 @@ _logging.basicConfig(level=_logging.INFO, format="%(asctime)s - %(levelname)s -
 key = pyglet.window.key
 mouse = pyglet.window.mouse
 
-_board_values = {'cell_size': 12, 'grid_scale': 1, 'noise_scale': 370, 'noise_octaves': 36, 'noise_roughness': 1.29}
+# Corners of each cell's quad, in the order of Board.calculate_vertices, as two triangles.
+_QUAD_TRIANGLES = _np.array([0, 1, 2, 0, 2, 3])
+
+_terrain_vertex_shader = '''
+    #version 120
+    attribute vec2 position;
+    attribute vec3 colors;
+    varying vec3 vertex_colors;
+
+    uniform mat4 projection;
+
+    void main()
+    {
+        gl_Position = projection * vec4(position, 0.0, 1.0);
+        vertex_colors = colors;
+    }
+'''
+
+_terrain_fragment_shader = '''
+    #version 120
+    varying vec3 vertex_colors;
+
+    void main()
+    {
+        gl_FragColor = vec4(vertex_colors, 1.0);
+    }
+'''
+
+_board_values = _BOARD_VALUES
 
 
 def _create_displacement_map(noise_texture, width, height):
@@ -80,13 +110,25 @@ def _create_distortion_shader(displacement_map):
     return program
 
 
+def _create_terrain_shader():
+    return pyglet.graphics.shader.ShaderProgram(
+        pyglet.graphics.shader.Shader(_terrain_vertex_shader, 'vertex'),
+        pyglet.graphics.shader.Shader(_terrain_fragment_shader, 'fragment')
+    )
+
+
 class Board(Scene):
     def __init__(self, window):
         super(Board, self).__init__(window, 'Board')
 
         # self.label = pyglet.text.Label('Scene 1', font_name='Times New Roman', font_size=36, x=window.width // 2,
         #                                y=window.height // 2, anchor_x='center', anchor_y='center')
-        self.board = _Grid(**_board_values)
+        # The Board draws its world's seed itself, so the world is cached and journalled and comes back with
+        # its edits on reactivation.
+        self.seed = getattr(self, 'seed', None)
+        if self.seed is None:
+            self.seed = _new_seed()
+        self.board = _Grid(**_board_values, seed=self.seed)
         self.character = _BaseActor(self, 'Player', 'Player', 'Fighter', 'Human')
         self.enemy = _BaseActor(self, 'Enemy', 'Enemy', 'Fighter', 'Human')
         self.cell_size = _board_values['cell_size']
@@ -104,11 +146,28 @@ class Board(Scene):
         self.pan_dx = 0
         self.pan_dy = 0
         self.dirty_flag = True
-        self.vertices = []
+        self.terrain_batch = pyglet.graphics.Batch()
+        self.terrain_program = _create_terrain_shader()
+        self.terrain_group = pyglet.graphics.ShaderGroup(self.terrain_program)
+        self.terrain_chunks = {}
+        self.chunk_cells = None
+        self.cell_chunk = None
+        self.dirty_chunks = set()
+        self.board.push_change_handler(self.mark_terrain_dirty)
         self.selected_cell = None
         self.transitioning = False
         self.turn_manager = TurnManager(self.window, self.character, self.enemy)
 
+    def close(self):
+        """Stops the grid's journal and path workers after a final checkpoint."""
+        self.board.remove_change_handler(self.mark_terrain_dirty)
+        self.board.close()
+
+    def reactivate(self):
+        # The scene is rebuilt around a new Grid, which recovers the journal this one leaves behind.
+        self.close()
+        super().reactivate()
+
     def take_screenshot(self):
         pyglet.image.get_buffer_manager().get_color_buffer().save('screen.png')
 
@@ -204,7 +263,8 @@ class Board(Scene):
 
     def enemy_move(self):
         _logging.info('Enemy Move...')
-        self.turn_manager.get_current_actor()._get_path_to(self.character._cell_name)
+        # Every enemy chases the character, so they share one flow field instead of searching apiece.
+        self.turn_manager.get_current_actor()._follow_field(self.board.flow_field(self.character._cell_name))
         self.turn_manager.get_current_actor()._set_traveling(True)
 
     def enemy_turn(self):
@@ -227,8 +287,8 @@ class Board(Scene):
                     self.selected_cell = self.board.get_cell_by_position(x_, y_)
                     if self.selected_cell is not None:
                         _logging.info(f'Selected cell: {self.selected_cell.designation}')
-                        self.character._get_path_to(self.selected_cell.designation)
-                        self.character._set_traveling(True)
+                        # The search runs off the input handler; the character sets off when it completes.
+                        self.character._request_path_to(self.selected_cell.designation)
                     else:
                         _logging.info(f'Left click @ {x}, {y} - None')
         return super().recv_mouse_press(x, y, btn, modifiers)
@@ -274,65 +334,78 @@ class Board(Scene):
         return [x, y, x, y + height - 1, x + width - 1, y + height - 1,
                 x + width - 1, y]
 
-    def prepare_vertices(self):
-        terrains = defaultdict(list)
-        # Draw each quadrant as a single shape
-        for quadrant in self.board.quadrants:
-            for cell in list(quadrant.values())[1]:
-                cell = self.board.cells[cell]
-                verts = self.calculate_vertices(cell.x, cell.y)
-                # Perform vertex simplification
-                threshold = 0.1  # Adjust as needed
-                simplified_verts = []
-                for i in range(0, len(verts), 2):
-                    if i + 1 >= len(verts):
-                        break
-                    cur_vert = verts[i:i + 2]
-                    if not simplified_verts:
-                        simplified_verts.extend(cur_vert)
-                    else:
-                        prev_vert = simplified_verts[-2:]
-                        dist = math.sqrt((cur_vert[0] - prev_vert[0]) ** 2 + (cur_vert[1] - prev_vert[1]) ** 2)
-                        if dist > threshold:
-                            simplified_verts.extend(cur_vert)
-                verts = simplified_verts
-                terrain_key = cell.terrain_str
-                terrains[terrain_key] += verts
-        return terrains
+    def terrain_chunk_cells(self):
+        """Returns the cell indices of each chunk of terrain, a quadrant of the board, by quadrant."""
+        quadrant = _np.asarray(self.board._store.quadrant)
+        return {int(q): _np.flatnonzero(quadrant == q) for q in _np.unique(quadrant)}
+
+    def mark_terrain_dirty(self, index):
+        """Marks the chunk holding a changed cell for upload on the next frame; the grid calls this for every
+        cell whose passability changes."""
+        if self.cell_chunk is not None:
+            self.dirty_chunks.add(int(self.cell_chunk[index]))
+
+    def terrain_chunk_data(self, cells):
+        """Returns the quad corners, colours and triangle indices of a chunk of cells, four vertices per cell.
+        The corners are in board units; zooming only changes the projection, so the chunks stay valid.
+        Cells obstructed or made impassable on passable terrain, or the reverse, are drawn at half brightness."""
+        store = self.board._store
+        x = store.x[cells].astype(_np.float32)
+        y = store.y[cells].astype(_np.float32)
+        far_x, far_y = x + self.cell_size - 1, y + self.cell_size - 1
+        positions = _np.stack([x, y, x, far_y, far_x, far_y, far_x, y], axis=1).ravel()
+        colors = _TERRAIN_COLOR_TABLE[store.terrain_int[cells]]
+        changed = store.passable[cells] != store.terrain_passable[cells]
+        colors[changed] //= 2
+        colors = _np.repeat(colors, 4, axis=0).ravel()
+        indices = (_np.arange(len(cells))[:, None] * 4 + _QUAD_TRIANGLES).ravel()
+        return positions, colors, indices
+
+    def upload_terrain_chunk(self, chunk, cells):
+        """Uploads a chunk's vertices into its vertex list in the terrain batch, creating it on first use."""
+        positions, colors, indices = self.terrain_chunk_data(cells)
+        vertex_list = self.terrain_chunks.get(chunk)
+        if vertex_list is None:
+            self.terrain_chunks[chunk] = self.terrain_program.vertex_list_indexed(
+                len(cells) * 4, GL_TRIANGLES, indices.tolist(), batch=self.terrain_batch, group=self.terrain_group,
+                position=('f', positions.tolist()), colors=('Bn', colors.tolist()))
+        else:
+            vertex_list.position[:] = positions.tolist()
+            vertex_list.colors[:] = colors.tolist()
+
+    def prepare_terrain(self):
+        """Uploads every chunk when the dirty flag is set, and otherwise only the chunks whose cells changed
+        since the last frame; the other vertex lists already hold their terrain."""
+        if self.dirty_flag:
+            self.chunk_cells = self.terrain_chunk_cells()
+            self.cell_chunk = _np.empty(len(self.board._store), dtype=_np.int32)
+            for chunk, cells in self.chunk_cells.items():
+                self.cell_chunk[cells] = chunk
+            self.dirty_chunks = set(self.chunk_cells)
+            self.dirty_flag = False
+        for chunk in self.dirty_chunks:
+            self.upload_terrain_chunk(chunk, self.chunk_cells[chunk])
+        self.dirty_chunks.clear()
 
     def draw_objects(self):
-        if getattr(self, 'dirty_flag', True):
-            self.vertices = self.prepare_vertices()
-            self.dirty_flag = False
+        self.prepare_terrain()
 
-        # Draw each terrain type as a single shape
-        terrains = self.vertices
-        pyglet.gl.glMatrixMode(pyglet.gl.GL_PROJECTION)
-        pyglet.gl.glPushMatrix()
-        pyglet.gl.glLoadIdentity()
         min_x = self.center_x - (self.window.width / 2) * self.zoom_scale
         max_x = self.center_x + (self.window.width / 2) * self.zoom_scale
         min_y = self.center_y - (self.window.height / 2) * self.zoom_scale
         max_y = self.center_y + (self.window.height / 2) * self.zoom_scale
+        # The terrain is drawn from the vertex lists already on the GPU, a draw call or so per frame.
+        self.terrain_program.use()
+        self.terrain_program['projection'] = pyglet.math.Mat4.orthogonal_projection(min_x, max_x, min_y, max_y, -1, 1)
+        self.terrain_batch.draw()
+
+        pyglet.gl.glMatrixMode(pyglet.gl.GL_PROJECTION)
+        pyglet.gl.glPushMatrix()
+        pyglet.gl.glLoadIdentity()
         pyglet.gl.glOrtho(min_x, max_x, min_y, max_y, -1, 1)
         pyglet.gl.glMatrixMode(pyglet.gl.GL_MODELVIEW)
         pyglet.gl.glLoadIdentity()
 
-        for terrain, vertex_list in terrains.items():
-            if vertex_list:
-                pyglet.gl.glBegin(pyglet.gl.GL_QUADS)
-                for i in range(0, len(vertex_list), 8):
-                    if i + 7 >= len(vertex_list):
-                        break
-                    terrain_color = _TERRAIN_DICT[terrain]['color']
-                    r, g, b = tuple(map(lambda x: x / 255.0, terrain_color))
-                    pyglet.gl.glColor3f(r, g, b)
-                    pyglet.gl.glVertex2f(vertex_list[i], vertex_list[i + 1])
-                    pyglet.gl.glVertex2f(vertex_list[i + 2], vertex_list[i + 3])
-                    pyglet.gl.glVertex2f(vertex_list[i + 4], vertex_list[i + 5])
-                    pyglet.gl.glVertex2f(vertex_list[i + 6], vertex_list[i + 7])
-                pyglet.gl.glEnd()
-
         # Draw the character
         pos = self.character._position
         x, y = pos[0], pos[1]
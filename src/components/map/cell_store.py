@@ -0,0 +1,114 @@
+import numpy as _np
+
+
+class CellStore:
+    """
+    Columnar storage for the state of every cell on a grid, indexed by cell index.
+
+    Dense state lives in typed NumPy arrays; the objects attached to a few cells (occupants,
+    obstructions, titled entities and groups) live in dictionaries keyed by cell index.
+
+    Args:
+        blueprint (GridBlueprint): The blueprint to take coordinates, terrain and quadrants from.
+
+    Attributes:
+        x (ndarray): The x coordinate of each cell.
+        y (ndarray): The y coordinate of each cell.
+        terrain_int (ndarray): The terrain type of each cell, see _TERRAIN_DICT.
+        terrain_raw (ndarray): The blended height value each terrain type was classified from.
+        terrain_passable (ndarray): Whether the terrain of each cell can be crossed.
+        passable (ndarray): Whether each cell can currently be crossed.
+        walkable (ndarray): Whether each cell is passable and unoccupied, the bitmap pathfinding reads.
+        occupied (ndarray): Whether each cell is occupied.
+        obstructed (ndarray): Whether each cell is obstructed.
+        entitled (ndarray): Whether each cell is entitled.
+        quadrant (ndarray): The quadrant index of each cell.
+    """
+    __slots__ = (
+        'size',
+        'x',
+        'y',
+        'terrain_int',
+        'terrain_raw',
+        'terrain_passable',
+        'passable',
+        'walkable',
+        'occupied',
+        'obstructed',
+        'entitled',
+        'quadrant',
+        'occupant',
+        'obstruction',
+        'entity',
+        'title',
+        'groups',
+    )
+
+    def __init__(self, blueprint):
+        self.size = len(blueprint._cell_list)
+        self.x = blueprint._coordinates[:, 0]
+        self.y = blueprint._coordinates[:, 1]
+        self.terrain_int = blueprint._terrain_int
+        self.terrain_raw = blueprint._terrain_raw.astype(_np.float32)
+        self.terrain_passable = blueprint._passable
+        self.passable = blueprint._passable.copy()
+        self.walkable = self.passable.copy()
+        self.occupied = _np.zeros(self.size, dtype=bool)
+        self.obstructed = _np.zeros(self.size, dtype=bool)
+        self.entitled = _np.zeros(self.size, dtype=bool)
+        # Copied like passable: a blueprint loaded from a grid file holds read-only memory maps, and the
+        # quadrant of a cell can be reassigned.
+        self.quadrant = blueprint._quadrant_index.copy()
+        self.occupant = {}
+        self.obstruction = {}
+        self.entity = {}
+        self.title = {}
+        self.groups = {}
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, column).nbytes for column in (
+            'x', 'y', 'terrain_int', 'terrain_raw', 'terrain_passable', 'passable', 'walkable', 'occupied', 'obstructed',
+            'entitled', 'quadrant'))
+
+    def _update_walkable(self, index):
+        self.walkable[index] = self.passable[index] and not self.occupied[index]
+
+    def set_passable(self, index, value):
+        self.passable[index] = value
+        self._update_walkable(index)
+
+    def occupy(self, index, occupant):
+        self.occupied[index] = True
+        self.occupant[index] = occupant
+        self.walkable[index] = False
+
+    def vacate(self, index):
+        self.occupied[index] = False
+        self.occupant.pop(index, None)
+        self._update_walkable(index)
+
+    def obstruct(self, index, obstruction):
+        self.passable[index] = False
+        self.walkable[index] = False
+        self.obstructed[index] = True
+        self.obstruction[index] = obstruction
+
+    def destruct(self, index):
+        self.passable[index] = self.terrain_passable[index]
+        self.obstructed[index] = False
+        self.obstruction.pop(index, None)
+        self._update_walkable(index)
+
+    def entitle(self, index, entity, title):
+        self.entitled[index] = True
+        self.entity[index] = entity
+        self.title[index] = title
+
+    def divest(self, index):
+        self.entitled[index] = False
+        self.entity.pop(index, None)
+        self.title.pop(index, None)
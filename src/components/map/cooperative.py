@@ -0,0 +1,155 @@
+import heapq as _heapq
+from typing import Sequence as _Sequence
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .adjacency import AdjacencyGraph as _AdjacencyGraph
+
+# The cost of standing still for one step; a wait is as dear as an orthogonal move.
+WAIT_COST = 1.0
+
+
+class ReservationTable:
+    """
+    The (cell, step) slots claimed by the actors planned so far, for the first `window` steps.
+
+    A cell is claimed at every step an actor stands on it, a cell an actor stops on is claimed from its
+    arrival to the end of the window, and every move is claimed too, so that no later actor swaps
+    places with it.
+
+    Args:
+        window (int): The number of steps reservations cover.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._cells = set()
+        self._moves = set()
+        self._parked = {}
+        self._latest = {}
+
+    def __len__(self):
+        return len(self._cells)
+
+    def clear(self):
+        self._cells.clear()
+        self._moves.clear()
+        self._parked.clear()
+        self._latest.clear()
+
+    def reserve(self, path: _Sequence[int]):
+        """Claims the slots of a path of cell indices, one per step and starting at step 0. The actor is
+        taken to stay on the last cell for the rest of the window."""
+        for step, cell in enumerate(path[:self.window]):
+            self._cells.add((step, cell))
+            self._latest[cell] = max(self._latest.get(cell, -1), step)
+        for step in range(min(len(path), self.window) - 1):
+            self._moves.add((step, path[step], path[step + 1]))
+        if len(path) <= self.window:
+            self._parked[path[-1]] = min(self._parked.get(path[-1], self.window), len(path) - 1)
+            self._latest[path[-1]] = self.window
+
+    def is_free(self, cell: int, step: int):
+        """Checks whether a cell is unclaimed at a step. Every slot past the window is free."""
+        if step >= self.window:
+            return True
+        return (step, cell) not in self._cells and self._parked.get(cell, self.window) > step
+
+    def crosses(self, a: int, b: int, step: int):
+        """Checks whether moving from a to b between `step` and the next swaps places with a planned move."""
+        return (step, b, a) in self._moves
+
+    def free_from(self, cell: int, step: int):
+        """Checks whether a cell stays unclaimed from a step to the end of the window, so an actor may stop there."""
+        if step >= self.window:
+            return True
+        return self._latest.get(cell, -1) < step
+
+
+class CooperativePlanner:
+    """
+    Plans the moves of a team of actors together, one actor after another in priority order, on a
+    space-time grid: each search may also wait in place, and it routes around the (cell, step) slots
+    that the actors before it reserved, so the team's paths never meet in a cell or swap places.
+
+    Reservations only reach `window` steps ahead, an actor's movements for the turn, and past the
+    window a search carries on as plain A*, so every search ends even when its goal is blocked.
+    Actors that have not been planned yet hold their cells for the first step, so each still has a
+    step in which to make way for the actors planned before it.
+
+    Args:
+        graph (AdjacencyGraph): The grid's adjacency.
+        walkable (ndarray): Whether each cell can be entered; read on every plan. The team's own cells
+            are always enterable.
+        window (int): The number of steps reservations cover.
+
+    Attributes:
+        reservations (ReservationTable): The slots claimed by the last plan.
+        expanded (int): The nodes expanded by the last plan.
+    """
+
+    def __init__(self, graph: _AdjacencyGraph, walkable: _np.ndarray, window: int = 10):
+        self.graph = graph
+        self.walkable = walkable
+        self.window = window
+        self.reservations = ReservationTable(window)
+        self.expanded = 0
+
+    def plan(self, moves: _Sequence[tuple]):
+        """Plans a (start, goal) pair of cell indices per actor, highest priority first, and returns one
+        path per pair in the same order: the cell at each step from the start, with a cell repeated for
+        each wait, or None where the goal cannot be reached, in which case the actor stays put."""
+        self.reservations.clear()
+        self.expanded = 0
+        bitmap = bytearray(self.walkable.tobytes())
+        for start, goal in moves:
+            bitmap[start] = bitmap[goal] = 1
+        holding = {}
+        for start, _ in moves:
+            holding[start] = holding.get(start, 0) + 1
+        paths = []
+        for start, goal in moves:
+            holding[start] -= 1
+            path = self._search(bitmap, start, goal, {cell for cell, count in holding.items() if count})
+            self.reservations.reserve(path if path is not None else [start])
+            paths.append(path)
+        return paths
+
+    def _search(self, bitmap, start, goal, held):
+        offsets, indices = self.graph.lists()
+        width, window, table = self.graph.width, self.window, self.reservations
+        frontier = [(_pathfinding.octile(start, goal, width), 0.0, 0, start)]
+        came_from = {}
+        best = {(start, 0): 0.0}
+        while frontier:
+            _, g, step, node = _heapq.heappop(frontier)
+            if g > best.get((node, step), _np.inf):
+                continue
+            self.expanded += 1
+            if node == goal and table.free_from(goal, step):
+                path = [node]
+                state = (node, step)
+                while state in came_from:
+                    state = came_from[state]
+                    path.append(state[0])
+                path.reverse()
+                return path
+            # Past the window the step stops counting and the search is plain A*.
+            following = min(step + 1, window)
+            options = [(neighbor, _pathfinding.step_cost(node, neighbor, width))
+                       for neighbor in indices[offsets[node]:offsets[node + 1]]]
+            if step < window:
+                options.append((node, WAIT_COST))
+            for neighbor, cost in options:
+                if not bitmap[neighbor] or (step == 0 and neighbor in held):
+                    continue
+                if step < window and (not table.is_free(neighbor, step + 1) or table.crosses(node, neighbor, step)):
+                    continue
+                candidate = g + cost
+                if candidate < best.get((neighbor, following), _np.inf):
+                    best[neighbor, following] = candidate
+                    came_from[neighbor, following] = (node, step)
+                    _heapq.heappush(frontier, (candidate + _pathfinding.octile(neighbor, goal, width), candidate,
+                                               following, neighbor))
+        return None
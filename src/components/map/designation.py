@@ -0,0 +1,91 @@
+import itertools as _itertools
+from string import ascii_lowercase as _LOWER, ascii_uppercase as _UPPER
+from typing import Optional as _Optional, Sequence as _Sequence
+
+# Every designation ends with its file, zero padded to this many digits.
+FILE_DIGITS = 5
+
+
+def _rank_name_stream():
+    yield from _LOWER  # 'a' to 'z'
+    yield from _UPPER  # 'A' to 'Z'
+    for i, j in _itertools.product(_LOWER, _LOWER):
+        yield i + j  # 'aa' to 'zz'
+    for i, j in _itertools.product(_UPPER[1:], _LOWER):
+        yield i + j  # 'Ba' to 'Zz'
+    for i, j, k in _itertools.product(_LOWER, _LOWER, _LOWER):
+        yield i + j + k  # 'aaa' to 'zzz'
+
+
+def rank_names(length: _Optional[int] = None):
+    """Returns the first `length` rank names, or all of them."""
+    return list(_itertools.islice(_rank_name_stream(), length))
+
+
+def file_names(length: int):
+    """Returns the first `length` file names."""
+    return [f'{f + 1:0{FILE_DIGITS}d}' for f in range(length)]
+
+
+class DesignationCodec:
+    """
+    Converts between cell designations, (rank, file) pairs and flat cell indices in constant time.
+
+    A designation is the rank name followed by the zero padded file number, e.g. 'ab00042'. The flat
+    cell index of (rank, file) is rank * width + file.
+
+    Args:
+        ranks (list): The rank names, indexed by rank.
+        files (list): The file names, indexed by file.
+    """
+    __slots__ = ('ranks', 'files', 'height', 'width', '_rank_index')
+
+    def __init__(self, ranks: _Sequence[str], files: _Sequence[str]):
+        self.ranks = ranks
+        self.files = files
+        self.height = len(ranks)
+        self.width = len(files)
+        self._rank_index = {rank: r for r, rank in enumerate(ranks)}
+
+    def __len__(self):
+        return self.height * self.width
+
+    def encode(self, rank_index: int, file_index: int):
+        """Returns the designation of the cell at (rank, file)."""
+        return self.ranks[rank_index] + self.files[file_index]
+
+    def decode(self, designation: str):
+        """Returns the (rank, file) pair of a designation. Raises KeyError for designations that are
+        not on the grid."""
+        try:
+            rank_index = self._rank_index[designation[:-FILE_DIGITS]]
+            file_index = int(designation[-FILE_DIGITS:]) - 1
+        except (KeyError, TypeError, ValueError):
+            raise KeyError(designation) from None
+        if not 0 <= file_index < self.width or self.files[file_index] != designation[-FILE_DIGITS:]:
+            raise KeyError(designation)
+        return rank_index, file_index
+
+    def to_index(self, designation: str):
+        """Returns the flat cell index of a designation."""
+        rank_index, file_index = self.decode(designation)
+        return rank_index * self.width + file_index
+
+    def from_index(self, index: int):
+        """Returns the designation of a flat cell index."""
+        rank_index, file_index = self.split(index)
+        return self.ranks[rank_index] + self.files[file_index]
+
+    def split(self, index: int):
+        """Returns the (rank, file) pair of a flat cell index."""
+        if not 0 <= index < self.height * self.width:
+            raise KeyError(index)
+        return divmod(index, self.width)
+
+    def index(self, rank_index: int, file_index: int):
+        """Returns the flat cell index of (rank, file)."""
+        return rank_index * self.width + file_index
+
+    def designations(self):
+        """Returns every designation in cell index order."""
+        return [rank + file for rank, file in _itertools.product(self.ranks, self.files)]
@@ -0,0 +1,57 @@
+import numpy as _np
+
+
+def _lattice_step(height: int, width: int):
+    """Returns the smallest power of two spanning the shorter side of the map."""
+    step = 1
+    while step < min(height, width) - 1:
+        step *= 2
+    return step
+
+
+def _square(grid, rows, cols, half, roughness, rng):
+    """Sets the edge midpoints at `rows` x `cols` from their four diamond neighbours, wrapping at the
+    border."""
+    row_period = max(grid.shape[0] - 1, 1)
+    col_period = max(grid.shape[1] - 1, 1)
+    up = (rows - half) % row_period
+    down = (rows + half) % row_period
+    left = (cols - half) % col_period
+    right = (cols + half) % col_period
+    average = (grid[_np.ix_(up, cols)] + grid[_np.ix_(down, cols)] +
+               grid[_np.ix_(rows, left)] + grid[_np.ix_(rows, right)]) / 4.0
+    grid[_np.ix_(rows, cols)] = average + rng.uniform(-1.0, 1.0, average.shape) * roughness
+
+
+def diamond_square(height: int, width: int, roughness: float, rng: _np.random.Generator):
+    """Generates a `height` x `width` diamond-square height field.
+
+    The map is covered by a lattice of squares whose side is a power of two, so every diamond and
+    square pass is a strided slice over the whole lattice with one batch of random offsets drawn
+    from `rng`. The roughness halves after each pass. The result is not normalized."""
+    step = _lattice_step(height, width)
+    rows = -(-max(height - 1, 1) // step) * step + 1
+    cols = -(-max(width - 1, 1) // step) * step + 1
+    grid = _np.zeros((rows, cols))
+
+    # Seed the corners of every lattice square.
+    corners = grid[::step, ::step]
+    corners[...] = rng.uniform(0.0, 1.0, corners.shape)
+
+    while step > 1:
+        half = step // 2
+
+        # Diamond step: the centre of every square from its four corners.
+        average = (grid[:-1:step, :-1:step] + grid[:-1:step, step::step] +
+                   grid[step::step, :-1:step] + grid[step::step, step::step]) / 4.0
+        grid[half::step, half::step] = average + rng.uniform(-1.0, 1.0, average.shape) * roughness
+
+        # Square step: the midpoints of the horizontal edges, then of the vertical edges.
+        _square(grid, _np.arange(0, rows, step), _np.arange(half, cols, step), half, roughness, rng)
+        _square(grid, _np.arange(half, rows, step), _np.arange(0, cols, step), half, roughness, rng)
+
+        # Reduce the roughness and the step size for each iteration
+        roughness /= 2.0
+        step = half
+
+    return grid[:height, :width]
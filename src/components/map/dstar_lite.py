@@ -0,0 +1,225 @@
+import heapq as _heapq
+import math as _math
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .adjacency import AdjacencyGraph as _AdjacencyGraph
+
+_KEY_TOLERANCE = 1e-9
+_OCTILE_SLACK = _pathfinding.DIAGONAL - 2
+
+
+class DStarLite:
+    """
+    An incremental planner (D* Lite) that an actor keeps between turns. The search runs backwards from
+    the goal, so the actor moving along its path costs nothing to account for, and when cells change or
+    the goal moves only the part of the search those changes reach is repaired, instead of planning
+    again from scratch.
+
+    Cells changed since the last plan are found by comparing the bitmap against a snapshot taken then,
+    so the planner needs no notifications from the grid. The start and goal are always enterable, like
+    the bitmaps of Grid.get_path.
+
+    Args:
+        graph (AdjacencyGraph): The grid's adjacency.
+        walkable (ndarray): Whether each cell can be entered; read again on every plan.
+        start (int): The cell index the actor stands on.
+        goal (int): The cell index to reach.
+
+    Attributes:
+        expanded (int): The nodes expanded by the last plan.
+    """
+
+    def __init__(self, graph: _AdjacencyGraph, walkable: _np.ndarray, start: int, goal: int):
+        self.graph = graph
+        self.walkable = walkable
+        self.expanded = 0
+        self._reset(start, goal)
+
+    def _reset(self, start, goal):
+        self.start = start
+        self.goal = goal
+        self._last = start
+        self._km = 0.0
+        self._g = [_math.inf] * len(self.graph)
+        self._rhs = [_math.inf] * len(self.graph)
+        self._rhs[goal] = 0.0
+        self._queued = {}
+        self._frontier = []
+        self._open = self._snapshot()
+        self._push(goal)
+
+    def _snapshot(self):
+        bitmap = bytearray(self.walkable.tobytes())
+        bitmap[self.start] = 1
+        bitmap[self.goal] = 1
+        return bitmap
+
+    def _key(self, node):
+        best = min(self._g[node], self._rhs[node])
+        return best + _pathfinding.octile(self.start, node, self.graph.width) + self._km, best
+
+    def _push(self, node):
+        key = self._key(node)
+        self._queued[node] = key
+        _heapq.heappush(self._frontier, (key[0], key[1], node))
+
+    def _update_vertex(self, node):
+        if self._g[node] != self._rhs[node]:
+            self._push(node)
+        else:
+            self._queued.pop(node, None)
+
+    def _best_rhs(self, node):
+        """The cheapest step from a cell plus the cost onwards, i.e. what its cost should be."""
+        if not self._open[node]:
+            return _math.inf
+        offsets, indices = self.graph.lists()
+        open_, g, width = self._open, self._g, self.graph.width
+        best = _math.inf
+        for neighbor in indices[offsets[node]:offsets[node + 1]]:
+            if open_[neighbor]:
+                delta = neighbor - node
+                cost = g[neighbor] + (1.0 if delta == 1 or delta == -1 or delta == width or delta == -width
+                                      else _pathfinding.DIAGONAL)
+                if cost < best:
+                    best = cost
+        return best
+
+    def _refresh(self, node):
+        if node != self.goal:
+            self._rhs[node] = self._best_rhs(node)
+        self._update_vertex(node)
+
+    def _top(self):
+        frontier = self._frontier
+        while frontier:
+            k1, k2, node = frontier[0]
+            if self._queued.get(node) == (k1, k2):
+                return (k1, k2), node
+            _heapq.heappop(frontier)
+        return (_math.inf, _math.inf), None
+
+    def _compute(self):
+        offsets, indices = self.graph.lists()
+        g, rhs, open_, queued, frontier = self._g, self._rhs, self._open, self._queued, self._frontier
+        width, goal, start, km = self.graph.width, self.goal, self.start, self._km
+        start_rank, start_file = divmod(start, width)
+        inf = _math.inf
+
+        def key_of(node):
+            # As _key, inlined for the search loop.
+            best = g[node] if g[node] < rhs[node] else rhs[node]
+            rank, file = divmod(node, width)
+            dr = rank - start_rank if rank > start_rank else start_rank - rank
+            df = file - start_file if file > start_file else start_file - file
+            h = dr + df + _OCTILE_SLACK * (dr if dr < df else df)
+            return best + h + km, best
+
+        def push(node, key=None):
+            key = key if key is not None else key_of(node)
+            queued[node] = key
+            _heapq.heappush(frontier, (key[0], key[1], node))
+
+        expanded = 0
+        while True:
+            top, node = self._top()
+            start_best = g[start] if g[start] < rhs[start] else rhs[start]
+            # Keys equal to the start's are expanded too; sums of diagonal steps taken in a different order
+            # can differ in the last bit, and skipping such a node would leave a stale cost on the path.
+            if node is None or (top[0] > start_best + km + _KEY_TOLERANCE and rhs[start] == g[start]):
+                break
+            expanded += 1
+            key = key_of(node)
+            if top < key:
+                push(node, key)
+                continue
+            _heapq.heappop(frontier)
+            del queued[node]
+            neighbors = indices[offsets[node]:offsets[node + 1]]
+            if g[node] > rhs[node]:
+                base = g[node] = rhs[node]
+                if not open_[node]:
+                    continue
+                for neighbor in neighbors:
+                    if neighbor == goal or not open_[neighbor]:
+                        continue
+                    delta = neighbor - node
+                    candidate = base + (1.0 if delta == 1 or delta == -1 or delta == width or delta == -width
+                                        else _pathfinding.DIAGONAL)
+                    if candidate < rhs[neighbor]:
+                        rhs[neighbor] = candidate
+                        if g[neighbor] != candidate:
+                            push(neighbor)
+                        else:
+                            queued.pop(neighbor, None)
+            else:
+                old = g[node]
+                g[node] = inf
+                for neighbor in neighbors:
+                    if neighbor != goal and rhs[neighbor] != inf:
+                        delta = neighbor - node
+                        if rhs[neighbor] == old + (1.0 if delta == 1 or delta == -1 or delta == width
+                                                   or delta == -width else _pathfinding.DIAGONAL):
+                            self._refresh(neighbor)
+                self._refresh(node)
+        self.expanded = expanded
+
+    def move_start(self, start: int):
+        """Notes that the actor moved."""
+        if start == self.start:
+            return
+        self._km += _pathfinding.octile(self._last, start, self.graph.width)
+        self._last = start
+        self.start = start
+        # The start is always enterable, so the cell left behind may close and the new one open.
+        self._sync()
+
+    def move_goal(self, goal: int):
+        """Notes that the goal moved. A goal that stepped to a neighbouring cell, like a chased actor, is
+        repaired from the old search; one that jumped further away starts a new search."""
+        if goal == self.goal:
+            return
+        if not self.graph.is_adjacent(self.goal, goal):
+            self._reset(self.start, goal)
+            return
+        previous, self.goal = self.goal, goal
+        self._rhs[goal] = 0.0
+        self._sync([previous, goal])
+
+    def _sync(self, extra=()):
+        """Finds the cells whose walkability changed since the last snapshot and repairs around them."""
+        current = self._snapshot()
+        changed = set(_np.flatnonzero(_np.frombuffer(current, dtype=_np.uint8) !=
+                                      _np.frombuffer(self._open, dtype=_np.uint8)).tolist())
+        self._open = current
+        offsets, indices = self.graph.lists()
+        touched = set()
+        for cell in changed.union(extra):
+            touched.add(cell)
+            touched.update(indices[offsets[cell]:offsets[cell + 1]])
+        for node in touched:
+            self._refresh(node)
+
+    def path(self):
+        """Repairs the search as needed and returns the cell indices from the start to the goal, both
+        included, or None if there is no path."""
+        self._sync()
+        self._compute()
+        if self._g[self.start] == _math.inf:
+            return None
+        offsets, indices = self.graph.lists()
+        g = self._g
+        width = self.graph.width
+        node = self.start
+        path = [node]
+        while node != self.goal:
+            current = node
+            node = min((neighbor for neighbor in indices[offsets[current]:offsets[current + 1]]
+                        if self._open[neighbor]),
+                       key=lambda neighbor: g[neighbor] + _pathfinding.step_cost(current, neighbor, width))
+            if len(path) > len(offsets):
+                return None
+            path.append(node)
+        return path
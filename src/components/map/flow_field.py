@@ -0,0 +1,173 @@
+import heapq as _heapq
+import math as _math
+from typing import Optional as _Optional
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .adjacency import (
+    AdjacencyGraph as _AdjacencyGraph,
+    _NEIGHBOR_FILE_OFFSETS,
+    _NEIGHBOR_RANK_OFFSETS,
+)
+
+_NEIGHBOR_COSTS = _np.where(_NEIGHBOR_RANK_OFFSETS * _NEIGHBOR_FILE_OFFSETS != 0, _pathfinding.DIAGONAL, 1.0)
+
+
+class FlowField:
+    """
+    The cost of the shortest path from every passable cell to one target cell, found by a single
+    reverse Dijkstra search, together with the next step towards the target from each cell. Any number
+    of agents chasing the same target read their moves from one field instead of searching one by one.
+
+    When the target moves, the field is repaired rather than rebuilt. Every cell can still reach the new
+    target by way of the old one, so the old costs plus the cost between the two targets are valid upper
+    bounds, and only the cells that the new target brings closer are searched again.
+
+    Occupied cells, passable but not walkable, are never stepped through, like in Grid.get_path. They
+    still get a cost and a next step, so an actor standing on one can read its way out.
+
+    Args:
+        graph (AdjacencyGraph): The grid's adjacency.
+        passable (ndarray): Whether each cell can be crossed; read again on every update.
+        target (int): The cell index the field leads to.
+        radius (float): If given, cells farther than this from the target are left unreached.
+        walkable (ndarray): Whether each cell can be entered; read again on every update. The same as
+            `passable` if omitted.
+
+    Attributes:
+        distances (ndarray): The path cost from each cell to the target, infinite where unreached.
+        searched (int): The cells settled by the last update.
+        stale (bool): Whether passability changed since the last update, see invalidate.
+    """
+
+    def __init__(self, graph: _AdjacencyGraph, passable: _np.ndarray, target: int, radius: _Optional[float] = None,
+                 walkable: _Optional[_np.ndarray] = None):
+        self.graph = graph
+        self.passable = passable
+        self.walkable = walkable if walkable is not None else passable
+        self.radius = radius if radius is not None else _math.inf
+        self.target = target
+        self.distances = None
+        self.searched = 0
+        self.stale = False
+        self._successors = None
+        self.recompute()
+
+    def invalidate(self):
+        """Marks the field as out of date after a passability change; the next retarget rebuilds it."""
+        self.stale = True
+
+    def _relax(self, cost, seeds):
+        # Dijkstra from the seeds over the passable cells, lowering `cost` in place. Cells only enter
+        # the frontier when their cost drops, so cells that already hold their final cost are not searched.
+        # Occupied cells get a cost but never enter the frontier, so no path leads through them.
+        offsets, indices = self.graph.lists()
+        passable = self.passable.tobytes()
+        walkable = self.walkable.tobytes()
+        width = self.graph.width
+        radius = self.radius
+        frontier = [(cost[seed], seed) for seed in seeds]
+        _heapq.heapify(frontier)
+        searched = 0
+        while frontier:
+            base, current = _heapq.heappop(frontier)
+            if base > cost[current]:
+                continue
+            searched += 1
+            for neighbor in indices[offsets[current]:offsets[current + 1]]:
+                if not passable[neighbor]:
+                    continue
+                delta = neighbor - current
+                g = base + (1.0 if delta == 1 or delta == -1 or delta == width or delta == -width
+                            else _pathfinding.DIAGONAL)
+                if g < cost[neighbor] and g <= radius:
+                    cost[neighbor] = g
+                    if walkable[neighbor]:
+                        _heapq.heappush(frontier, (g, neighbor))
+        self.searched = searched
+        self.distances = _np.array(cost)
+        self.distances[self.distances > radius] = _math.inf
+        self._successors = None
+        self.stale = False
+
+    def recompute(self):
+        """Rebuilds the field from scratch."""
+        cost = [_math.inf] * len(self.graph)
+        cost[self.target] = 0.0
+        self._relax(cost, [self.target])
+
+    def retarget(self, target: int):
+        """Moves the field's target, repairing the costs from the old target where possible."""
+        if self.stale:
+            self.target = target
+            self.recompute()
+            return
+        if target == self.target:
+            return
+        between = float(self.distances[target])
+        # Costs reached through an old target that is still occupied are no bounds for the new one.
+        if between == _math.inf or not self.walkable[self.target]:
+            self.target = target
+            self.recompute()
+            return
+        cost = (self.distances + between).tolist()
+        cost[target] = 0.0
+        seeds = [target]
+        if self.radius < _math.inf:
+            # Cells at the edge of a bounded field must be searched again so it can grow past it.
+            seeds += self._edge().tolist()
+        self.target = target
+        self._relax(cost, seeds)
+
+    def _edge(self):
+        """Returns the reached walkable cells with an unreached passable neighbour."""
+        offsets, indices = self.graph.offsets, self.graph.indices
+        sources = _np.repeat(_np.arange(len(offsets) - 1), _np.diff(offsets))
+        reached = _np.isfinite(self.distances)
+        edge = reached[sources] & self.walkable[sources] & ~reached[indices] & self.passable[indices]
+        return _np.unique(sources[edge])
+
+    def open(self, index: int):
+        """Repairs the field after a cell became enterable, e.g. vacated. Costs can only fall, so only the
+        cells that the opened cell brings closer are searched."""
+        if self.stale or self.distances is None or self.distances[index] == _math.inf:
+            return
+        self._relax(self.distances.tolist(), [index])
+
+    @property
+    def successors(self):
+        """The cell index to step to from each cell on a shortest path to the target, or -1 where there
+        is none. Built with array operations on first use after each update."""
+        if self._successors is None:
+            height, width = self.graph.height, self.graph.width
+            # Only walkable cells and the target can be stepped to.
+            enterable = _np.asarray(self.walkable, dtype=bool).copy()
+            enterable[self.target] = True
+            padded = _np.full((height + 2, width + 2), _np.inf)
+            padded[1:-1, 1:-1] = _np.where(enterable, self.distances, _np.inf).reshape(height, width)
+            candidates = _np.stack([
+                padded[1 + dr:height + 1 + dr, 1 + df:width + 1 + df] + cost
+                for dr, df, cost in zip(_NEIGHBOR_RANK_OFFSETS, _NEIGHBOR_FILE_OFFSETS, _NEIGHBOR_COSTS)
+            ])
+            direction = candidates.argmin(axis=0).ravel()
+            best = candidates.min(axis=0).ravel()
+            steps = _NEIGHBOR_RANK_OFFSETS[direction] * width + _NEIGHBOR_FILE_OFFSETS[direction]
+            valid = _np.isfinite(self.distances) & (self.distances > 0) & (best <= self.distances + 1e-9)
+            self._successors = _np.where(valid, _np.arange(len(direction)) + steps, -1)
+        return self._successors
+
+    def next_step(self, index: int):
+        """Returns the cell index to step to from a cell towards the target, or -1 if it has none."""
+        return int(self.successors[index])
+
+    def path_from(self, index: int):
+        """Returns the cell indices from a cell to the target, both included, or None if it is unreached."""
+        if self.distances[index] == _math.inf:
+            return None
+        successors = self.successors
+        path = [index]
+        while index != self.target:
+            index = int(successors[index])
+            path.append(index)
+        return path
@@ -1,20 +1,40 @@
 from __future__ import annotations
 
-import heapq as _heapq
-import random as _random
+import operator as _operator
+import os as _os
+from concurrent.futures import Future as _Future
 import logging as _logging
 from abc import abstractmethod
+from collections import OrderedDict as _OrderedDict
+from collections.abc import Mapping as _Mapping, Sequence as _Sequence
 from random import choice as _choice
 from typing import Optional as _Optional, Union as _Union
 
 import pyglet.event
 
+import numpy as _np
+
 from src.components.core.event import EventDispatcher
 from src.components.misc.quiet_dict import QuietDict as _QuietDict
+from .blueprint_cache import BlueprintCache as _BlueprintCache, default_cache as _default_cache
+from .cell_store import CellStore as _CellStore
+from .cooperative import CooperativePlanner as _CooperativePlanner
+from .dstar_lite import DStarLite as _DStarLite
+from .flow_field import FlowField as _FlowField
+from .hierarchical import HierarchicalPlanner as _HierarchicalPlanner
+from .path_cache import PathCache as _PathCache
+from .path_pool import PathPool as _PathPool
+from .path_service import PathService as _PathService
+from .reachability import reachable as _reachable
+from .regions import RegionIndex as _RegionIndex
+from . import pathfinding as _pathfinding, spatial as _spatial
+from .journal import GridJournal as _GridJournal
 from .grid_blueprint import (
     print_progress,
     GridBlueprint as _GridBlueprint,
     _TERRAIN_DICT,
+    _TERRAIN_NAMES,
+    _TERRAIN_COLORS,
     save_grid as _save_grid,
     load_grid as _load_grid,
 )
@@ -22,6 +42,27 @@ from .grid_blueprint import (
 
 _logging.basicConfig(level=_logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# The number of _Cell views a Grid keeps alive between lookups.
+_VIEW_CACHE_SIZE = 4096
+
+# The get_path strategies, by name, and the Grid methods that implement them.
+_PATH_STRATEGIES = {
+    'astar': '_astar',
+    'jps': '_jps',
+    'hpa': '_hpa',
+}
+
+# The fewest searches get_paths hands to its worker processes; smaller batches are searched in-process.
+_PARALLEL_MIN_QUERIES = 64
+
+
+def _label(obj):
+    """Returns the name the journal records for an obstruction."""
+    if obj is None:
+        return None
+    name = getattr(obj, 'name', None)
+    return name if isinstance(name, str) else type(obj).__name__
+
 
 class GridGroup:
     """
@@ -31,37 +72,44 @@ class GridGroup:
     def __init__(self, grid: Grid, title: str, cells: list, legacy: bool = False):
         self.grid = grid
         self.title = title
-        self.cells = [grid.cells[cell] for cell in cells]
+        self._members = {}
+        for cell in cells:
+            cell = grid.get_cell(cell)
+            self._members[cell.cell_index] = cell
         self.legacy = legacy
         self.initiate_group()
 
+    @property
+    def cells(self):
+        return list(self._members.values())
+
+    @property
+    def indices(self):
+        return list(self._members)
+
     def initiate_group(self):
         """Adds the group to the cells in the group."""
 
-        for cell in self.cells:
+        for cell in self._members.values():
             cell.join_group(self.title, self)
 
     def add_cell(self, cell):
         """Adds a cell to the group."""
 
-        self.cells.append(cell)
+        cell = self.grid.get_cell(cell)
+        self._members[cell.cell_index] = cell
         cell.join_group(self.title, self)
 
     def in_group(self, cell):
         """Checks if a cell is in the group"""
 
-        cell_designations = [cell.designation for cell in self.cells]
-        if cell in cell_designations:
-            return True
-        else:
-            return False
+        return self.grid._resolve_index(cell) in self._members
 
     def remove_cell(self, cell):
         """Removes a cell from the group"""
 
-        cell_designations = [cell.designation for cell in self.cells]
         if self.in_group(cell):
-            self.cells.pop(cell_designations.index(cell))
+            del self._members[self.grid._resolve_index(cell)]
         else:
             _logging.info("_Cell not in group!")
 
@@ -70,7 +118,7 @@ class GridGroup:
         Serializes the GridGroup object as a JSON object.
         """
         
-        cells_designations = [cell.designation for cell in self.cells]
+        cells_designations = [cell.designation for cell in self._members.values()]
         return {
             "title": self.title,
             "cells": cells_designations,
@@ -78,6 +126,47 @@ class GridGroup:
         }
 
 
+class _CellMapping(_Mapping):
+    """
+    The cells of a Grid keyed by designation. Cell indices are accepted as keys as well; the values
+    are _Cell views.
+    """
+
+    def __init__(self, grid: Grid):
+        self._grid = grid
+
+    def __getitem__(self, key):
+        return self._grid.get_cell(key)
+
+    def __iter__(self):
+        return iter(self._grid._blueprint._cell_list)
+
+    def __len__(self):
+        return len(self._grid._store)
+
+
+class _CellLine(_Sequence):
+    """
+    The cells of one rank or file of a Grid, viewed on access.
+    """
+
+    def __init__(self, grid: Grid, indices: range, number: int):
+        self._grid = grid
+        self._indices = indices
+        self._number = number
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._grid._view(index) for index in self._indices[item]]
+        return self._grid._view(self._indices[item])
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __int__(self):
+        return self._number
+
+
 class _AbstractGridObject:
     @abstractmethod
     def __init__(
@@ -97,23 +186,41 @@ class Grid(_QuietDict):
             noise_scale: _Optional[int] = None,
             noise_octaves: _Optional[int] = None,
             noise_roughness: _Optional[float] = None,
+            noise_backend: _Optional[str] = None,
+            seed: _Optional[int] = None,
+            blueprint: _Optional[_GridBlueprint] = None,
+            cache: _Optional[_BlueprintCache] = None,
+            workers: _Optional[int] = None,
+            journal_path: _Optional[str] = None,
     ):
-        self._blueprint = _GridBlueprint(cell_size, grid_scale, noise_scale, noise_octaves, noise_roughness)
+        cache = cache if cache is not None else _default_cache()
+        if blueprint is None:
+            blueprint = cache.load_or_generate(cell_size=cell_size, grid_scale=grid_scale, noise_scale=noise_scale,
+                                               noise_octaves=noise_octaves, noise_roughness=noise_roughness,
+                                               noise_backend=noise_backend, seed=seed, workers=workers)
+        self._blueprint = blueprint
         self.grid_plan = self._blueprint._grid_dictionary
         super(Grid, self).__init__()
         self._init_cell_size = cell_size
         self.cell_size = cell_size if cell_size is not None else self._blueprint._cell_size
         self.grid_scale = grid_scale if grid_scale is not None else self._blueprint._grid_scale
         _logging.info(f'Cell size {self.cell_size}')
-        self.cells = {}
-        _logging.info('Instantiating cells.')
-        for cell in self.grid_plan.keys():
-            self.cells[cell] = _Cell(cell, parentgrid=self)
-            self.cells[cell]._push_handlers(on_entitle=self.on_entitle, on_divest=self.on_divest,
-                                           on_occupy=self.on_occupy, on_vacate=self.on_vacate,
-                                           on_obstruct=self.on_obstruct, on_destruct=self.on_destruct)
-            print_progress(len(self.grid_plan.keys()), len(self.cells))
-            self.update({cell: self.cells[cell]})
+        self._codec = self._blueprint._codec
+        self._spawn_rng = self._blueprint.rng('spawn')
+        _logging.info('Building cell store.')
+        self._store = _CellStore(self._blueprint)
+        self._views = _OrderedDict()
+        self.path_cache = _PathCache(width=self._codec.width)
+        self._hierarchy = None
+        self._flow_fields = {}
+        self._path_service = None
+        self._path_pool = None
+        self._change_handlers = []
+        self.regions = _RegionIndex(self._store.passable, self._codec.height, self._codec.width,
+                                    labels=self._blueprint._region)
+        self.cells = _CellMapping(self)
+        self.items = self.cells
+        _logging.info(f'{len(self._store)} cells in {self._store.nbytes} bytes.')
         self.occupied_cells = GridGroup(self, "Occupied Cells", [])
         self.obstructed_cells = GridGroup(self, "Obstructed Cells", [])
         self.entitled_cells = GridGroup(self, "Entitled Cells", [])
@@ -124,20 +231,65 @@ class Grid(_QuietDict):
         self.quadrants = None
         _logging.info('Setting up grid.')
         self._set_up()
-        _save_grid(self, '001GRID.json')
+        # Only a world that can be asked for again, by its seed or its journal file, keeps a journal. A
+        # seeded world's is kept beside its cached blueprint, so grids of different maps never share one.
+        # Edits an earlier session left in it are restored.
+        self._journal = None
+        if journal_path is None and seed is not None:
+            journal_path = cache.journal_path(dict(self._blueprint.parameters, seed=seed))
+        if journal_path is not None:
+            self._journal = _GridJournal(journal_path, meta=self._journal_meta())
+            if self._journal.recovered is not None:
+                _logging.info('Restoring the grid state recovered from the journal.')
+                self.restore(self._journal.recovered)
         self.selection = None
 
     def on_occupy(self, cell):
         self.occupied_cells.add_cell(cell)
+        self.path_cache.invalidate(cell.cell_index)
+        # A cell closing can lengthen any path through it, so the flow fields are rebuilt on next use.
+        for field in self._flow_fields.values():
+            field.invalidate()
 
     def on_vacate(self, cell):
         self.occupied_cells.remove_cell(cell)
+        self.path_cache.invalidate(cell.cell_index, opened=bool(self._store.walkable[cell.cell_index]))
+        for field in self._flow_fields.values():
+            field.open(cell.cell_index)
 
     def on_obstruct(self, cell):
         self.obstructed_cells.add_cell(cell)
+        self.path_cache.invalidate(cell.cell_index)
+        self._passability_changed(cell.cell_index)
+        self._record('obstruct', cell.cell_index, _label(cell.obstruction))
 
     def on_destruct(self, cell):
         self.obstructed_cells.remove_cell(cell)
+        self.path_cache.invalidate(cell.cell_index, opened=bool(self._store.walkable[cell.cell_index]))
+        self._passability_changed(cell.cell_index)
+        self._record('destruct', cell.cell_index)
+
+    def _record(self, op, index, label=None):
+        if self._journal is not None:
+            self._journal.record(op, index, label)
+
+    def push_change_handler(self, handler):
+        """Calls `handler(index)` with the cell index of every cell that is obstructed, cleared or made
+        passable or impassable from now on, e.g. for a view to redraw it."""
+        self._change_handlers.append(handler)
+
+    def remove_change_handler(self, handler):
+        if handler in self._change_handlers:
+            self._change_handlers.remove(handler)
+
+    def _passability_changed(self, index):
+        for handler in self._change_handlers:
+            handler(index)
+        self.regions.update(index)
+        if self._hierarchy is not None:
+            self._hierarchy.mark_dirty(index)
+        for field in self._flow_fields.values():
+            field.invalidate()
 
     def on_entitle(self, cell):
         self.entitled_cells.add_cell(cell)
@@ -153,86 +305,142 @@ class Grid(_QuietDict):
         self._set_up_rank()
         self._set_up_file()
         self._set_up_quadrants()
-        self._set_up_cells()
         self._initgrid_objects()
 
     def _set_up_rank(self):
         _logging.info(f'Setting up {len(self._blueprint._rank)} rows')
-        setattr(self, 'rows', type('rows', (list,), {}))
-        exec('self.rows = self.rows()')
-        for row in self._blueprint._rank:
-            setattr(self.rows, f'row{row}',
-                    type('Row', (list,), {'__int__': lambda self: int(self._blueprint._rank.index(row) + 1)}))
-            exec(f'self.rows.row{row} = self.rows.row{row}()')
-            setattr(getattr(self.rows, f'row{row}'), 'height', int(self._blueprint._rank.index(row)) * self.cell_size)            
-            exec(f'self.rows.append(self.rows.row{row})')
+        width = self._codec.width
+        self.rows = type('rows', (list,), {})()
+        for rank_index, row in enumerate(self._blueprint._rank):
+            line = _CellLine(self, range(rank_index * width, (rank_index + 1) * width), rank_index + 1)
+            line.height = rank_index * self.cell_size
+            setattr(self.rows, f'row{row}', line)
+            self.rows.append(line)
         _logging.info('Success.')
 
     def _set_up_file(self):
         _logging.info(f'Setting up {len(self._blueprint._file)} columns')
-        setattr(self, 'cols', type('cols', (list,), {}))
-        exec('self.cols = self.cols()')
-        for col in self._blueprint._file:
-            setattr(self.cols, f'col{col}',
-                    type('Column', (list,), {'__int__': lambda self: int(self._blueprint._file.index(col) + 1)}))
-            exec(f'self.cols.col{col} = self.cols.col{col}()')
-            setattr(getattr(self.cols, f'col{col}'), 'width', int(self._blueprint._file.index(col)) * self.cell_size)
-            exec(f'self.cols.append(self.cols.col{col})')
+        width = self._codec.width
+        self.cols = type('cols', (list,), {})()
+        for file_index, col in enumerate(self._blueprint._file):
+            line = _CellLine(self, range(file_index, len(self._store), width), file_index + 1)
+            line.width = file_index * self.cell_size
+            setattr(self.cols, f'col{col}', line)
+            self.cols.append(line)
         _logging.info('Success.')
 
-    def _set_up_cells(self):
-        _logging.info(f'Adding {len(self.cells)} cells to rows & columns.')
-        for d, c in self.cells.items():
-            self.rows.__getattribute__(f'row{d[:-5]}').append(c)
-            self.cols.__getattribute__(f'col{d[-5:]}').append(c)
-        _logging.info('Done.')
- 
     def _set_up_quadrants(self):
         _logging.info(f'Setting up {len(self._blueprint._quadrants)} quadrants.')
         setattr(self, 'quadrants', type('quadrants', (list,), {}))
         exec('self.quadrants = self.quadrants()')
-        quadrant_index = 0
         for quadrant, info in self._blueprint._quadrants.items():
             setattr(self.quadrants, f'quad{quadrant}',
-                    type('Quadrant', (_QuietDict,), {'__int__': lambda self: int(quadrant)}))
+                    type('Quadrant', (_QuietDict,), {'__int__': lambda self, q=quadrant: int(q)}))
             exec(f'self.quadrants.quad{quadrant} = self.quadrants.quad{quadrant}()')
             exec(f'self.quadrants.append(self.quadrants.quad{quadrant})')
-            exec(f'self.quadrants.quad{quadrant}.update({info})')
-            for cell in self.quadrants.__getattribute__(f'quad{quadrant}')['cells']:
-                self.cells[cell].quadrant = quadrant
-                self.cells[cell].quadrant_index = quadrant_index
-            quadrant_index += 1
+            getattr(self.quadrants, f'quad{quadrant}').update(info)
         _logging.info('Success.')
 
-    def get_cell(self, cell_designation: _Optional[str] = None):
-        return self.cells[cell_designation]
+    def _resolve_index(self, cell):
+        """Returns the cell index of a designation, a cell index or a cell."""
+        if isinstance(cell, str):
+            return self._codec.to_index(cell)
+        if isinstance(cell, _Cell):
+            return cell.cell_index
+        index = _operator.index(cell)
+        self._codec.split(index)
+        return index
+
+    def _view(self, index):
+        """Returns the cached _Cell view of a cell index, creating it if needed."""
+        view = self._views.get(index)
+        if view is None:
+            view = self._views[index] = _Cell(parentgrid=self, cell_index=index)
+            if len(self._views) > _VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        else:
+            self._views.move_to_end(index)
+        return view
+
+    def get_cell(self, cell_designation: _Optional[_Union[str, int]] = None):
+        return self._view(self._resolve_index(cell_designation))
     
     def get_cell_by_index(self, index: _Optional[int] = None):
-        return self.cells[self._blueprint._cell_list[index]]
+        self._codec.split(index)
+        return self._view(index)
     
     def get_rank_by_index(self, index: _Optional[int] = None):
         return self._blueprint._rank[index]
 
     def get_rank_by_height(self, height):
-        for i in range(len(self.rows)):
-            if self.rows[i].height <= height < self.rows[i + 1].height:
-                return i
+        """Returns the rank under a y coordinate, or None if it is off the grid."""
+        rank = int(height // self.cell_size)
+        return rank if 0 <= rank < self._codec.height else None
 
     def get_file_by_index(self, index: _Optional[int] = None):
         return self._blueprint._file[index]
     
     def get_file_by_width(self, width):
-        for i in range(len(self.cols)):
-            if self.cols[i].width <= width < self.cols[i + 1].width:
-                return i
+        """Returns the file under an x coordinate, or None if it is off the grid."""
+        file = int(width // self.cell_size)
+        return file if 0 <= file < self._codec.width else None
 
     def get_cell_by_position(self, x, y):
-        r = self.get_rank_by_index(self.get_rank_by_height(y))
-        f = self.get_file_by_index(self.get_file_by_width(x))
-        return self.get_cell(f'{r}{f}')
-
-    def random_cell(self):
-        return self.cells[_choice(self._blueprint._cell_list)]
+        """Returns the cell under a point, or None if it is off the grid."""
+        index = self.get_index_by_position(x, y)
+        return None if index < 0 else self._view(index)
+
+    def get_index_by_position(self, x, y):
+        """Returns the cell index under a point, or -1 if it is off the grid."""
+        return int(self.indices_at(x, y))
+
+    def indices_at(self, xs, ys):
+        """Returns the cell index under each (x, y) point, with -1 for points off the grid."""
+        return _spatial.cells_at(xs, ys, self.cell_size, self._codec.height, self._codec.width)
+
+    def _query_result(self, indices, as_cells):
+        return [self._view(int(index)) for index in indices] if as_cells else indices
+
+    def _cell_centres(self, indices):
+        half = self.cell_size / 2
+        return self._store.x[indices] + half, self._store.y[indices] + half
+
+    def query_rect(self, left, top, right, bottom, as_cells: bool = False):
+        """Returns the cells overlapping the rectangle from (left, top) to (right, bottom), as an index array
+        in cell index order or, with `as_cells`, as cell views."""
+        indices = _spatial.rect_indices(left, top, right, bottom, self.cell_size, self._codec.height,
+                                        self._codec.width)
+        return self._query_result(indices, as_cells)
+
+    def query_radius(self, x, y, radius, as_cells: bool = False):
+        """Returns the cells whose centres lie within `radius` of (x, y)."""
+        indices = _spatial.rect_indices(x - radius, y - radius, x + radius, y + radius, self.cell_size,
+                                        self._codec.height, self._codec.width)
+        cx, cy = self._cell_centres(indices)
+        indices = indices[(cx - x) ** 2 + (cy - y) ** 2 <= radius ** 2]
+        return self._query_result(indices, as_cells)
+
+    def query_polygon(self, polygon, as_cells: bool = False):
+        """Returns the cells whose centres lie inside a polygon given as a sequence of (x, y) vertices."""
+        vertices = _np.asarray(polygon, dtype=_np.float64)
+        (left, top), (right, bottom) = vertices.min(axis=0), vertices.max(axis=0)
+        indices = _spatial.rect_indices(left, top, right, bottom, self.cell_size, self._codec.height,
+                                        self._codec.width)
+        cx, cy = self._cell_centres(indices)
+        indices = indices[_spatial.points_in_polygon(cx, cy, vertices)]
+        return self._query_result(indices, as_cells)
+
+    def random_cell(self, region: _Optional[int] = None):
+        """Returns a random cell, or a random cell of one of the passable regions, see RegionIndex."""
+        if region is None:
+            return self._view(int(self._spawn_rng.integers(len(self._store))))
+        return self._view(int(self._spawn_rng.choice(self.regions.cells(region))))
+
+    def spawn_cell(self):
+        """Returns a random unoccupied cell of the largest passable region, from which the most of the map
+        can be reached."""
+        cells = _np.flatnonzero((self.regions.labels == self.regions.largest()) & self._store.walkable)
+        return self._view(int(self._spawn_rng.choice(cells)))
 
     def random_row(self):
         return _choice([self.rows.__getattribute__(f'row{r}') for r in self._blueprint._rank])
@@ -240,115 +448,266 @@ class Grid(_QuietDict):
     def random_col(self):
         return _choice([self.cols.__getattribute__(f'col{c}') for c in self._blueprint._file])
 
-    def get_adjacent(self, cell_designation: _Optional[str] = None):
-        return [self.cells[adj] for adj in self.cells[cell_designation].adjacent]
+    def get_adjacent(self, cell_designation: _Optional[_Union[str, int]] = None):
+        adjacency = self._blueprint._adjacency
+        return [self._view(n) for n in adjacency.neighbors(self._resolve_index(cell_designation)).tolist()]
 
     def get_neighbors(self, cell_designation: _Optional[str] = None):
-        return [self.cells[adj].occupant for adj in self.cells[cell_designation].adjacent if
-                self.cells[adj].occupant is not None]
+        return [cell.occupant for cell in self.get_adjacent(cell_designation) if cell.occupant is not None]
 
-    def get_distance(self, cella: _Optional[str] = None, cellb: _Optional[str] = None,
+    def get_distance(self, cella: _Optional[_Union[str, int]] = None, cellb: _Optional[_Union[str, int]] = None,
                      measurement: _Optional[str] = None):
         m = measurement if measurement is not None else "units"
+        a, b = self._resolve_index(cella), self._resolve_index(cellb)
         if m == "units":
-            return self._heuristic(cella, cellb)
+            return self._heuristic(a, b)
         if m == "cells":
-            return self._heuristic(cella, cellb) // 10
-
-    def get_path(self, cella: _Optional[str] = None, cellb: _Optional[str] = None):
-        return self._astar(cella, cellb)
+            return self._heuristic(a, b) // 10
+
+    def get_path(self, cella: _Optional[_Union[str, int]] = None, cellb: _Optional[_Union[str, int]] = None,
+                 profile: str = 'default', strategy: str = 'astar'):
+        """Returns the designations of a path between two cells, start first, or None if there is none.
+        `strategy` names the search, see _PATH_STRATEGIES; 'jps' finds the same paths as 'astar' with
+        far fewer heap operations on open ground, and 'hpa' suits long paths on large maps."""
+        if strategy not in _PATH_STRATEGIES:
+            raise ValueError(f'Unknown path strategy {strategy!r}, expected one of {list(_PATH_STRATEGIES)}')
+        start, goal = self._resolve_index(cella), self._resolve_index(cellb)
+        if self._store.passable[start] and not self.regions.connected(start, goal):
+            return None
+        key = (start, goal, profile, strategy)
+        hit, path = self.path_cache.get(key)
+        if not hit:
+            path = getattr(self, _PATH_STRATEGIES[strategy])(start, goal)
+            self.path_cache.put(key, path)
+        if path is None:
+            return None
+        return [self._codec.from_index(n) for n in path]
+
+    def get_paths(self, pairs: _Sequence, strategy: str = 'astar', workers: _Optional[int] = None):
+        """Answers many path queries at once and returns the paths as get_path would, in the order of
+        `pairs`. Pairs that are unreachable or cached are answered without a search. Batches of at least
+        _PARALLEL_MIN_QUERIES searches go to the grid's PathPool of `workers` processes, all CPU cores by
+        default, which reads the adjacency and walkable arrays from shared memory; smaller ones are
+        searched here, where starting the work would cost more than it saves."""
+        if strategy not in _pathfinding.SEARCHES:
+            raise ValueError(f'Unknown batch path strategy {strategy!r}, expected one of {list(_pathfinding.SEARCHES)}')
+        keys = [(self._resolve_index(a), self._resolve_index(b), 'default', strategy) for a, b in pairs]
+        paths = [None] * len(keys)
+        queries = {}
+        for position, key in enumerate(keys):
+            start, goal = key[0], key[1]
+            if not self._store.passable[goal] or (self._store.passable[start] and not self.regions.connected(start, goal)):
+                continue
+            hit, path = self.path_cache.get(key)
+            if hit:
+                paths[position] = path
+            else:
+                queries.setdefault((start, goal), []).append(position)
+        if queries:
+            batch = list(queries)
+            workers = workers if workers is not None else (_os.cpu_count() or 1)
+            if workers > 1 and len(batch) >= _PARALLEL_MIN_QUERIES:
+                found = self._pool(workers).map(batch, strategy)
+            else:
+                found = _pathfinding.search_batch(self._blueprint._adjacency, self._store.walkable, batch, strategy)
+            for (start, goal), path in zip(batch, found):
+                self.path_cache.put((start, goal, 'default', strategy), path)
+                for position in queries[(start, goal)]:
+                    paths[position] = path
+        return [None if path is None else [self._codec.from_index(n) for n in path] for path in paths]
+
+    def _pool(self, workers):
+        """The PathPool for get_paths, kept between calls and started again for another worker count."""
+        if self._path_pool is not None and self._path_pool.workers != workers:
+            self._path_pool.close()
+            self._path_pool = None
+        if self._path_pool is None:
+            self._path_pool = _PathPool(self._blueprint._adjacency, self._store.walkable, workers)
+        return self._path_pool
+
+    @property
+    def path_service(self):
+        """The PathService answering get_path_async, started on first use."""
+        if self._path_service is None:
+            self._path_service = _PathService(self._blueprint._adjacency, self._store.walkable, self._codec.from_index)
+        return self._path_service
+
+    def get_path_async(self, cella: _Optional[_Union[str, int]] = None, cellb: _Optional[_Union[str, int]] = None,
+                       strategy: str = 'astar'):
+        """Like get_path, but returns a Future of the path at once and searches on the path service's
+        worker thread. Goals that cannot be reached, and paths already cached, resolve immediately."""
+        start, goal = self._resolve_index(cella), self._resolve_index(cellb)
+        future = _Future()
+        if not self._store.passable[goal] or (self._store.passable[start] and not self.regions.connected(start, goal)):
+            future.set_result(None)
+            return future
+        hit, path = self.path_cache.get((start, goal, 'default', strategy))
+        if hit:
+            future.set_result(None if path is None else [self._codec.from_index(n) for n in path])
+            return future
+        return self.path_service.submit(start, goal, strategy)
 
-    # Define the _heuristic function
     def _heuristic(self, cella, cellb):
-        """Estimates the distance between two cells using Manhattan distance"""
-        cell_a_coords = self.cells[cella].coordinates
-        cell_b_coords = self.cells[cellb].coordinates
-        (x1, y1) = cell_a_coords
-        (x2, y2) = cell_b_coords
-        return abs(x1 - x2) + abs(y1 - y2)
-
-    # Define the _cost function
-    def _cost(self, current, next):
-        cell = self.cells[next]
-        cost = 0
-        if current not in cell.adjacent:
-            """Adjusts the cost for adjacency"""
-            cost += float("inf")
-        else:
-            if next in self.occupied_cells.cells or cell.occupied:
-                cost += float("inf")
-        #        if cell.obstructed:
-        #            """"Adjusts the cost if the next cell is obstructed"""
-        #            cost += next.obstruction.integrity // 10    # add 10% of the obstructions remaining integrity
-        if not self.grid_plan[next]['passable'] or not cell.passable:
-            cost += float("inf")
-        """Returns the cost to move from the current cell to the next cell"""
-        return cost
-
-    # Implement A* algorithm
+        """Estimates the distance between two cell indices using octile distance"""
+        return _pathfinding.octile(cella, cellb, self._codec.width) * self.cell_size
+
     def _astar(self, start, goal):
-        goal_coords = self.cells[goal].coordinates
-        """Finds the shortest path from start to goal in the given graph using A* algorithm"""
-        frontier = [(0, start)]  # A priority queue of nodes to explore
-        came_from = {}  # A dictionary that maps nodes to their parent nodes
-        cost_so_far = {start: 0}  # A dictionary that maps nodes to the _cost of the best known path to that node
-        graph = self._blueprint._graph
-
-        while frontier:
-            _, current = _heapq.heappop(frontier)
-            current_coords = self.cells[current].coordinates
-            if current_coords == goal_coords:
-                # We have found the goal, reconstruct the path and return it
-                path = [current]
-                while current in came_from:
-                    current = came_from[current]
-                    path.append(current)
-                path.reverse()
-                return path
-
-            for next_step in graph[current]:
-                """For each neighbor of the current node, calculate the _cost of the path from the start node to that 
-                neighbor"""
-                new_cost = cost_so_far[current] + self._cost(current, next_step)
-                if next_step not in cost_so_far or new_cost < cost_so_far[
-                    next_step]:  # If the new path is better than the old path
-                    cost_so_far[next_step] = new_cost  # Update the cost of the path to the neighbor
-                    priority = new_cost + self._heuristic(goal, next_step)  # Calculate the priority of the neighbor
-                    _heapq.heappush(frontier, (priority, next_step))  # Add the neighbor to the frontier
-                    came_from[next_step] = current  # Update the neighbor's parent to the current node
-
-        return None  # We didn't find a path
+        """Finds the shortest path between two cell indices using A* over the walkable bitmap. The goal
+        may be occupied but must be passable."""
+        if not self._store.passable[goal]:
+            return None
+        bitmap = _pathfinding.walkable_bitmap(self._store.walkable, start, goal)
+        return _pathfinding.astar(self._blueprint._adjacency, bitmap, start, goal)
+
+    def _jps(self, start, goal):
+        """Finds the shortest path between two cell indices using Jump Point Search."""
+        if not self._store.passable[goal]:
+            return None
+        bitmap = _pathfinding.walkable_bitmap(self._store.walkable, start, goal)
+        return _pathfinding.jps(self._blueprint._adjacency, bitmap, start, goal)
+
+    @property
+    def hierarchy(self):
+        """The HierarchicalPlanner over this grid, built on first use."""
+        if self._hierarchy is None:
+            self._hierarchy = _HierarchicalPlanner(self._blueprint._adjacency, self._store.passable)
+        return self._hierarchy
+
+    def _hpa(self, start, goal):
+        """Finds a path between two cell indices with hierarchical A*."""
+        if not self._store.passable[goal]:
+            return None
+        bitmap = _pathfinding.walkable_bitmap(self._store.walkable, start, goal)
+        return self.hierarchy.find_path(bitmap, start, goal)
+
+    def planner(self, cella: _Optional[_Union[str, int]] = None, cellb: _Optional[_Union[str, int]] = None):
+        """Returns a DStarLite planner between two cells for an actor to keep and replan with as it
+        moves, its goal moves and cells change."""
+        return _DStarLite(self._blueprint._adjacency, self._store.walkable, self._resolve_index(cella),
+                          self._resolve_index(cellb))
+
+    def plan_team(self, pairs: _Sequence, window: int = 10):
+        """Plans the moves of a team together, one (start, goal) pair per actor, highest priority first,
+        so that their paths never meet, see CooperativePlanner. Returns one list of designations per pair,
+        start first, holding the cell at each step with a cell repeated for each wait, or None where the
+        goal cannot be reached and the actor stays put. `window` is the number of steps the actors keep
+        out of each other's way, usually their movements for the turn."""
+        moves = [(self._resolve_index(a), self._resolve_index(b)) for a, b in pairs]
+        # Actors whose goal cannot be reached plan to stay where they are, which keeps their cells clear.
+        reachable = [bool(self._store.passable[goal]) and (not self._store.passable[start] or
+                                                           self.regions.connected(start, goal))
+                     for start, goal in moves]
+        planner = _CooperativePlanner(self._blueprint._adjacency, self._store.walkable, window)
+        paths = planner.plan([(start, goal if ok else start) for (start, goal), ok in zip(moves, reachable)])
+        return [[self._codec.from_index(n) for n in path] if ok and path is not None else None
+                for path, ok in zip(paths, reachable)]
+
+    def reachable(self, cell: _Optional[_Union[str, int]] = None, budget: int = 10):
+        """Returns the Reachable cells within `budget` steps of a cell, such as an actor's movements for
+        the turn, with the steps to each and the predecessor links of their paths, from a single search.
+        Occupied cells cannot be entered."""
+        start = self._resolve_index(cell)
+        bitmap = _pathfinding.walkable_bitmap(self._store.walkable, start, start)
+        return _reachable(self._blueprint._adjacency, bitmap, start, budget)
+
+    def flow_field(self, cell: _Optional[_Union[str, int]] = None, radius: _Optional[float] = None):
+        """Returns a FlowField leading to a cell, for many actors chasing the same target. Like get_path it
+        leads around occupied cells. The field is kept between calls and repaired when the target moves or
+        a cell is vacated; `radius` bounds it, in cells."""
+        target = self._resolve_index(cell)
+        field = self._flow_fields.get(radius)
+        if field is None:
+            field = self._flow_fields[radius] = _FlowField(self._blueprint._adjacency, self._store.passable, target,
+                                                           radius, walkable=self._store.walkable)
+        else:
+            field.retarget(target)
+        return field
 
     def _initgrid_objects(self):
         pass
 
     def _update_occupied_cells(self):
-        for designation, cell in self.cells.items():
-            if cell.occupied:
-                if cell not in self.occupied_cells.cells:
-                    self.occupied_cells.cells.append(cell)
-            else:
-                if cell in self.occupied_cells.cells:
-                    self.occupied_cells.cells.pop(self.occupied_cells.cells.index(cell))
+        occupied = set(_np.flatnonzero(self._store.occupied).tolist())
+        for index in occupied.difference(self.occupied_cells.indices):
+            self.occupied_cells.add_cell(index)
+        for index in set(self.occupied_cells.indices).difference(occupied):
+            self.occupied_cells.remove_cell(index)
 
     def _update_occupants(self):
-        for designation, cell in self.cells.items():
-            if cell.occupied:
-                if cell.occupant not in self.occupants:
-                    self.occupants.append(cell.occupant)
+        for occupant in self._store.occupant.values():
+            if occupant not in self.occupants:
+                self.occupants.append(occupant)
 
     def _update_lists(self):
         self._update_occupants()
         self._update_occupied_cells()
 
-    def _update_cells(self):
-        for c, cell in self.cells.items():
-            cell.update()
-
     def _update(self):
-        self._update_cells()
         self._update_lists()
-        _save_grid(self, '001GRID.json')
+
+    @property
+    def seed(self):
+        return self._blueprint._seed
+
+    def _journal_meta(self):
+        return dict(self._blueprint.parameters, cell_size=self.cell_size, grid_scale=self.grid_scale)
+
+    def restore(self, state: dict):
+        """Applies a recovered state (see GridJournal.recover): the passability set on cells and the cells
+        obstructed, and any occupied and entitled cells it lists, as saved grid files do. The recorded
+        labels stand in for the original objects."""
+        for index, value in state.get('passable', {}).items():
+            self._store.set_passable(index, value)
+            self._passability_changed(index)
+        for index, label in state['obstructed'].items():
+            self._store.obstruct(index, label)
+            self.obstructed_cells.add_cell(index)
+            self._passability_changed(index)
+        for index, label in state.get('occupied', {}).items():
+            self._store.occupy(index, label)
+            self.occupied_cells.add_cell(index)
+        for index, title in state.get('entitled', {}).items():
+            self._store.entitle(index, None, title)
+            self.entitled_cells.add_cell(index)
+        self.path_cache.clear()
+
+    @classmethod
+    def from_file(cls, path: str):
+        """Opens a grid saved with Grid.save. Occupied and obstructed cells come back flagged, without
+        their original occupants and obstructions."""
+        grid = cls(blueprint=_GridBlueprint.from_file(path), journal_path=path + '.state.json')
+        columns = _load_grid(path).columns
+        grid.restore({
+            'occupied': dict.fromkeys(_np.flatnonzero(columns['occupied']).tolist()),
+            'obstructed': dict.fromkeys(_np.flatnonzero(columns['obstructed']).tolist()),
+        })
+        return grid
+
+    def save(self, path: str, terrain: bool = True):
+        """Writes the grid to a binary grid file at `path`. With `terrain` False only the seed, parameters
+        and cell state are saved, see save_grid."""
+        _save_grid(self, path, terrain)
+
+    def __grid_file__(self):
+        header, columns = self._blueprint.__grid_file__()
+        header['cell_size'] = self.cell_size
+        header['grid_scale'] = self.grid_scale
+        # An obstructed cell is saved with the passability it falls back to, since obstructions are saved
+        # on their own and restored on top.
+        columns['passable'] = _np.where(self._store.obstructed, self._store.terrain_passable, self._store.passable)
+        columns['occupied'] = self._store.occupied
+        columns['obstructed'] = self._store.obstructed
+        return header, columns
+
+    def close(self):
+        """Writes a final checkpoint and stops the journal, the path service and the path pool."""
+        if self._journal is not None:
+            self._journal.close()
+        if self._path_service is not None:
+            self._path_service.close()
+        if self._path_pool is not None:
+            self._path_pool.close()
+            self._path_pool = None
 
     def __json__(self):
         grid_dict = {}
@@ -357,11 +716,12 @@ class Grid(_QuietDict):
         grid_dict["noise_scale"] = self._blueprint._noise_scale
         grid_dict["noise_octaves"] = self._blueprint._noise_octaves
         grid_dict["noise_roughness"] = self._blueprint._noise_roughness
+        grid_dict["seed"] = self.seed
         
         cells_dict = {}
-        for cell_designation, cell in self.cells.items():
-            cell_dict = cell.__json__()
-            cells_dict[cell_designation] = cell_dict
+        for index in range(len(self._store)):
+            cell = _Cell(parentgrid=self, cell_index=index)
+            cells_dict[cell.designation] = cell.__json__()
         
         grid_dict["cells"] = cells_dict
         
@@ -369,6 +729,10 @@ class Grid(_QuietDict):
 
 class _Cell(EventDispatcher):
     """
+    A lightweight view of one cell of a Grid. The cell's state lives in the grid's CellStore and is
+    read and written through on attribute access, so views can be created and dropped freely; two
+    views of the same cell compare equal.
+
     Args:
         designation (str): The designation of the cell on the grid. (e.g. A1, B2, etc.)
 
@@ -391,42 +755,16 @@ class _Cell(EventDispatcher):
     """
     __slots__ = (
         'parentgrid', 
-        'entry', 
-        'designation', 
         'cell_index', 
-        'row', 
-        'rank_index', 
-        'col', 
-        'file_index', 
-        'coordinates', 
-        'x', 
-        'y', 
-        'size', 
-        'width', 
-        'height', 
-        'adjacent', 
-        'terrain_str', 
-        'terrain_raw', 
-        'terrain_int', 
-        'terrain_color', 
-        'terrain_shape', 
-        'quadrant_index', 
-        'quadrant', 
-        'occupied', 
-        'occupant', 
-        'passable', 
-        'obstructed', 
-        'obstruction', 
-        'entitled', 
-        'title', 
-        'entity', 
-        'groups', 
-        'neighborhood', 
+        '_event_stack', 
+        '__weakref__', 
     )
 
     _EVENT_TYPES = ['on_occupy', 'on_vacate', 'on_obstruct', 'on_destruct', 'on_entitle', 'on_divest']
     _HANDLER_TYPES = ['occupy', 'vacate', 'obstruct', 'destruct', 'entitle', 'divest']
 
+    terrain_shape = None
+
     def __repr__(self):
         return str(self.designation)
 
@@ -436,59 +774,151 @@ class _Cell(EventDispatcher):
             row: _Optional[str] = None,
             col: _Optional[str] = None,
             parentgrid: _Optional[Grid] = None,
+            cell_index: _Optional[int] = None,
     ) -> None:
         self.parentgrid = parentgrid
-        self.entry = self.parentgrid._blueprint._grid_dictionary[designation]
+        if cell_index is None:
+            cell_index = self.parentgrid._codec.to_index(designation if designation is not None else row + col)
+        self.cell_index = cell_index
+        self._event_stack = ()
+
+    def __eq__(self, other):
+        if not isinstance(other, _Cell):
+            return NotImplemented
+        return self.parentgrid is other.parentgrid and self.cell_index == other.cell_index
 
-        self.designation = designation if designation is not None else row + col
-        self.cell_index = self.entry['cell_index']
+    def __hash__(self):
+        return hash((id(self.parentgrid), self.cell_index))
+
+    @property
+    def _store(self):
+        return self.parentgrid._store
+
+    @property
+    def designation(self):
+        return self.parentgrid._codec.from_index(self.cell_index)
+
+    @property
+    def rank_index(self):
+        return self.cell_index // self.parentgrid._codec.width
+
+    @property
+    def file_index(self):
+        return self.cell_index % self.parentgrid._codec.width
+
+    @property
+    def row(self):
+        return self.parentgrid._codec.ranks[self.rank_index]
+
+    @property
+    def col(self):
+        return self.parentgrid._codec.files[self.file_index]
+
+    @property
+    def entry(self):
+        return self.parentgrid._blueprint._grid_dictionary[self.designation]
+
+    @property
+    def coordinates(self):
+        return self.x, self.y
 
-        self.row = designation[0] if row is None else row
-        self.rank_index = self.entry['rank_index']
+    @property
+    def x(self):
+        return int(self._store.x[self.cell_index])
 
-        self.col = designation[1:] if col is None else col
-        self.file_index = self.entry['file_index']
+    @property
+    def y(self):
+        return int(self._store.y[self.cell_index])
 
-        self.coordinates = self.entry['coordinates']
-        self.x = self.coordinates[0]
-        self.y = self.coordinates[1]
+    @property
+    def size(self):
+        return self.parentgrid.cell_size
 
-        self.size = self.parentgrid.cell_size
-        self.width = self.size
-        self.height = self.size
+    @property
+    def width(self):
+        return self.parentgrid.cell_size
 
-        self.adjacent = self.entry['adjacent']
+    @property
+    def height(self):
+        return self.parentgrid.cell_size
 
-        self.terrain_str = self.entry['terrain_str']
-        self.terrain_raw = self.entry['terrain_raw']
-        self.terrain_int = self.entry['terrain_int']
-        self.terrain_color = self.entry['terrain_color']
-        self.terrain_shape = self.entry['terrain_shape']
+    @property
+    def terrain_int(self):
+        return int(self._store.terrain_int[self.cell_index])
 
-        self.quadrant_index = self.entry['quadrant_index']
-        self.quadrant = self.entry['quadrant']
+    @property
+    def terrain_str(self):
+        return _TERRAIN_NAMES[self.terrain_int]
 
-        self.occupied = False
-        self.occupant = None
-        self.passable = True
-        self.obstructed = False
-        self.obstruction = None
+    @property
+    def terrain_raw(self):
+        return float(self._store.terrain_raw[self.cell_index])
 
-        self.entitled = False
-        self.title = None
-        self.entity = None
+    @property
+    def terrain_color(self):
+        return _TERRAIN_COLORS[self.terrain_int]
 
-        self.groups = {}
+    @property
+    def quadrant_index(self):
+        return int(self._store.quadrant[self.cell_index])
 
-        for key, val in self.entry.items():
-            if key not in [k for k in self.entry][:7]:
-                setattr(self, key, val)
+    @quadrant_index.setter
+    def quadrant_index(self, value):
+        self._store.quadrant[self.cell_index] = value
 
-        for event in self._EVENT_TYPES:
-            self._register_event_type(event)
+    quadrant = quadrant_index
+
+    @property
+    def passable(self):
+        return bool(self._store.passable[self.cell_index])
+
+    @passable.setter
+    def passable(self, value):
+        self._store.set_passable(self.cell_index, value)
+        self.parentgrid._record('passable', self.cell_index, bool(value))
+        self.parentgrid.path_cache.invalidate(self.cell_index, opened=bool(self._store.walkable[self.cell_index]))
+        self.parentgrid._passability_changed(self.cell_index)
+
+    @property
+    def occupied(self):
+        return bool(self._store.occupied[self.cell_index])
+
+    @property
+    def occupant(self):
+        return self._store.occupant.get(self.cell_index)
+
+    @property
+    def obstructed(self):
+        return bool(self._store.obstructed[self.cell_index])
+
+    @property
+    def obstruction(self):
+        return self._store.obstruction.get(self.cell_index)
+
+    @property
+    def entitled(self):
+        return bool(self._store.entitled[self.cell_index])
+
+    @property
+    def title(self):
+        return self._store.title.get(self.cell_index)
+
+    @property
+    def entity(self):
+        return self._store.entity.get(self.cell_index)
+
+    @property
+    def groups(self):
+        return self._store.groups.setdefault(self.cell_index, {})
+
+    @property
+    def adjacent(self):
+        return self.parentgrid._blueprint._graph[self.designation]
+
+    @property
+    def adjacent_indices(self):
+        return self.parentgrid._blueprint._adjacency.neighbors(self.cell_index)
 
-        self.neighborhood = _Neighborhood
-        
     def recv_occupant(self, occupant):
         if self.occupant is not None:
             if self.occupant == occupant:
@@ -499,39 +929,31 @@ class _Cell(EventDispatcher):
         return
                 
     def _set_quadrant(self):
-        for quadrant in self.parentgrid.quadrants:
-            if self.designation in quadrant['cells']:
-                self.quadrant_index = self.parentgrid.quadrants.index(quadrant)
-                self.entry['quadrant_index'] = self.quadrant_index
-                self.entry['quadrant'] = self.quadrant
+        self.quadrant_index = self.parentgrid._blueprint._get_quadrant(self.coordinates)
 
     def on_entitle(self, entity):
-        self.entitled = True
-        self.entity = entity
-        self.title = entity.title
+        self._store.entitle(self.cell_index, entity, entity.title)
+        self.parentgrid.on_entitle(self)
 
     def on_divest(self):
-        self.entitled = False
-        self.entity = None
-        self.title = None
+        self._store.divest(self.cell_index)
+        self.parentgrid.on_divest(self)
 
     def on_occupy(self, occupant):
-        self.occupant = occupant
-        self.occupied = True
+        self._store.occupy(self.cell_index, occupant)
+        self.parentgrid.on_occupy(self)
 
     def on_vacate(self):
-        self.occupant = None
-        self.occupied = False
+        self._store.vacate(self.cell_index)
+        self.parentgrid.on_vacate(self)
 
     def on_obstruct(self, obstruction):
-        self.passable = False
-        self.obstructed = True
-        self.obstruction = obstruction
+        self._store.obstruct(self.cell_index, obstruction)
+        self.parentgrid.on_obstruct(self)
 
     def on_destruct(self):
-        self.passable = True
-        self.obstructed = False
-        self.obstruction = None
+        self._store.destruct(self.cell_index)
+        self.parentgrid.on_destruct(self)
 
     def get_groups(self):
         return self.groups
@@ -540,22 +962,16 @@ class _Cell(EventDispatcher):
         self.groups[group_name] = group
 
     def get_neighborhood(self):
-        self.neighborhood(self.parentgrid, self)
+        return _Neighborhood(self.parentgrid, self)
 
     def in_neighborhood(self, neighbor):
-        return self in neighbor.get_neighborhood()
+        return self in neighbor.get_neighborhood()()
 
     def update(self):
-        for key in self.entry.keys():
-            if key not in list(self.entry.keys())[:5]:
-                self.entry[key] = self.__getattribute__(key)
-        self.size = self.parentgrid.cell_size
-        self.width = self.size
-        self.height = self.size
-        self.refresh()
+        """State is written through to the grid's CellStore, so there is nothing to copy back."""
 
     def refresh(self):
-        self.parentgrid._blueprint._grid_dictionary[self.designation] = self.entry
+        pass
 
     def __json__(self):
         return {
@@ -571,6 +987,10 @@ class _Cell(EventDispatcher):
 
 
 
+for _event_type in _Cell._EVENT_TYPES:
+    _Cell._register_event_type(_event_type)
+
+
 class _Neighborhood:
     """A class to represent a neighborhood of cells.
 
@@ -591,7 +1011,7 @@ class _Neighborhood:
                  ):
         self.grid = grid
         self.focus = focus
-        self.cell_addresses = [self.grid.cells[address] for address in self.focus.adjacent]
+        self.cell_addresses = self.grid.get_adjacent(self.focus.designation)
         self.neighbors = [address.occupant for address in self.cell_addresses if address.occupied]
 
     def __call__(self):
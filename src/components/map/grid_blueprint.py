@@ -1,14 +1,18 @@
+from __future__ import annotations
+
 import os
 from collections import defaultdict
-import random as _random
+from collections.abc import Mapping as _Mapping
 from typing import Optional as _Optional, Tuple as _Tuple
 from enum import Enum as _Enum
 import logging as _logging
 import numpy as _np
-import noise as _noise
-import json as _json
 import itertools as _itertools
 
+from . import designation as _designation, grid_file as _grid_file, perlin as _perlin, regions as _regions, tiling as _tiling
+from .adjacency import AdjacencyGraph as _AdjacencyGraph, DesignationGraph as _DesignationGraph
+from .diamond_square import diamond_square as _diamond_square_field
+
 _logging.basicConfig(level=_logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
@@ -100,6 +104,149 @@ _TERRAIN_DICT = {
 
 _UNPASSABLE_TERRAIN = ['MOUNTAIN_BASE', 'MOUNTAIN_SIDE', 'MOUNTAIN_PEAK', 'MOUNTAIN_TOP', 'OCEAN', 'LAKE', 'SHORE']
 
+# Lookup tables indexed by terrain_int, in _TERRAIN_DICT order.
+_TERRAIN_NAMES = list(_TERRAIN_DICT)
+_TERRAIN_COLORS = [info['color'] for info in _TERRAIN_DICT.values()]
+_TERRAIN_RAW_MAX = _np.array([info['raw_max'] for info in _TERRAIN_DICT.values()])
+_TERRAIN_PASSABLE = _np.array([terrain not in _UNPASSABLE_TERRAIN for terrain in _TERRAIN_DICT])
+_TERRAIN_COLOR_TABLE = _np.array(_TERRAIN_COLORS, dtype=_np.uint8)
+
+
+def _pnoise_field(height, width, scale, octaves, base=0, row_offset=0, col_offset=0):
+    """Reference backend sampling `noise.pnoise2` one cell at a time."""
+    import noise as _noise
+    field = _np.zeros((height, width))
+    for y in range(width):
+        for x in range(height):
+            # pnoise2 only distinguishes 256 bases.
+            field[x][y] = _noise.pnoise2((y + col_offset) / scale, (x + row_offset) / scale, octaves, base=base & 0xff)
+    return field
+
+
+# Noise backends take (height, width, scale, octaves, base, row_offset, col_offset) and return the
+# (height, width) block of the height field whose top left cell is (row_offset, col_offset).
+_NOISE_BACKENDS = {
+    'numpy': _perlin.fbm_field,
+    'pnoise': _pnoise_field,
+}
+
+
+# A process pool costs about 90 ms to start and fill, and a noise sample (a cell at one octave) about 50 ns
+# with the numpy backend and 230 ns with pnoise, so below these many samples a map is generated in-process,
+# where the pool would cost more than the workers save.
+_PARALLEL_MIN_SAMPLES = {
+    'numpy': 6_000_000,
+    'pnoise': 1_300_000,
+}
+
+
+def _noise_tile(noise, tile, backend, scale, octaves, base):
+    """Fills one tile of the noise field and returns its (min, max)."""
+    r0, r1, f0, f1 = tile
+    block = noise[r0:r1, f0:f1]
+    block[...] = _NOISE_BACKENDS[backend](r1 - r0, f1 - f0, scale, octaves, base, r0, f0)
+    return float(block.min()), float(block.max())
+
+
+def _classify_tile(noise, diamond, terrain_raw, terrain_int, tile, low, high):
+    """Blends one tile of the noise field, normalized by the (low, high) of the whole field, with the
+    diamond-square field and classifies the result."""
+    r0, r1, f0, f1 = tile
+    raw = ((noise[r0:r1, f0:f1] - low) / (high - low) + diamond[r0:r1, f0:f1]) / 2
+    terrain_raw[r0:r1, f0:f1] = raw
+    classes = _np.searchsorted(_TERRAIN_RAW_MAX, raw, side='left')
+    # Values above the last threshold belong to the highest terrain.
+    _np.minimum(classes, len(_TERRAIN_NAMES) - 1, out=classes)
+    terrain_int[r0:r1, f0:f1] = classes
+
+# Bump whenever a change to generation alters the blueprint produced from the same parameters, so that
+# cached and saved blueprints of the old generator are not mistaken for the new one.
+GENERATOR_VERSION = 3
+
+# Every generation stage draws from its own stream, spawned from the world seed under the stage's name,
+# so the stages give the same results whatever order or thread they run in.
+_STAGES = ('noise', 'diamond_square', 'spawn')
+
+_DEFAULT_PARAMETERS = {
+    'cell_size': 10,
+    'grid_scale': 1,
+    'noise_scale': 100,
+    'noise_octaves': 12,
+    'noise_roughness': 0.5,
+    'noise_backend': 'numpy',
+}
+
+
+# The map the game's Board plays on; kept here, free of pyglet, so the benchmark can measure the same map.
+BOARD_VALUES = {'cell_size': 12, 'grid_scale': 1, 'noise_scale': 370, 'noise_octaves': 36, 'noise_roughness': 1.29}
+
+
+def blueprint_parameters(**parameters):
+    """Returns the complete blueprint parameters, filling in the defaults for those that are None."""
+    resolved = {name: parameters.get(name) if parameters.get(name) is not None else default
+                for name, default in _DEFAULT_PARAMETERS.items()}
+    resolved['seed'] = parameters.get('seed')
+    return resolved
+
+
+def new_seed():
+    """Returns a fresh random world seed."""
+    return int.from_bytes(os.urandom(8), 'little') >> 1
+
+
+def stage_rng(seed: int, stage: str):
+    """Returns a new generator for the named stage stream of a world seed."""
+    if stage not in _STAGES:
+        raise ValueError(f'Unknown generation stage {stage!r}, expected one of {list(_STAGES)}')
+    return _np.random.default_rng(_np.random.SeedSequence(seed, spawn_key=tuple(stage.encode('ascii'))))
+
+
+class _CellEntries(_Mapping):
+    """
+    The per-cell entries of a GridBlueprint, keyed by designation. Each entry is built from the
+    blueprint's arrays when it is looked up; none are stored.
+    """
+
+    def __init__(self, blueprint: GridBlueprint):
+        self._blueprint = blueprint
+
+    def __getitem__(self, designation):
+        blueprint = self._blueprint
+        num = blueprint._codec.to_index(designation)
+        x, y = blueprint._coordinates[num].tolist()
+        terrain_int = getattr(blueprint, '_terrain_int', None)
+        terrain_int = None if terrain_int is None else int(terrain_int[num])
+        quadrant = getattr(blueprint, '_quadrant_index', None)
+        quadrant = None if quadrant is None else int(quadrant[num])
+        return {
+            'coordinates': (x, y),
+            'cell_index': num,
+            'rank_index': num // blueprint._grid_width,
+            'file_index': num % blueprint._grid_width,
+            'quadrant_index': quadrant,
+            'quadrant': quadrant,
+            'terrain_str': None if terrain_int is None else _TERRAIN_NAMES[terrain_int],
+            'terrain_raw': None if terrain_int is None else float(blueprint._terrain_raw[num]),
+            'terrain_int': terrain_int,
+            'terrain_color': None if terrain_int is None else _TERRAIN_COLORS[terrain_int],
+            'terrain_shape': None,
+            'passable': True if terrain_int is None else bool(blueprint._passable[num]),
+            'occupied': False,
+            'occupant': None,
+            'obstructed': False,
+            'obstruction': None,
+            'entitled': False,
+            'title': None,
+            'entity': None,
+            'groups': {},
+        }
+
+    def __iter__(self):
+        return iter(self._blueprint._cell_list)
+
+    def __len__(self):
+        return len(self._blueprint._cell_list)
+
 
 class GridBlueprint:
     def __init__(
@@ -108,9 +255,15 @@ class GridBlueprint:
             grid_scale: _Optional[int] = None,
             noise_scale: _Optional[int] = None,
             noise_octaves: _Optional[int] = None,
-            noise_roughness: _Optional[float] = None):
-        self._cell_size = cell_size if cell_size is not None else 10
-        self._grid_scale = grid_scale if grid_scale is not None else 1
+            noise_roughness: _Optional[float] = None,
+            noise_backend: _Optional[str] = None,
+            seed: _Optional[int] = None,
+            workers: _Optional[int] = None):
+        parameters = blueprint_parameters(cell_size=cell_size, grid_scale=grid_scale, noise_scale=noise_scale,
+                                          noise_octaves=noise_octaves, noise_roughness=noise_roughness,
+                                          noise_backend=noise_backend, seed=seed)
+        self._cell_size = parameters['cell_size']
+        self._grid_scale = parameters['grid_scale']
         self._grid_width = (1920 * self._grid_scale) // self._cell_size
         self._grid_height = (1080 * self._grid_scale) // self._cell_size
         self._rank = self._init_rows()
@@ -119,17 +272,107 @@ class GridBlueprint:
         self._grid_dictionary, self._coordinates = self._init_grid()
         self._quadrants = self._init_quadrants(self._coordinates)
         self._init_adjacency()
-        self._noise_scale = noise_scale if noise_scale is not None else 100
-        self._noise_octaves = noise_octaves if noise_octaves is not None else 12
-        self._noise_roughness = noise_roughness if noise_roughness is not None else 0.5
-        self._seed = _random.seed(os.urandom(32))
+        self._noise_scale = parameters['noise_scale']
+        self._noise_octaves = parameters['noise_octaves']
+        self._noise_roughness = parameters['noise_roughness']
+        self._noise_backend = parameters['noise_backend']
+        if self._noise_backend not in _NOISE_BACKENDS:
+            raise ValueError(f'Unknown noise backend {self._noise_backend!r}, expected one of {list(_NOISE_BACKENDS)}')
+        self._seed = parameters['seed'] if parameters['seed'] is not None else new_seed()
+        self._workers = workers
         self._get_terrain_value()
-        self._adjust_passability()
         self._graph = self._init_graph()
         _logging.info(("Grid initialized."))
 
         self.items = self._grid_dictionary
 
+    @classmethod
+    def from_file(cls, file_path: str):
+        """Builds a blueprint from a grid file instead of generating one. The terrain and adjacency
+        arrays are read-only views into the file. Passability is read from the file's passable column
+        where it has one, since grids converted from the old format classify terrain differently, and a
+        grid saved without terrain or a seed, such as a converted empty grid, is all GRASS."""
+        _logging.info(f'Loading blueprint from {file_path} ...')
+        grid_file = load_grid(file_path)
+        header, columns = grid_file.header, grid_file.columns
+        if 'terrain_int' not in grid_file and 'passable' not in grid_file:
+            if header['seed'] is None or header.get('noise_scale') is None:
+                raise ValueError(f'{file_path} holds no terrain and no seed to regenerate it from')
+            if header.get('generator_version') != GENERATOR_VERSION:
+                raise ValueError(f'{file_path} was saved by generator version {header.get("generator_version")}, '
+                                 f'its terrain cannot be regenerated by version {GENERATOR_VERSION}')
+            _logging.info('Regenerating terrain from seed.')
+            return cls(**{name: header[name] for name in (*_DEFAULT_PARAMETERS, 'seed')})
+        blueprint = cls.__new__(cls)
+        blueprint._cell_size = header['cell_size'] if header['cell_size'] is not None else 10
+        blueprint._grid_scale = header['grid_scale'] if header['grid_scale'] is not None else 1
+        blueprint._grid_width = header['width']
+        blueprint._grid_height = header['height']
+        blueprint._rank = header['ranks']
+        blueprint._file = header['files']
+        blueprint._cell_list = blueprint._init_cells()
+        blueprint._grid_dictionary = _CellEntries(blueprint)
+        blueprint._coordinates = columns['coordinates']
+        blueprint._quadrants = blueprint._init_quadrants(blueprint._coordinates)
+        blueprint._adjacency = _AdjacencyGraph.from_arrays(blueprint._grid_height, blueprint._grid_width,
+                                                           columns['adjacency_offsets'], columns['adjacency_indices'])
+        blueprint._noise_scale = header['noise_scale']
+        blueprint._noise_octaves = header['noise_octaves']
+        blueprint._noise_roughness = header['noise_roughness']
+        blueprint._noise_backend = header['noise_backend']
+        blueprint._seed = header['seed']
+        if 'terrain_int' in grid_file:
+            blueprint._terrain_raw = columns['terrain_raw']
+            blueprint._terrain_int = columns['terrain_int']
+        else:
+            blueprint._terrain_raw = _np.zeros(len(blueprint._cell_list))
+            blueprint._terrain_int = _np.zeros(len(blueprint._cell_list), dtype=_np.uint8)
+        blueprint._terrain_color = _TERRAIN_COLOR_TABLE[blueprint._terrain_int]
+        blueprint._passable = (columns['passable'] if 'passable' in grid_file
+                               else _TERRAIN_PASSABLE[blueprint._terrain_int])
+        blueprint._region = blueprint._init_regions()
+        blueprint._graph = blueprint._init_graph()
+        blueprint.items = blueprint._grid_dictionary
+        _logging.info('Success.')
+        return blueprint
+
+    def rng(self, stage: str):
+        """Returns a new generator for one of the blueprint's named stage streams, see stage_rng."""
+        return stage_rng(self._seed if self._seed is not None else 0, stage)
+
+    @property
+    def parameters(self):
+        """The parameters this blueprint was generated from, seed included."""
+        return {
+            'cell_size': self._cell_size,
+            'grid_scale': self._grid_scale,
+            'noise_scale': self._noise_scale,
+            'noise_octaves': self._noise_octaves,
+            'noise_roughness': self._noise_roughness,
+            'noise_backend': self._noise_backend,
+            'seed': self._seed,
+        }
+
+    def __grid_file__(self):
+        """Returns the header and columns save_grid writes for this blueprint."""
+        header = {
+            **self.parameters,
+            'generator_version': GENERATOR_VERSION,
+            'height': self._grid_height,
+            'width': self._grid_width,
+            'ranks': list(self._rank),
+            'files': list(self._file),
+        }
+        columns = {
+            'coordinates': self._coordinates,
+            'terrain_raw': self._terrain_raw,
+            'terrain_int': self._terrain_int,
+            'passable': self._passable,
+            'adjacency_offsets': self._adjacency.offsets,
+            'adjacency_indices': self._adjacency.indices,
+        }
+        return header, columns
+
     def __getitem__(self, key):
         return self.items[key]
 
@@ -161,115 +404,58 @@ class GridBlueprint:
 
     def _init_rows(self):
         _logging.info(f'Initializing rows ...')
-        length = self._grid_height
-        rows = []
-        for i in range(26):
-            rows.append(chr(i + 97))  # Add lowercase letters 'a' to 'z'
-            print(f'Row {len(rows)} initialized.', end='\r')
-        for i in range(26):
-            rows.append(chr(i + 65))  # Add uppercase letters 'A' to 'Z'
-            print(f'Row {len(rows)} initialized.', end='\r')
-        for i in range(26):
-            for j in range(26):
-                rows.append(chr(i + 97) + chr(j + 97))  # Add two-letter strings 'aa' to 'zz'
-                print(f'Row {len(rows)} initialized.', end='\r')
-        for i in range(1, 26):
-            for j in range(26):
-                rows.append(chr(i + 65) + chr(j + 97))  # Add two-letter strings 'Aa' to 'Zz'
-                print(f'Row {len(rows)} initialized.', end='\r')
-        for i in range(26):
-            for j in range(26):
-                for k in range(26):
-                    print(f'Row {len(rows)} initialized.', end='\r')
-                    rows.append(chr(i + 97) + chr(j + 97) + chr(k + 97))  # Add three-letter strings 'aaa' to 'zzz'
-        if length:
-            rows = rows[:length]  # Truncate the list to the value of the length argument, defaults to _grid_height
+        rows = _designation.rank_names(self._grid_height)
         _logging.info(f"Success.")
         return rows
 
     def _init_cols(self):
         _logging.info('Initializing columns ...')
-        length = self._grid_width
-        cols = [str(r + 1) for r in range(length)][::-1]
-
-        for i in range(length):
-            if len(cols[i]) == 1:
-                cols[i] = '0000' + cols[i]
-            elif len(cols[i]) == 2:
-                cols[i] = '000' + cols[i]
-            elif len(cols[i]) == 3:
-                cols[i] = '00' + cols[i]
-            elif len(cols[i]) == 4:
-                cols[i] = '0' + cols[i]
-            print(f'Column {i + 1} initialized.', end='\r')
-        cols.reverse()
+        cols = _designation.file_names(self._grid_width)
         _logging.info(f"Success.")
         return cols
 
     def _init_cells(self):
         _logging.info('Initializing cells ...')
-        cells = [r + f for r, f in _itertools.product(self._rank, self._file)][::-1]
-        cells.reverse()
+        self._codec = _designation.DesignationCodec(self._rank, self._file)
+        cells = self._codec.designations()
         _logging.info(f"Success.")
         return cells
 
     def _init_grid(self):
         _logging.info('Calculating coordinates ...')
-        coordinates = [(abs(0 - ((num % len(self._file)) * self._cell_size)),
-                        abs(0 - ((num // len(self._file)) * self._cell_size))) for num in range(len(self._cell_list))]
+        num = _np.arange(len(self._cell_list), dtype=_np.int32)
+        coordinates = _np.stack([(num % self._grid_width) * self._cell_size,
+                                 (num // self._grid_width) * self._cell_size], axis=1)
         _logging.info('Success.')
-        dictionary = {
-            cell: {
-                'coordinates': coordinates[num],
-                # The coordinates of the cell.
-                'cell_index': num,
-                'rank_index': self._rank.index(cell[:-5]),
-                'file_index': self._file.index(cell[-5:]),
-                'quadrant_index': None,
-                'quadrant': None,
-                'terrain_str': None,
-                'terrain_raw': None,
-                'terrain_int': None,
-                'terrain_color': None,
-                'terrain_shape': None,
-                'passable': True,
-                'adjacent': [],
-                'occupied': False,
-                'occupant': None,
-                'obstructed': False,
-                'obstruction': None,
-                'entitled': False,
-                'title': None,
-                'entity': None,
-                'groups': {},
-            } for num, cell in enumerate(self._cell_list)
-        }
-
-        return dictionary, coordinates
+        return _CellEntries(self), coordinates
 
     def _get_quadrant(self, coordinates):
-        quadrant_x = coordinates[0] // ((self._cell_size * 30) * self._grid_scale)
-        quadrant_y = coordinates[1] // ((self._cell_size * 30) * self._grid_scale)
-        quadrant_coords = (quadrant_x, quadrant_y)
-        for quadrant_index, coord in enumerate(self._quadrants):
-            if coord == quadrant_coords:
-                return quadrant_index
+        """Returns the index of the quadrant holding a point, or None if it is off the grid."""
+        span = (self._cell_size * 30) * self._grid_scale
+        columns = -(-self._grid_width * self._cell_size // span)
+        rows = -(-self._grid_height * self._cell_size // span)
+        quadrant_x = int(coordinates[0] // span)
+        quadrant_y = int(coordinates[1] // span)
+        if not (0 <= quadrant_x < columns and 0 <= quadrant_y < rows):
+            return None
+        return quadrant_y * columns + quadrant_x
 
     def _init_quadrants(self, coords):
         _logging.info('Initializing quadrants ...')
-        quadrants = defaultdict(dict)
-        quad_cells = defaultdict(list)
-        for cell_index, coord in enumerate(coords):
-            # Classify cell into a quadrant based on its x and y coordinates
-            quadrant_x = coord[0] // ((self._cell_size * 30) * self._grid_scale)
-            quadrant_y = coord[1] // ((self._cell_size * 30) * self._grid_scale)
-            quadrant_coords = (quadrant_x, quadrant_y)
-            quad_cells[quadrant_coords].append(cell_index)
-        for quadrant_index, coord in enumerate(quad_cells):
+        # Classify cells into quadrants based on their x and y coordinates
+        span = (self._cell_size * 30) * self._grid_scale
+        quadrant_x = coords[:, 0] // span
+        quadrant_y = coords[:, 1] // span
+        columns = int(quadrant_x.max()) + 1
+        self._quadrant_index = (quadrant_y * columns + quadrant_x).astype(_np.int32)
+        order = _np.argsort(self._quadrant_index, kind='stable')
+        bounds = _np.searchsorted(self._quadrant_index[order], _np.arange(int(self._quadrant_index.max()) + 2))
+        quadrants = {}
+        for quadrant_index in range(len(bounds) - 1):
             # Create a dictionary of the cells in each quadrant
             quadrants[quadrant_index] = {
-                'coordinates': coord,
-                'cells': [self._cell_list[cell] for cell in quad_cells[coord]]
+                'coordinates': (quadrant_index % columns, quadrant_index // columns),
+                'cells': [self._cell_list[cell] for cell in order[bounds[quadrant_index]:bounds[quadrant_index + 1]]]
             }
 
         _logging.info(f'Successfully initialized {len(quadrants)} quadrants.')
@@ -277,99 +463,14 @@ class GridBlueprint:
 
     def _init_adjacency(self):
         _logging.info('Initializing adjacency data ...')
-        w = self._grid_width
-        for cell, information in self._grid_dictionary.items():
-            n = information['cell_index']
-            print_progress(len(self._grid_dictionary.keys()), n)
-            r = self._grid_dictionary[cell]['rank_index']
-            f = self._grid_dictionary[cell]['file_index']
-            if r not in [0, len(self._rank) - 1] and f not in [0, len(self._file) - 1]:
-                self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n - (w + 1)], self._cell_list[n - w],
-                                                           self._cell_list[n - (w - 1)],
-                                                           self._cell_list[n + 1],
-                                                           self._cell_list[n + (w + 1)], self._cell_list[n + w],
-                                                           self._cell_list[n + (w - 1)],
-                                                           self._cell_list[n - 1]]
-            else:
-                if r == 0:
-                    if f == 0:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[1], self._cell_list[w + 1],
-                                                                   self._cell_list[w]]
-                    elif f == len(self._file) - 1:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n + w], self._cell_list[n + (w - 1)],
-                                                                   self._cell_list[n - 1]]
-                    else:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n + 1], self._cell_list[n + (w + 1)],
-                                                                   self._cell_list[n + w],
-                                                                   self._cell_list[n + (w - 1)],
-                                                                   self._cell_list[n - 1]]
-                elif r == len(self._rank) - 1:
-                    if f == 0:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n - w], self._cell_list[n - (w - 1)],
-                                                                   self._cell_list[n + 1]]
-                    elif f == len(self._file) - 1:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n - (w + 1)], self._cell_list[n - w],
-                                                                   self._cell_list[n - 1]]
-                    else:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n - (w + 1)], self._cell_list[n - w],
-                                                                   self._cell_list[n - (w - 1)],
-                                                                   self._cell_list[n + 1],
-                                                                   self._cell_list[n - 1]]
-                else:
-                    if f == 0:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n - w], self._cell_list[n - (w - 1)],
-                                                                   self._cell_list[n + 1],
-                                                                   self._cell_list[n + (w + 1)],
-                                                                   self._cell_list[n + w]]
-                    elif f == len(self._file) - 1:
-                        self._grid_dictionary[cell]['adjacent'] = [self._cell_list[n - (w + 1)], self._cell_list[n - w],
-                                                                   self._cell_list[n + w],
-                                                                   self._cell_list[n + (w - 1)],
-                                                                   self._cell_list[n - 1]]
-        _logging.info('Success.')
+        self._adjacency = _AdjacencyGraph(self._grid_height, self._grid_width)
+        _logging.info(f'Success. {len(self._adjacency.indices)} links in {self._adjacency.nbytes} bytes.')
 
     def _diamond_square(self):
         _logging.info('Performing diamond square algorithmic procedure.')
         roughness = self._noise_roughness
         _logging.info(f'Roughness: {roughness}')
-        # Initialize the grid with zeros using NumPy
-        grid = _np.zeros((self._grid_height, self._grid_width))
-
-        # Set the corner values to _random numbers
-        grid[0, 0] = _random.uniform(0.0, 1.0)
-        grid[0, self._grid_width - 1] = _random.uniform(0.0, 1.0)
-        grid[self._grid_height - 1, 0] = _random.uniform(0.0, 1.0)
-        grid[self._grid_height - 1, self._grid_width - 1] = _random.uniform(0.0, 1.0)
-
-        step = self._grid_width - 1
-        while step > 1:
-            half = step // 2
-
-            # Diamond step
-            for i in range(half, self._grid_height - 1, step):
-                for j in range(half, self._grid_width - 1, step):
-                    average = (grid[i - half, j - half] + grid[i - half, j] +
-                               grid[i, j - half] + grid[i, j]) / 4.0
-                    grid[i, j] = average + _random.uniform(-1.0, 1.0) * roughness
-
-            # Square step
-            for i in range(0, self._grid_height - 1, half):
-                for j in range((i + half) % step, self._grid_width - 1, step):
-                    average = (grid[(i - half + self._grid_height - 1) % (self._grid_height - 1), j] +
-                               grid[(i + half) % (self._grid_height - 1), j] +
-                               grid[i, (j + half) % (self._grid_width - 1)] +
-                               grid[i, (j - half + self._grid_width - 1) % (self._grid_width - 1)]) / 4.0
-                    grid[i, j] = average + _random.uniform(-1.0, 1.0) * roughness
-
-                    if i == 0:
-                        grid[self._grid_height - 1, j] = (grid[i, j] + grid[
-                            self._grid_height - 2, j]) / 2.0 + _random.uniform(-1.0, 1.0) * roughness
-
-            # Reduce the roughness for each iteration
-            roughness /= 2.0
-
-            # Reduce the step size for each iteration
-            step //= 2
+        grid = _diamond_square_field(self._grid_height, self._grid_width, roughness, self.rng('diamond_square'))
 
         _logging.info('Success.')
         _logging.info('Normalizing grid values.')
@@ -387,80 +488,95 @@ class GridBlueprint:
 
         return grid
 
-    def _generate_terrain(self):
+    def _quadrant_span(self):
+        """The side of a quadrant in cells."""
+        return 30 * self._grid_scale
+
+    def _generate_terrain(self, pool):
         _logging.info('Generating noise terrain data.')
         _logging.info(f'Noise scale: {self._noise_scale}')
         _logging.info(f'Noise octaves: {self._noise_octaves}')
-        inverse_terrain_data = _np.zeros((self._grid_height, self._grid_width))  # type: _np.ndarray
-        for y in range(self._grid_width):
-            for x in range(self._grid_height):
-                inverse_terrain_data[x][y] = _noise.pnoise2(y / self._noise_scale, x / self._noise_scale,
-                                                            self._noise_octaves)
-        _logging.info('Normalizing terrain data.')
-        terrain_data = (inverse_terrain_data - _np.min(inverse_terrain_data)) / (
-                    _np.max(inverse_terrain_data) - _np.min(inverse_terrain_data))
-        _logging.info('Success.')
+        _logging.info(f'Noise backend: {self._noise_backend}')
+        base = int(self.rng('noise').integers(2 ** 31))
+        noise = _np.empty((self._grid_height, self._grid_width))
+        tiles = self._tiles(pool)
+        bounds = pool.map(_noise_tile, [noise], tiles,
+                          (self._noise_backend, self._noise_scale, self._noise_octaves, base))
+        low = min(low for low, _ in bounds)
+        high = max(high for _, high in bounds)
         _logging.info('Noise terrain data generated.')
-        return terrain_data
+        return noise, low, high
+
+    def _tiles(self, pool):
+        if pool.workers <= 1:
+            return [(0, self._grid_height, 0, self._grid_width)]
+        return _tiling.quadrant_tiles(self._grid_height, self._grid_width, self._quadrant_span())
+
+    def _pool_workers(self):
+        """The number of processes to generate terrain on: the workers asked for, at most one per CPU core,
+        or one when the map is too small for a pool to pay off, see _PARALLEL_MIN_SAMPLES."""
+        workers = min(self._workers or 1, os.cpu_count() or 1)
+        samples = self._grid_height * self._grid_width * self._noise_octaves
+        return workers if samples >= _PARALLEL_MIN_SAMPLES[self._noise_backend] else 1
 
     def _get_terrain_value(self):
         terrain_data_ds = self._diamond_square()
         _logging.info(f'Shape: {terrain_data_ds.shape}')
-        terrain_data_ns = self._generate_terrain()
-        _logging.info(f'Shape: {terrain_data_ns.shape}')
-        _logging.info('Adding ')
-        for cell, information in self._grid_dictionary.items():
-            r, f = information['rank_index'], information['file_index']
-            x, y = information['coordinates']
-            terrain_ns_raw = terrain_data_ns[y // self._cell_size][x // self._cell_size]
-            terrain_ds_raw = terrain_data_ds[r, f]
-            terrain_raw = (terrain_ns_raw + terrain_ds_raw) / 2
-            for terrain, info in _TERRAIN_DICT.items():
-                if terrain_raw <= info['raw_max']:
-                    terrain_str = terrain
-                    terrain_int = info['int']
-                    terrain_color = info['color']
-                    break
-            self._grid_dictionary[cell]['terrain_str'] = terrain_str
-            self._grid_dictionary[cell]['terrain_raw'] = terrain_raw
-            self._grid_dictionary[cell]['terrain_int'] = terrain_int
-            self._grid_dictionary[cell]['terrain_color'] = terrain_color
+        with _tiling.TilePool(self._pool_workers()) as pool:
+            _logging.info(f'Generating terrain in {len(self._tiles(pool))} tiles on {pool.workers} worker(s).')
+            noise, low, high = self._generate_terrain(pool)
+            _logging.info(f'Shape: {noise.shape}')
+            _logging.info('Classifying terrain.')
+            terrain_raw = _np.empty_like(noise)
+            terrain_int = _np.empty(noise.shape, dtype=_np.uint8)
+            pool.map(_classify_tile, [noise, terrain_data_ds, terrain_raw, terrain_int], self._tiles(pool), (low, high))
+        # Both fields are indexed [rank, file], so flattening them follows the cell index.
+        self._terrain_raw = terrain_raw.ravel()
+        self._terrain_int = terrain_int.ravel()
+        self._terrain_color = _TERRAIN_COLOR_TABLE[self._terrain_int]
+        self._passable = _TERRAIN_PASSABLE[self._terrain_int]
+        passable_count = int(_np.count_nonzero(self._passable))
+        _logging.info(f'Passable: {passable_count}')
+        _logging.info(f'Unpassable: {len(self._passable) - passable_count}')
+        self._region = self._init_regions()
         _logging.info('Success.')
 
-    def _adjust_passability(self):
-        _logging.info('Adjusting passability.')
-        passable = []
-        unpassable = []
-        for c, info in self._grid_dictionary.items():
-            if info['terrain_str'] in _UNPASSABLE_TERRAIN:
-                self._grid_dictionary[c]['passable'] = False
-                unpassable.append(c)
-            else:
-                self._grid_dictionary[c]['passable'] = True
-                passable.append(c)
-        _logging.info(f'Passable: {len(passable)}')
-        _logging.info(f'Unpassable: {len(unpassable)}')
-        _logging.info('Success.')
+    def _init_regions(self):
+        regions = _regions.label_regions(self._passable, self._grid_height, self._grid_width)
+        _logging.info(f'Passable regions: {int(regions.max()) + 1}')
+        return regions
 
     def _init_graph(self):
         _logging.info('Initializing graph.')
-        graph = {}
-        for cell, info in self._grid_dictionary.items():
-            graph[cell] = [adj for adj in info['adjacent']]
+        graph = _DesignationGraph(self._adjacency, self._cell_list, self._codec.to_index)
         _logging.info('Success.')
         return graph
     
     def _update(self):
-        save_grid(self._grid_dictionary, '001GRID.json')
+        save_grid(self, '001GRID.grid')
+
+
+# The columns generation recreates from the seed and parameters alone.
+_GENERATED_COLUMNS = ('coordinates', 'terrain_raw', 'terrain_int', 'passable', 'adjacency_offsets', 'adjacency_indices')
 
 
-def save_grid(dict_obj, file_path):
-    with open(file_path, 'w') as file:
-        _json.dump(dict_obj.__json__(), file)
+def save_grid(grid_obj, file_path, terrain: bool = True):
+    """Writes a GridBlueprint or Grid to a binary grid file. With `terrain` False only the seed,
+    parameters and cell state are written and the terrain is regenerated when the file is loaded."""
+    header, columns = grid_obj.__grid_file__()
+    if not terrain:
+        if header['seed'] is None:
+            raise ValueError('Cannot save a grid without terrain unless it has a seed')
+        columns = {name: column for name, column in columns.items() if name not in _GENERATED_COLUMNS}
+    _grid_file.write_grid_file(file_path, header, columns)
 
 
-def load_grid(file_path: _Optional[str] = None):
-    f = "empty_grid._json" or file_path
-    with open(f, 'r') as file:  # type: ignore
-        dict_obj = _json.load(file)
-    return dict_obj
+def load_grid(file_path: str):
+    """Opens a binary grid file. A grid in the old `._json` format is converted to `<file_path>.grid`
+    first, see grid_file.convert_json_grid, and the converted file is reused while it is newer."""
+    if not _grid_file.is_grid_file(file_path):
+        converted = file_path + '.grid'
+        if not os.path.exists(converted) or os.path.getmtime(converted) < os.path.getmtime(file_path):
+            _grid_file.convert_json_grid(file_path, converted)
+        file_path = converted
+    return _grid_file.GridFile(file_path)
@@ -0,0 +1,165 @@
+import json as _json
+import logging as _logging
+import struct as _struct
+from typing import Dict as _Dict, Optional as _Optional
+
+import numpy as _np
+
+from . import designation as _designation
+
+_logging.basicConfig(level=_logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# A grid file is laid out as
+#
+#     magic (8 bytes) | version (uint32) | header length (uint32) | header (UTF-8 JSON) | column blocks
+#
+# The header holds the blueprint parameters, the rank and file names and a table giving the dtype, shape
+# and byte offset of every column. Each column is a raw little-endian array aligned to _ALIGNMENT bytes,
+# so every column of a loaded file is a view into one numpy.memmap and only touched pages are read.
+MAGIC = b'NGGRID\r\n'
+FORMAT_VERSION = 1
+_PREAMBLE = _struct.Struct('<8sII')
+_ALIGNMENT = 64
+
+
+def _aligned(offset: int):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _column_layout(columns: _Dict[str, _np.ndarray], start: int):
+    layout = {}
+    offset = start
+    for name, array in columns.items():
+        offset = _aligned(offset)
+        layout[name] = {'dtype': array.dtype.newbyteorder('<').str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    return layout
+
+
+def write_grid_file(file_path: str, header: dict, columns: _Dict[str, _np.ndarray]):
+    """Writes a grid file holding `header` and the given column arrays."""
+    columns = {name: _np.ascontiguousarray(array) for name, array in columns.items()}
+    # The column offsets depend on the header length and the header holds the offsets, so lay the
+    # columns out after a generous guess and grow the guess until the header fits in front of them.
+    start = _aligned(_PREAMBLE.size + 1024)
+    while True:
+        header = dict(header, version=FORMAT_VERSION, columns=_column_layout(columns, start))
+        encoded = _json.dumps(header).encode('utf-8')
+        if _PREAMBLE.size + len(encoded) <= start:
+            break
+        start = _aligned(_PREAMBLE.size + len(encoded))
+    with open(file_path, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        file.write(encoded)
+        for name, array in columns.items():
+            file.write(b'\0' * (header['columns'][name]['offset'] - file.tell()))
+            file.write(array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
+
+
+def is_grid_file(file_path: str):
+    """Checks whether a file starts with the grid file magic."""
+    with open(file_path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class GridFile:
+    """
+    A grid file opened for reading. Only the header is parsed up front; the columns are read-only views
+    into a memory map of the file.
+
+    Args:
+        file_path (str): The file to open.
+
+    Attributes:
+        header (dict): The header of the file.
+        columns (dict): The column arrays, keyed by name.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            magic, version, length = _PREAMBLE.unpack(file.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f'{file_path} is not a grid file')
+            if version > FORMAT_VERSION:
+                raise ValueError(f'{file_path} is grid format version {version}, newer than {FORMAT_VERSION}')
+            self.header = _json.loads(file.read(length).decode('utf-8'))
+        self._map = _np.memmap(file_path, dtype=_np.uint8, mode='r')
+        self.columns = {}
+        for name, layout in self.header['columns'].items():
+            dtype = _np.dtype(layout['dtype'])
+            size = dtype.itemsize * int(_np.prod(layout['shape'], dtype=_np.int64))
+            block = self._map[layout['offset']:layout['offset'] + size]
+            self.columns[name] = block.view(dtype).reshape(layout['shape'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def version(self):
+        return self.header['version']
+
+
+def convert_json_grid(json_path: str, file_path: str, cell_size: _Optional[int] = None):
+    """Converts a grid saved in the old `._json` format (a dictionary of cell entries keyed by
+    designation) into a grid file. The cells keep their rank and file indices but take the current
+    designation scheme. Terrain columns are only written when every cell has terrain."""
+    _logging.info(f'Converting {json_path} ...')
+    with open(json_path, 'r') as file:
+        cells = _json.load(file)
+    height = max(entry['rank_index'] for entry in cells.values()) + 1
+    width = max(entry['file_index'] for entry in cells.values()) + 1
+    if len(cells) != height * width:
+        raise ValueError(f'{json_path} holds {len(cells)} cells, not a full {height} x {width} grid')
+    index_of = {designation: entry['rank_index'] * width + entry['file_index'] for designation, entry in cells.items()}
+    entries = [None] * len(cells)
+    for designation, entry in cells.items():
+        entries[index_of[designation]] = entry
+    codec = _designation.DesignationCodec(_designation.rank_names(height), _designation.file_names(width))
+    coordinates = _np.array([entry['coordinates'] for entry in entries], dtype=_np.int32)
+    if cell_size is None and width > 1:
+        cell_size = int(coordinates[1, 0] - coordinates[0, 0])
+
+    degrees = _np.array([len(entry['adjacent']) for entry in entries], dtype=_np.int32)
+    offsets = _np.zeros(len(entries) + 1, dtype=_np.int32)
+    _np.cumsum(degrees, out=offsets[1:])
+    indices = _np.array([index_of[neighbor] for entry in entries for neighbor in entry['adjacent']],
+                        dtype=_np.int32)
+
+    columns = {
+        'coordinates': coordinates,
+        'passable': _np.array([bool(entry['passable']) for entry in entries]),
+        'occupied': _np.array([bool(entry.get('occupied')) for entry in entries]),
+        'obstructed': _np.array([bool(entry.get('obstructed')) for entry in entries]),
+        'adjacency_offsets': offsets,
+        'adjacency_indices': indices,
+    }
+    if all(entry.get('terrain_int') is not None for entry in entries):
+        columns['terrain_raw'] = _np.array([entry['terrain_raw'] for entry in entries], dtype=_np.float64)
+        columns['terrain_int'] = _np.array([entry['terrain_int'] for entry in entries], dtype=_np.uint8)
+    header = {
+        'cell_size': cell_size,
+        'grid_scale': None,
+        'noise_scale': None,
+        'noise_octaves': None,
+        'noise_roughness': None,
+        'noise_backend': None,
+        'seed': None,
+        'height': height,
+        'width': width,
+        'ranks': codec.ranks,
+        'files': codec.files,
+    }
+    write_grid_file(file_path, header, columns)
+    _logging.info(f'Wrote {file_path}.')
+
+
+if __name__ == '__main__':
+    import sys as _sys
+    if len(_sys.argv) != 3:
+        print('Usage: python -m src.components.map.grid_file OLD._json NEW.grid')
+        _sys.exit(2)
+    convert_json_grid(_sys.argv[1], _sys.argv[2])
@@ -0,0 +1,275 @@
+import heapq as _heapq
+import math as _math
+from typing import Optional as _Optional
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .adjacency import AdjacencyGraph as _AdjacencyGraph
+
+# Border segments at least this long get an entrance at each end rather than one in the middle.
+_WIDE_ENTRANCE = 6
+
+# (rank step, file step, cost) of the eight moves.
+_STEPS = [(dr, df, _pathfinding.DIAGONAL if dr and df else 1.0)
+          for dr in (-1, 0, 1) for df in (-1, 0, 1) if dr or df]
+
+
+def _shifted(dr, df):
+    """The destination and source slices of a move by (dr, df) within a block."""
+    def pair(d):
+        if d > 0:
+            return slice(d, None), slice(None, -d)
+        if d < 0:
+            return slice(None, d), slice(-d, None)
+        return slice(None), slice(None)
+    (rank_dst, rank_src), (file_dst, file_src) = pair(dr), pair(df)
+    return (slice(None), rank_dst, file_dst), (slice(None), rank_src, file_src)
+
+
+_SHIFTS = [(_shifted(dr, df), cost) for dr, df, cost in _STEPS]
+
+
+def block_distances(open_block: _np.ndarray, sources):
+    """Returns the (len(sources), height, width) shortest path costs from each (rank, file) source to
+    every cell of a block, moving only through its open cells. Unreachable cells are infinite.
+
+    Every pass relaxes all eight moves at once with array operations and the passes repeat until
+    nothing improves, so no per-cell Python loop runs."""
+    dist = _np.full((len(sources),) + open_block.shape, _np.inf)
+    for i, (rank, file) in enumerate(sources):
+        dist[i, rank, file] = 0.0
+    closed = ~open_block
+    moves = [(dst, src, cost, closed[dst[1:]]) for (dst, src), cost in _SHIFTS]
+    changed = True
+    while changed:
+        changed = False
+        for dst, src, cost, blocked in moves:
+            candidate = dist[src] + cost
+            candidate[:, blocked] = _np.inf
+            target = dist[dst]
+            if (candidate < target).any():
+                _np.minimum(target, candidate, out=target)
+                changed = True
+    return dist
+
+
+class HierarchicalPlanner:
+    """
+    Hierarchical A* (HPA*) over square clusters of cells aligned to the grid's quadrants.
+
+    Entrances are placed where a run of passable cells faces another across a cluster border, and the
+    costs between the entrances of each cluster are tabulated. A query first searches this small
+    abstract graph, then refines the route with A* confined to one cluster at a time. The abstract
+    graph follows passability only; occupied cells are avoided during refinement, and if that fails the
+    query falls back to a flat search. Clusters whose passability changed are rebuilt on the next
+    query, together with their neighbours.
+
+    Args:
+        graph (AdjacencyGraph): The grid's adjacency.
+        passable (ndarray): Whether each cell can be crossed; read again when a cluster is rebuilt.
+        cluster_size (int): The side of a cluster in cells; quadrants are made up of whole clusters.
+    """
+
+    def __init__(self, graph: _AdjacencyGraph, passable: _np.ndarray, cluster_size: int = 30):
+        self.graph = graph
+        self.passable = passable
+        self.cluster_size = cluster_size
+        self.height = graph.height
+        self.width = graph.width
+        self.cluster_rows = -(-self.height // cluster_size)
+        self.cluster_cols = -(-self.width // cluster_size)
+        self._borders = {}
+        self._nodes = {}
+        self._tables = {}
+        self._dirty = set(range(self.cluster_rows * self.cluster_cols))
+        self.rebuilt = 0
+        self.expanded = 0
+
+    def cluster_of(self, index: int):
+        rank, file = divmod(index, self.width)
+        return (rank // self.cluster_size) * self.cluster_cols + file // self.cluster_size
+
+    def _bounds(self, cluster):
+        row, col = divmod(cluster, self.cluster_cols)
+        size = self.cluster_size
+        return row * size, min((row + 1) * size, self.height), col * size, min((col + 1) * size, self.width)
+
+    def _neighbor_clusters(self, cluster):
+        row, col = divmod(cluster, self.cluster_cols)
+        for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= r < self.cluster_rows and 0 <= c < self.cluster_cols:
+                yield r * self.cluster_cols + c
+
+    def mark_dirty(self, index: int):
+        """Notes that a cell's passability changed."""
+        self._dirty.add(self.cluster_of(index))
+
+    def _border_entrances(self, a, b):
+        """Returns the (cell in a, cell in b) pairs crossing the border between clusters a < b."""
+        r0, r1, f0, f1 = self._bounds(a)
+        width = self.width
+        passable = self.passable.reshape(self.height, width)
+        # Clusters a row apart are also numbered one apart when there is a single column of them.
+        if divmod(a, self.cluster_cols)[0] == divmod(b, self.cluster_cols)[0]:
+            # b lies to the right of a.
+            facing = passable[r0:r1, f1 - 1] & passable[r0:r1, f1]
+            pairs = [(r * width + f1 - 1, r * width + f1) for r in range(r0, r1)]
+        else:
+            facing = passable[r1 - 1, f0:f1] & passable[r1, f0:f1]
+            pairs = [((r1 - 1) * width + f, r1 * width + f) for f in range(f0, f1)]
+        entrances = []
+        start = None
+        for i, open_ in enumerate(facing.tolist() + [False]):
+            if open_ and start is None:
+                start = i
+            elif not open_ and start is not None:
+                if i - start >= _WIDE_ENTRANCE:
+                    entrances += [pairs[start], pairs[i - 1]]
+                else:
+                    entrances.append(pairs[(start + i - 1) // 2])
+                start = None
+        return entrances
+
+    def _rebuild(self):
+        if not self._dirty:
+            return
+        touched = set(self._dirty)
+        for cluster in self._dirty:
+            for other in self._neighbor_clusters(cluster):
+                self._borders[min(cluster, other), max(cluster, other)] = \
+                    self._border_entrances(min(cluster, other), max(cluster, other))
+                touched.add(other)
+        for cluster in touched:
+            nodes = set()
+            for other in self._neighbor_clusters(cluster):
+                for pair in self._borders.get((min(cluster, other), max(cluster, other)), ()):
+                    nodes.add(pair[0] if cluster < other else pair[1])
+            self._nodes[cluster] = sorted(nodes)
+            self._tables[cluster] = self._table(cluster, self._nodes[cluster])
+        self.rebuilt += len(touched)
+        self._dirty.clear()
+
+    def _open_block(self, cluster):
+        r0, r1, f0, f1 = self._bounds(cluster)
+        return self.passable.reshape(self.height, self.width)[r0:r1, f0:f1]
+
+    def _local(self, cluster, index):
+        r0, _, f0, _ = self._bounds(cluster)
+        rank, file = divmod(index, self.width)
+        return rank - r0, file - f0
+
+    def _table(self, cluster, nodes):
+        """Returns {node: {other node: cost}} for the entrances of one cluster."""
+        if not nodes:
+            return {}
+        dist = block_distances(self._open_block(cluster), [self._local(cluster, n) for n in nodes])
+        local = [self._local(cluster, n) for n in nodes]
+        table = {}
+        for i, node in enumerate(nodes):
+            row = dist[i]
+            table[node] = {other: float(row[rank, file]) for other, (rank, file) in zip(nodes, local)
+                           if other != node and row[rank, file] < _np.inf}
+        return table
+
+    def _links(self, index):
+        """Returns {entrance: cost} from a cell to the entrances of its own cluster."""
+        cluster = self.cluster_of(index)
+        nodes = self._nodes.get(cluster, [])
+        if not nodes:
+            return {}
+        open_block = self._open_block(cluster).copy()
+        rank, file = self._local(cluster, index)
+        open_block[rank, file] = True
+        dist = block_distances(open_block, [(rank, file)])[0]
+        links = {}
+        for node in nodes:
+            r, f = self._local(cluster, node)
+            if dist[r, f] < _np.inf:
+                links[node] = float(dist[r, f])
+        return links
+
+    def _crossings(self, node):
+        cluster = self.cluster_of(node)
+        for other in self._neighbor_clusters(cluster):
+            for a, b in self._borders.get((min(cluster, other), max(cluster, other)), ()):
+                if a == node:
+                    yield b
+                elif b == node:
+                    yield a
+
+    def _abstract_search(self, start, goal):
+        start_links = self._links(start)
+        goal_links = self._links(goal)
+        goal_cluster = self.cluster_of(goal)
+        width = self.width
+        cost = {start: 0.0}
+        parent = {}
+        closed = set()
+        frontier = [(_pathfinding.octile(start, goal, width), start)]
+        while frontier:
+            _, node = _heapq.heappop(frontier)
+            if node in closed:
+                continue
+            closed.add(node)
+            self.expanded += 1
+            if node == goal:
+                route = [goal]
+                while route[-1] != start:
+                    route.append(parent[route[-1]])
+                route.reverse()
+                return route
+            if node == start:
+                edges = start_links.items()
+            else:
+                edges = list(self._tables[self.cluster_of(node)].get(node, {}).items())
+                edges += [(other, 1.0) for other in self._crossings(node)]
+                if self.cluster_of(node) == goal_cluster and node in goal_links:
+                    edges.append((goal, goal_links[node]))
+            for other, step in edges:
+                g = cost[node] + step
+                if g < cost.get(other, _math.inf):
+                    cost[other] = g
+                    parent[other] = node
+                    _heapq.heappush(frontier, (g + _pathfinding.octile(other, goal, width), other))
+        return None
+
+    def _refine(self, route, bitmap):
+        path = [route[0]]
+        size = len(bitmap)
+        for a, b in zip(route, route[1:]):
+            if self.graph.is_adjacent(a, b):
+                if not bitmap[b]:
+                    return None
+                path.append(b)
+                continue
+            cluster = self.cluster_of(a)
+            r0, r1, f0, f1 = self._bounds(cluster)
+            confined = bytearray(size)
+            for rank in range(r0, r1):
+                confined[rank * self.width + f0:rank * self.width + f1] = bitmap[rank * self.width + f0:rank * self.width + f1]
+            stats = {}
+            segment = _pathfinding.astar(self.graph, confined, a, b, stats)
+            self.expanded += stats['expanded']
+            if segment is None:
+                return None
+            path += segment[1:]
+        return path
+
+    def find_path(self, bitmap, start: int, goal: int, stats: _Optional[dict] = None):
+        """Finds a path of cell indices from `start` to `goal` through the cells marked in `bitmap`,
+        or None. `stats`, if given, receives the number of nodes expanded."""
+        self._rebuild()
+        self.expanded = 0
+        path = None
+        if self.cluster_of(start) != self.cluster_of(goal):
+            route = self._abstract_search(start, goal)
+            if route is not None:
+                path = self._refine(route, bitmap)
+        if path is None:
+            flat = {}
+            path = _pathfinding.astar(self.graph, bitmap, start, goal, flat)
+            self.expanded += flat['expanded']
+        if stats is not None:
+            stats['expanded'] = self.expanded
+        return path
@@ -0,0 +1,196 @@
+import atexit as _atexit
+import json as _json
+import logging as _logging
+import os as _os
+import threading as _threading
+from typing import Optional as _Optional, Union as _Union
+
+_logging.basicConfig(level=_logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+JOURNAL_VERSION = 2
+
+# Each operation sets or clears one cell in one of the journal's state tables. Only changes to the map
+# itself are journalled: occupants and titles belong to entities, which are created again every session
+# and would otherwise come back as labels that nothing ever vacates. 'passable' records the new setting
+# as its label.
+_OPERATIONS = {
+    'obstruct': ('obstructed', True),
+    'destruct': ('obstructed', False),
+    'passable': ('passable', True),
+}
+
+
+def _empty_state():
+    return {table: {} for table, _ in _OPERATIONS.values()}
+
+
+def _apply(state, record):
+    if record['op'] not in _OPERATIONS:
+        # Occupancy and titles journalled by version 1 are no longer restored.
+        return
+    table, setting = _OPERATIONS[record['op']]
+    if setting:
+        state[table][record['cell']] = record.get('label')
+    else:
+        state[table].pop(record['cell'], None)
+
+
+def _read_records(path):
+    records = []
+    if not _os.path.exists(path):
+        return records
+    with open(path, 'r') as file:
+        for line in file:
+            try:
+                records.append(_json.loads(line))
+            except ValueError:
+                # A torn final line from an interrupted write.
+                break
+    return records
+
+
+class GridJournal:
+    """
+    Write-behind persistence for the changes made to a grid's map: obstructions and passability.
+
+    Every change is appended to `<path>.journal` as one small JSON line. A background thread folds the
+    journal into a checkpoint at `path` once `compact_after` records have built up or every `interval`
+    seconds, whichever comes first. `recover` rebuilds the latest state from the checkpoint and
+    whatever journal records came after it, and a new journal does so itself on startup, see
+    `recovered`.
+
+    Args:
+        path (str): The checkpoint file.
+        meta (dict): Parameters stored with every checkpoint, e.g. the blueprint settings.
+        interval (float): The longest time in seconds between checkpoints while records are pending.
+        compact_after (int): The number of pending records that triggers an early checkpoint.
+
+    Attributes:
+        recovered (dict): The obstructed and passable tables recovered from an earlier session of the
+            same grid, or None if there was nothing to recover.
+    """
+
+    def __init__(self, path: str, meta: _Optional[dict] = None, interval: float = 5.0, compact_after: int = 512):
+        self.path = path
+        self.meta = meta or {}
+        self._journal_path = path + '.journal'
+        self._rotated_path = path + '.journal.1'
+        self._interval = interval
+        self._compact_after = compact_after
+        self._condition = _threading.Condition()
+        self._state = _empty_state()
+        self._seq = 0
+        self._pending = 0
+        self._closing = False
+        self.recovered = None
+        directory = _os.path.dirname(path)
+        if directory:
+            _os.makedirs(directory, exist_ok=True)
+        # Whatever an earlier session left behind is folded into a fresh checkpoint before the journal
+        # files are reused, so a crash loses nothing. A journal of a different grid is discarded.
+        state = self.recover(path)
+        if state['meta'] == _json.loads(_json.dumps(self.meta)):
+            self._state = {table: state[table] for table in _empty_state()}
+            self._seq = state['seq']
+            if any(self._state.values()):
+                self.recovered = {table: dict(cells) for table, cells in self._state.items()}
+        elif state['seq']:
+            _logging.info(f'Discarding the journal at {path}, which belongs to another grid.')
+        self._write_checkpoint(self._snapshot())
+        for stale in (self._journal_path, self._rotated_path):
+            if _os.path.exists(stale):
+                _os.remove(stale)
+        self._file = open(self._journal_path, 'a')
+        self._thread = _threading.Thread(target=self._run, name=f'GridJournal({path})', daemon=True)
+        self._thread.start()
+        _atexit.register(self.close)
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def record(self, op: str, cell: int, label: _Optional[_Union[str, bool]] = None):
+        """Appends one change to the journal."""
+        entry = {'seq': 0, 'op': op, 'cell': int(cell)}
+        if label is not None:
+            entry['label'] = label
+        with self._condition:
+            if self._closing:
+                return
+            self._seq += 1
+            entry['seq'] = self._seq
+            self._file.write(_json.dumps(entry) + '\n')
+            self._file.flush()
+            _apply(self._state, entry)
+            self._pending += 1
+            if self._pending >= self._compact_after:
+                self._condition.notify()
+
+    def _snapshot(self):
+        return {
+            'version': JOURNAL_VERSION,
+            'seq': self._seq,
+            'meta': self.meta,
+            **{table: dict(cells) for table, cells in self._state.items()},
+        }
+
+    def _write_checkpoint(self, snapshot):
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as file:
+            _json.dump(snapshot, file)
+        _os.replace(temporary, self.path)
+
+    def checkpoint(self):
+        """Folds the pending records into the checkpoint now."""
+        # The checkpoint is written under the lock so that two checkpoints never share the temporary file
+        # or land out of order.
+        with self._condition:
+            if not self._pending:
+                return
+            self._file.close()
+            _os.replace(self._journal_path, self._rotated_path)
+            self._file = open(self._journal_path, 'a')
+            self._write_checkpoint(self._snapshot())
+            _os.remove(self._rotated_path)
+            self._pending = 0
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closing and self._pending < self._compact_after:
+                    self._condition.wait(self._interval)
+                closing = self._closing
+            try:
+                self.checkpoint()
+            except OSError as e:
+                _logging.warning(f'Grid journal checkpoint failed: {e}')
+            if closing:
+                return
+
+    def close(self):
+        """Stops the worker after a final checkpoint."""
+        with self._condition:
+            if self._closing:
+                return
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        self._file.close()
+        _atexit.unregister(self.close)
+
+    @staticmethod
+    def recover(path: str):
+        """Returns the latest state saved under `path`: the checkpoint with the journal replayed on top.
+        Cell keys are cell indices."""
+        state = {'version': JOURNAL_VERSION, 'seq': 0, 'meta': {}, **_empty_state()}
+        if _os.path.exists(path):
+            with open(path, 'r') as file:
+                state.update(_json.load(file))
+            for table in _empty_state():
+                state[table] = {int(cell): label for cell, label in state[table].items()}
+        for journal in (path + '.journal.1', path + '.journal'):
+            for record in _read_records(journal):
+                if record['seq'] > state['seq']:
+                    _apply(state, record)
+                    state['seq'] = record['seq']
+        return state
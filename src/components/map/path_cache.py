@@ -0,0 +1,108 @@
+from collections import OrderedDict as _OrderedDict
+from typing import Optional as _Optional
+
+from . import pathfinding as _pathfinding
+
+
+class PathCache:
+    """
+    A least recently used cache of path query results keyed by (start, goal, profile).
+
+    Every cached path is indexed by the cells it crosses, so a change to one cell drops only the paths
+    through that cell. Queries without a path are cached as None and dropped whenever any cell becomes
+    enterable, since that may connect them. A cell becoming enterable can also shorten paths that do not
+    cross it: given the grid width, a path is dropped then unless the straight-line detour through the
+    opened cell is already no cheaper than it, so the paths served stay shortest.
+
+    Keys start with the (start, goal) cell indices.
+
+    Args:
+        capacity (int): The most results kept.
+        width (int): The number of files in the grid. Without it, paths that a cell becoming enterable
+            could shorten are kept.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that were not.
+        invalidated (int): Results dropped because a cell changed.
+    """
+
+    def __init__(self, capacity: int = 1024, width: _Optional[int] = None):
+        self.capacity = capacity
+        self.width = width
+        self._entries = _OrderedDict()
+        self._costs = {}
+        self._by_cell = {}
+        self._unreachable = set()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        """Returns (True, path) for a cached key, where path may be None, or (False, None) on a miss."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, path):
+        """Caches the result of a query; `path` is a sequence of cell indices or None."""
+        if key in self._entries:
+            self._remove(key)
+        path = tuple(path) if path is not None else None
+        self._entries[key] = path
+        if path is None:
+            self._unreachable.add(key)
+        else:
+            for cell in path:
+                self._by_cell.setdefault(cell, set()).add(key)
+            if self.width is not None:
+                self._costs[key] = sum(_pathfinding.step_cost(a, b, self.width) for a, b in zip(path, path[1:]))
+        while len(self._entries) > self.capacity:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        path = self._entries.pop(key)
+        self._costs.pop(key, None)
+        if path is None:
+            self._unreachable.discard(key)
+            return
+        for cell in path:
+            keys = self._by_cell.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_cell[cell]
+
+    def invalidate(self, cell: int, opened: bool = False):
+        """Drops the paths crossing a changed cell, and with `opened`, for a cell that became enterable,
+        every cached unreachable result and every path a detour through the cell could shorten as well."""
+        keys = set(self._by_cell.get(cell, ()))
+        if opened:
+            keys |= self._unreachable
+            width = self.width
+            for key, cost in self._costs.items():
+                if _pathfinding.octile(key[0], cell, width) + _pathfinding.octile(cell, key[1], width) < cost - 1e-9:
+                    keys.add(key)
+        for key in keys:
+            self._remove(key)
+        self.invalidated += len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._costs.clear()
+        self._by_cell.clear()
+        self._unreachable.clear()
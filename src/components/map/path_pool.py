@@ -0,0 +1,80 @@
+import atexit as _atexit
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from multiprocessing import shared_memory as _shared_memory
+from typing import Sequence as _Sequence
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .adjacency import AdjacencyGraph as _AdjacencyGraph
+from .tiling import _attach
+
+# The graph and walkable column of a PathPool worker, set up once per process by _init_worker.
+_worker = {}
+
+
+def _init_worker(specs, height, width):
+    blocks, (offsets, indices, walkable) = _attach(specs)
+    graph = _AdjacencyGraph.from_arrays(height, width, offsets, indices)
+    graph.lists()
+    _worker.update(blocks=blocks, graph=graph, walkable=walkable)
+
+
+def _search_chunk(batch, strategy):
+    return _pathfinding.search_batch(_worker['graph'], _worker['walkable'], batch, strategy)
+
+
+class PathPool:
+    """
+    Worker processes that answer batches of path queries over one grid.
+
+    The adjacency arrays and the walkable column are placed in shared memory once, and every worker
+    attaches to them and builds its adjacency lists when it starts, so a batch only sends the pairs to
+    search. The walkable column is copied in again before every batch.
+
+    Args:
+        graph (AdjacencyGraph): The grid's adjacency; it must not change while the pool is open.
+        walkable (ndarray): Whether each cell can be entered.
+        workers (int): The number of worker processes.
+    """
+
+    def __init__(self, graph: _AdjacencyGraph, walkable: _np.ndarray, workers: int):
+        self.walkable = walkable
+        self.workers = workers
+        self._blocks = []
+        specs, views = [], []
+        for array in (graph.offsets, graph.indices, walkable):
+            block = _shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._blocks.append(block)
+            view = _np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            view[...] = array
+            views.append(view)
+            specs.append((block.name, array.shape, array.dtype.str))
+        self._walkable = views[-1]
+        self._executor = _ProcessPoolExecutor(workers, initializer=_init_worker,
+                                              initargs=(specs, graph.height, graph.width))
+        _atexit.register(self.close)
+
+    def map(self, pairs: _Sequence[tuple], strategy: str = 'astar'):
+        """Searches every (start, goal) pair of cell indices and returns the paths in order."""
+        self._walkable[...] = self.walkable
+        # Interleaved chunks, a few per worker, spread long and short searches evenly.
+        count = min(self.workers * 4, len(pairs))
+        chunks = [pairs[i::count] for i in range(count)]
+        futures = [self._executor.submit(_search_chunk, chunk, strategy) for chunk in chunks]
+        paths = [None] * len(pairs)
+        for i, future in enumerate(futures):
+            paths[i::count] = future.result()
+        return paths
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        if self._executor is None:
+            return
+        self._executor.shutdown()
+        self._executor = None
+        self._walkable = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        _atexit.unregister(self.close)
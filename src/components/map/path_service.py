@@ -0,0 +1,107 @@
+import atexit as _atexit
+import logging as _logging
+import queue as _queue
+import threading as _threading
+from concurrent.futures import Future as _Future, InvalidStateError as _InvalidStateError
+from typing import Callable as _Callable, Optional as _Optional
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .adjacency import AdjacencyGraph as _AdjacencyGraph
+
+_logging.basicConfig(level=_logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class PathService:
+    """
+    Answers path queries on a background thread so a long search never holds up the frame.
+
+    Each request carries a read-only snapshot of the walkable bitmap taken when it was submitted, so the
+    game can keep changing the grid while the worker searches. A request returns a Future. Cancelling it,
+    e.g. when the player clicks somewhere else, drops it from the queue, and a search already under way
+    notices within a thousand or so expansions and gives up.
+
+    Args:
+        graph (AdjacencyGraph): The grid's adjacency; read only.
+        walkable (ndarray): Whether each cell can be entered; snapshotted on every submit.
+        label (callable): Maps each cell index of a found path, e.g. to its designation. Paths are
+            returned as cell indices if omitted.
+    """
+
+    def __init__(self, graph: _AdjacencyGraph, walkable: _np.ndarray, label: _Optional[_Callable[[int], object]] = None):
+        self.graph = graph
+        self.walkable = walkable
+        self.label = label
+        self.completed = 0
+        self.cancelled = 0
+        self._requests = _queue.Queue()
+        self._closing = False
+        self._current = None
+        self._thread = _threading.Thread(target=self._run, name='PathService', daemon=True)
+        self._thread.start()
+        _atexit.register(self.close)
+
+    def submit(self, start: int, goal: int, strategy: str = 'astar'):
+        """Queues a search between two cell indices and returns a Future of the path, or of None if
+        there is none. The start and goal are always enterable, as in Grid.get_path."""
+        if strategy not in _pathfinding.SEARCHES:
+            raise ValueError(f'Unknown path strategy {strategy!r} for a PathService, expected one of {list(_pathfinding.SEARCHES)}')
+        future = _Future()
+        if self._closing:
+            future.cancel()
+            return future
+        self._requests.put((future, self.walkable.tobytes(), start, goal, strategy))
+        return future
+
+    def _run(self):
+        # Builds the adjacency lists here rather than on the caller's thread if no search has yet.
+        self.graph.lists()
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            future, snapshot, start, goal, strategy = request
+            self._current = future
+            # The future stays pending while it is searched so that the caller can still cancel it.
+            if future.cancelled():
+                self.cancelled += 1
+                continue
+            bitmap = bytearray(snapshot)
+            bitmap[start] = 1
+            bitmap[goal] = 1
+            try:
+                path = _pathfinding.SEARCHES[strategy](self.graph, bitmap, start, goal, cancelled=future.cancelled)
+                if path is not None and self.label is not None:
+                    path = [self.label(index) for index in path]
+            except Exception as e:
+                _logging.warning(f'Path search from {start} to {goal} failed: {e}')
+                try:
+                    future.set_exception(e)
+                except _InvalidStateError:
+                    pass
+                continue
+            try:
+                future.set_result(path)
+                self.completed += 1
+            except _InvalidStateError:
+                # Cancelled while searching.
+                self.cancelled += 1
+
+    def close(self):
+        """Cancels the queued and running requests and stops the worker."""
+        if self._closing:
+            return
+        self._closing = True
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except _queue.Empty:
+                break
+            if request is not None:
+                request[0].cancel()
+        if self._current is not None:
+            self._current.cancel()
+        self._requests.put(None)
+        self._thread.join()
+        _atexit.unregister(self.close)
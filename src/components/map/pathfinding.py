@@ -0,0 +1,250 @@
+import heapq as _heapq
+import math as _math
+from typing import Callable as _Callable, Optional as _Optional
+
+from .adjacency import AdjacencyGraph as _AdjacencyGraph
+
+# The cost of a diagonal step; straight steps cost 1.
+DIAGONAL = _math.sqrt(2)
+_OCTILE_SLACK = DIAGONAL - 2
+
+
+def octile(a: int, b: int, width: int):
+    """The octile distance in steps between two cell indices of a grid `width` files wide, exact on an
+    8-connected grid without obstacles."""
+    ra, fa = divmod(a, width)
+    rb, fb = divmod(b, width)
+    dr = abs(ra - rb)
+    df = abs(fa - fb)
+    return dr + df + _OCTILE_SLACK * (dr if dr < df else df)
+
+
+def step_cost(a: int, b: int, width: int):
+    """The cost of the step between two adjacent cell indices."""
+    delta = b - a
+    return 1.0 if delta in (1, -1, width, -width) else DIAGONAL
+
+
+def walkable_bitmap(walkable, start: int, goal: int):
+    """Returns a bitmap of the cells a search may enter, as bytes indexed by cell index. The start
+    and goal are always enterable, so a path can lead to an occupied cell such as another actor's."""
+    bitmap = bytearray(walkable.tobytes())
+    bitmap[start] = 1
+    bitmap[goal] = 1
+    return bitmap
+
+
+def reconstruct(parent, start: int, goal: int):
+    """Follows the parent links from the goal back to the start and returns the path start first."""
+    path = [goal]
+    node = goal
+    while node != start:
+        node = parent[node]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+# Searches poll their `cancelled` callback once per this many expansions.
+_CANCEL_CHECK = 1024
+
+
+def astar(graph: _AdjacencyGraph, bitmap, start: int, goal: int, stats: _Optional[dict] = None,
+          cancelled: _Optional[_Callable[[], bool]] = None):
+    """Finds a shortest path of cell indices from `start` to `goal`, both included, through the cells
+    marked in `bitmap`. Returns None if there is none.
+
+    Nodes are expanded once, guarded by a closed set, in order of cost plus the octile heuristic. Ties
+    go to the node nearer the goal, which cuts the expansions across open ground. `stats`, if given,
+    receives the number of nodes expanded. The search gives up and returns None once `cancelled`, if
+    given, returns True."""
+    width = graph.width
+    offsets, indices = graph.lists()
+    goal_rank, goal_file = divmod(goal, width)
+    size = len(offsets) - 1
+    cost = [_math.inf] * size
+    parent = [-1] * size
+    closed = bytearray(size)
+    cost[start] = 0.0
+    start_rank, start_file = divmod(start, width)
+    dr, df = abs(start_rank - goal_rank), abs(start_file - goal_file)
+    h = dr + df + _OCTILE_SLACK * (dr if dr < df else df)
+    frontier = [(h, h, start)]
+    expanded = 0
+    path = None
+    while frontier:
+        _, _, current = _heapq.heappop(frontier)
+        if closed[current]:
+            continue
+        closed[current] = 1
+        expanded += 1
+        if current == goal:
+            path = reconstruct(parent, start, goal)
+            break
+        if cancelled is not None and not expanded % _CANCEL_CHECK and cancelled():
+            break
+        base = cost[current]
+        for neighbor in indices[offsets[current]:offsets[current + 1]]:
+            if closed[neighbor] or not bitmap[neighbor]:
+                continue
+            delta = neighbor - current
+            g = base + (1.0 if delta == 1 or delta == -1 or delta == width or delta == -width else DIAGONAL)
+            if g < cost[neighbor]:
+                cost[neighbor] = g
+                parent[neighbor] = current
+                rank, file = divmod(neighbor, width)
+                dr = rank - goal_rank if rank > goal_rank else goal_rank - rank
+                df = file - goal_file if file > goal_file else goal_file - file
+                h = dr + df + _OCTILE_SLACK * (dr if dr < df else df)
+                _heapq.heappush(frontier, (g + h, h, neighbor))
+    if stats is not None:
+        stats['expanded'] = expanded
+    return path
+
+
+def _padded(bitmap, height: int, width: int):
+    """Copies a bitmap into one with a closed border cell on every side, so moves need no bounds checks.
+    A cell's padded index is (rank + 1) * (width + 2) + file + 1."""
+    stride = width + 2
+    padded = bytearray(stride * (height + 2))
+    for rank in range(height):
+        row = (rank + 1) * stride + 1
+        padded[row:row + width] = bitmap[rank * width:(rank + 1) * width]
+    return padded
+
+
+def jps(graph: _AdjacencyGraph, bitmap, start: int, goal: int, stats: _Optional[dict] = None,
+        cancelled: _Optional[_Callable[[], bool]] = None):
+    """Finds a shortest path of cell indices from `start` to `goal` like astar, by Jump Point Search.
+
+    With uniform step costs most cells lie on a straight or diagonal run that A* would push through the
+    heap one by one. JPS instead scans along those runs and only queues the jump points where a forced
+    neighbour appears, so the heap holds a handful of nodes even on open ground. Diagonal steps may cut
+    corners, matching the 8-neighbour adjacency, so the paths cost the same as astar's. `stats` and
+    `cancelled` are as for astar; `stats` counts jump points."""
+    width, height = graph.width, graph.height
+    stride = width + 2
+    passable = _padded(bitmap, height, width)
+    origin = (start // width + 1) * stride + start % width + 1
+    target = (goal // width + 1) * stride + goal % width + 1
+    goal_rank, goal_file = divmod(target, stride)
+
+    def scan(node, step, side):
+        # Runs straight from node until blocked (-1), at the goal, or beside a forced neighbour.
+        while True:
+            node += step
+            if not passable[node]:
+                return -1
+            if node == target:
+                return node
+            if (not passable[node + side] and passable[node + side + step]) or \
+                    (not passable[node - side] and passable[node - side + step]):
+                return node
+
+    def jump(node, dr, df):
+        if not (dr and df):
+            return scan(node, dr * stride + df, 1 if dr else stride)
+        step, rank_step = dr * stride + df, dr * stride
+        while True:
+            node += step
+            if not passable[node]:
+                return -1
+            if node == target:
+                return node
+            if (not passable[node - df] and passable[node - df + rank_step]) or \
+                    (not passable[node - rank_step] and passable[node - rank_step + df]):
+                return node
+            if scan(node, df, stride) >= 0 or scan(node, rank_step, 1) >= 0:
+                return node
+
+    cost = {origin: 0.0}
+    parent = {}
+    closed = set()
+    h = octile(origin, target, stride)
+    frontier = [(h, h, origin)]
+    expanded = 0
+    path = None
+    while frontier:
+        _, _, current = _heapq.heappop(frontier)
+        if current in closed:
+            continue
+        closed.add(current)
+        expanded += 1
+        if current == target:
+            path = reconstruct(parent, origin, target)
+            break
+        if cancelled is not None and not expanded % _CANCEL_CHECK and cancelled():
+            break
+        if current == origin:
+            directions = [(dr, df) for dr in (-1, 0, 1) for df in (-1, 0, 1) if dr or df]
+        else:
+            rank, file = divmod(current, stride)
+            prev_rank, prev_file = divmod(parent[current], stride)
+            dr = (rank > prev_rank) - (rank < prev_rank)
+            df = (file > prev_file) - (file < prev_file)
+            if dr and df:
+                directions = [(dr, df), (dr, 0), (0, df)]
+                if not passable[current - df]:
+                    directions.append((dr, -df))
+                if not passable[current - dr * stride]:
+                    directions.append((-dr, df))
+            elif dr:
+                directions = [(dr, 0)]
+                if not passable[current + 1]:
+                    directions.append((dr, 1))
+                if not passable[current - 1]:
+                    directions.append((dr, -1))
+            else:
+                directions = [(0, df)]
+                if not passable[current + stride]:
+                    directions.append((1, df))
+                if not passable[current - stride]:
+                    directions.append((-1, df))
+        base = cost[current]
+        for dr, df in directions:
+            point = jump(current, dr, df)
+            if point < 0 or point in closed:
+                continue
+            g = base + octile(current, point, stride)
+            if g < cost.get(point, _math.inf):
+                cost[point] = g
+                parent[point] = current
+                rank, file = divmod(point, stride)
+                dr = rank - goal_rank if rank > goal_rank else goal_rank - rank
+                df = file - goal_file if file > goal_file else goal_file - file
+                h = dr + df + _OCTILE_SLACK * (dr if dr < df else df)
+                _heapq.heappush(frontier, (g + h, h, point))
+    if stats is not None:
+        stats['expanded'] = expanded
+    if path is None:
+        return None
+    # Fill in the straight and diagonal runs between jump points and drop the padding.
+    cells = [path[0]]
+    for a, b in zip(path, path[1:]):
+        (ra, fa), (rb, fb) = divmod(a, stride), divmod(b, stride)
+        step = ((rb > ra) - (rb < ra)) * stride + (fb > fa) - (fb < fa)
+        while a != b:
+            a += step
+            cells.append(a)
+    return [(node // stride - 1) * width + node % stride - 1 for node in cells]
+
+
+# The searches that need nothing but the graph and a bitmap, by strategy name.
+SEARCHES = {
+    'astar': astar,
+    'jps': jps,
+}
+
+
+def search_batch(graph: _AdjacencyGraph, walkable, batch, strategy: str = 'astar'):
+    """Runs one search per (start, goal) pair of `batch` over the walkable column and returns the paths
+    in order. The start and goal of each search are always enterable, as in Grid.get_path."""
+    search = SEARCHES[strategy]
+    bitmap = bytearray(walkable.tobytes())
+    paths = []
+    for start, goal in batch:
+        saved = bitmap[start], bitmap[goal]
+        bitmap[start] = bitmap[goal] = 1
+        paths.append(search(graph, bitmap, start, goal))
+        bitmap[start], bitmap[goal] = saved
+    return paths
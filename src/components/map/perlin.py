@@ -0,0 +1,93 @@
+import numpy as _np
+
+# Gradient directions for 2D Perlin noise, selected by the low three bits of the lattice hash.
+_GRAD_X = _np.array([1.0, -1.0, 1.0, -1.0, 1.0, -1.0, 0.0, 0.0], dtype=_np.float32)
+_GRAD_Y = _np.array([1.0, 1.0, -1.0, -1.0, 0.0, 0.0, 1.0, -1.0], dtype=_np.float32)
+
+# Octaves whose share of the total amplitude falls below float32 resolution cannot change the field.
+_MIN_AMPLITUDE = 2.0 ** -24
+
+
+def permutation_table(base: int = 0):
+    """Returns the doubled 512 entry lattice permutation for the given base."""
+    perm = _np.random.default_rng(base).permutation(256)
+    return _np.concatenate([perm, perm]).astype(_np.intp)
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+
+def _lattice(coords):
+    cell = _np.floor(coords)
+    return cell.astype(_np.intp) & 255, (coords - cell).astype(_np.float32)
+
+
+def perlin(xs, ys, perm, grad_x=None, grad_y=None):
+    """Evaluates Perlin noise on the lattice spanned by the column coordinates `xs` and the row
+    coordinates `ys`, returning an array of shape (len(ys), len(xs)).
+
+    `grad_x` and `grad_y` are the gradient components already gathered through `perm`; they are
+    derived from it when omitted."""
+    if grad_x is None or grad_y is None:
+        grad_x, grad_y = _GRAD_X[perm & 7], _GRAD_Y[perm & 7]
+    xi, xf = _lattice(_np.asarray(xs, dtype=_np.float64))
+    yi, yf = _lattice(_np.asarray(ys, dtype=_np.float64))
+    u = _fade(xf)[None, :]
+    v = _fade(yf)[:, None]
+    x0 = xf[None, :]
+    x1 = x0 - 1.0
+    y0 = yf[:, None]
+    y1 = y0 - 1.0
+    # Corner hashes: a for the left column of the lattice cell, b for the right one.
+    a = perm[xi][None, :] + yi[:, None]
+    b = perm[xi + 1][None, :] + yi[:, None]
+    n00 = grad_x[a] * x0 + grad_y[a] * y0
+    n10 = grad_x[b] * x1 + grad_y[b] * y0
+    a += 1
+    b += 1
+    n01 = grad_x[a] * x0 + grad_y[a] * y1
+    n11 = grad_x[b] * x1 + grad_y[b] * y1
+    # Interpolate in place along x, then along y.
+    n10 -= n00
+    n10 *= u
+    n00 += n10
+    n11 -= n01
+    n11 *= u
+    n01 += n11
+    n01 -= n00
+    n01 *= v
+    n00 += n01
+    return n00
+
+
+def fbm(xs, ys, octaves: int = 1, persistence: float = 0.5, lacunarity: float = 2.0, base: int = 0):
+    """Sums `octaves` layers of Perlin noise over the lattice spanned by `xs` and `ys`, scaled the
+    same way as `noise.pnoise2`."""
+    perm = permutation_table(base)
+    grad_x, grad_y = _GRAD_X[perm & 7], _GRAD_Y[perm & 7]
+    xs = _np.asarray(xs, dtype=_np.float64)
+    ys = _np.asarray(ys, dtype=_np.float64)
+    total = _np.zeros((len(ys), len(xs)), dtype=_np.float32)
+    frequency = 1.0
+    amplitude = 1.0
+    max_amplitude = 0.0
+    for _ in range(max(octaves, 1)):
+        if max_amplitude and amplitude / max_amplitude < _MIN_AMPLITUDE:
+            break
+        layer = perlin(xs * frequency, ys * frequency, perm, grad_x, grad_y)
+        layer *= amplitude
+        total += layer
+        max_amplitude += amplitude
+        frequency *= lacunarity
+        amplitude *= persistence
+    return total / max_amplitude
+
+
+def fbm_field(height: int, width: int, scale: float, octaves: int, base: int = 0, row_offset: int = 0,
+              col_offset: int = 0):
+    """Returns the fBm height field for a `height` x `width` block of cells, where cell (r, f) samples
+    the noise at (f / scale, r / scale). The offsets place the block inside a larger map."""
+    xs = _np.arange(col_offset, col_offset + width) / scale
+    ys = _np.arange(row_offset, row_offset + height) / scale
+    return fbm(xs, ys, octaves, base=base)
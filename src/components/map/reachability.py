@@ -0,0 +1,89 @@
+import heapq as _heapq
+
+import numpy as _np
+
+from . import pathfinding as _pathfinding
+from .adjacency import AdjacencyGraph as _AdjacencyGraph
+
+
+class Reachable:
+    """
+    The cells an actor can reach from a start within a budget of steps, found by one bounded search,
+    together with the cheapest way to each of them. Every step costs one movement, diagonal or not, and
+    among paths of equally many steps the shortest is kept.
+
+    Args:
+        start (int): The cell index searched from.
+        budget (int): The most steps taken.
+        indices (ndarray): The reachable cell indices in ascending order, the start included.
+        costs (ndarray): The steps to each reachable cell.
+        predecessors (ndarray): The cell index before each reachable cell on its path, or -1 for the start.
+    """
+
+    def __init__(self, start: int, budget: int, indices: _np.ndarray, costs: _np.ndarray, predecessors: _np.ndarray):
+        self.start = start
+        self.budget = budget
+        self.indices = indices
+        self.costs = costs
+        self.predecessors = predecessors
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __contains__(self, index):
+        return self._position(index) >= 0
+
+    def _position(self, index):
+        position = int(_np.searchsorted(self.indices, index))
+        return position if position < len(self.indices) and self.indices[position] == index else -1
+
+    def cost_to(self, index: int):
+        """Returns the steps to a cell, or None if it is out of reach."""
+        position = self._position(index)
+        return int(self.costs[position]) if position >= 0 else None
+
+    def path_to(self, index: int):
+        """Returns the cell indices from the start to a cell, both included, or None if it is out of reach."""
+        if self._position(index) < 0:
+            return None
+        path = [index]
+        while index != self.start:
+            index = int(self.predecessors[self._position(index)])
+            path.append(index)
+        path.reverse()
+        return path
+
+    def within(self, budget: int):
+        """Returns the reachable cell indices at most `budget` steps away."""
+        return self.indices[self.costs <= budget]
+
+
+def reachable(graph: _AdjacencyGraph, bitmap, start: int, budget: int):
+    """Searches outwards from `start` over the cells enterable in `bitmap` (any sequence of 0/1 by cell
+    index) for at most `budget` steps, and returns the Reachable cells. The start itself is always
+    included."""
+    offsets, indices = graph.lists()
+    width = graph.width
+    # Costs are (steps, length) so that of two equally long moves the straighter one is kept.
+    best = {start: (0, 0.0)}
+    came_from = {start: -1}
+    frontier = [(0, 0.0, start)]
+    while frontier:
+        steps, length, current = _heapq.heappop(frontier)
+        if (steps, length) > best[current] or steps == budget:
+            continue
+        for neighbor in indices[offsets[current]:offsets[current + 1]]:
+            if not bitmap[neighbor]:
+                continue
+            delta = neighbor - current
+            candidate = (steps + 1, length + (1.0 if delta == 1 or delta == -1 or delta == width or delta == -width
+                                              else _pathfinding.DIAGONAL))
+            if candidate < best.get(neighbor, (budget + 1, 0.0)):
+                best[neighbor] = candidate
+                came_from[neighbor] = current
+                _heapq.heappush(frontier, (candidate[0], candidate[1], neighbor))
+    cells = _np.fromiter(best, dtype=_np.int64, count=len(best))
+    order = _np.argsort(cells)
+    costs = _np.fromiter((cost[0] for cost in best.values()), dtype=_np.int32, count=len(best))
+    predecessors = _np.fromiter(came_from.values(), dtype=_np.int64, count=len(came_from))
+    return Reachable(start, budget, cells[order], costs[order], predecessors[order])
@@ -0,0 +1,158 @@
+import numpy as _np
+
+# Rank and file offsets of the eight neighbours around a cell, in ring order Nw, N, Ne, E, Se, S, Sw, W.
+_RING = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+
+def _links(open_cells: _np.ndarray):
+    """Returns the (a, b) cell index pairs of every link between two open cells of a 2D mask, taking
+    each of the eight directions once."""
+    height, width = open_cells.shape
+    index = _np.arange(height * width).reshape(height, width)
+    firsts, seconds = [], []
+    for (a_ranks, a_files), (b_ranks, b_files) in (
+            # East, south, south-east and south-west.
+            ((slice(None), slice(None, -1)), (slice(None), slice(1, None))),
+            ((slice(None, -1), slice(None)), (slice(1, None), slice(None))),
+            ((slice(None, -1), slice(None, -1)), (slice(1, None), slice(1, None))),
+            ((slice(None, -1), slice(1, None)), (slice(1, None), slice(None, -1))),
+    ):
+        both = open_cells[a_ranks, a_files] & open_cells[b_ranks, b_files]
+        firsts.append(index[a_ranks, a_files][both])
+        seconds.append(index[b_ranks, b_files][both])
+    return _np.concatenate(firsts), _np.concatenate(seconds)
+
+
+def label_regions(passable: _np.ndarray, height: int, width: int):
+    """Labels the 8-connected regions of passable cells. Returns an int32 array indexed by cell index
+    holding each cell's region, numbered from 0, or -1 for impassable cells.
+
+    A vectorized union-find: every round hooks the root of each linked pair onto the smaller root, then
+    compresses the parent pointers by pointer jumping, until no link joins two roots."""
+    open_cells = _np.asarray(passable, dtype=bool).reshape(height, width)
+    a, b = _links(open_cells)
+    parent = _np.arange(height * width)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        split = root_a != root_b
+        if not split.any():
+            break
+        low = _np.minimum(root_a[split], root_b[split])
+        high = _np.maximum(root_a[split], root_b[split])
+        _np.minimum.at(parent, high, low)
+        while True:
+            jumped = parent[parent]
+            if _np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        a, b = a[split], b[split]
+    labels = _np.full(height * width, -1, dtype=_np.int32)
+    passable_cells = open_cells.ravel()
+    _, labels[passable_cells] = _np.unique(parent[passable_cells], return_inverse=True)
+    return labels
+
+
+class RegionIndex:
+    """
+    The connected regions of passable cells, kept up to date as cells open and close, so that a path
+    query between two regions can be rejected without a search.
+
+    Opening a cell merges the regions around it. Closing one can only split its region if the open cells
+    around it fall apart into separate groups, and only then is that region labelled again.
+
+    Args:
+        passable (ndarray): Whether each cell can be crossed; read again on every update.
+        height (int): The number of ranks in the grid.
+        width (int): The number of files in the grid.
+        labels (ndarray): Labels from label_regions to start from; computed if omitted.
+
+    Attributes:
+        labels (ndarray): The region of each cell, or -1 for impassable cells.
+    """
+
+    def __init__(self, passable: _np.ndarray, height: int, width: int, labels: _np.ndarray = None):
+        self.passable = passable
+        self.height = height
+        self.width = width
+        self.labels = _np.array(labels, dtype=_np.int32) if labels is not None \
+            else label_regions(passable, height, width)
+        self._next_label = int(self.labels.max()) + 1
+
+    def label_of(self, index: int):
+        return int(self.labels[index])
+
+    def connected(self, a: int, b: int):
+        """Checks whether two cells are passable and in the same region, i.e. a path joins them."""
+        label = self.labels[a]
+        return label >= 0 and label == self.labels[b]
+
+    def cells(self, label: int):
+        """Returns the cell indices of a region."""
+        return _np.flatnonzero(self.labels == label)
+
+    def largest(self):
+        """Returns the label of the region with the most cells, or -1 if nothing is passable."""
+        counts = _np.bincount(self.labels[self.labels >= 0])
+        return int(counts.argmax()) if len(counts) else -1
+
+    def _ring(self, index):
+        rank, file = divmod(index, self.width)
+        ring = []
+        for dr, df in _RING:
+            r, f = rank + dr, file + df
+            if 0 <= r < self.height and 0 <= f < self.width:
+                ring.append(r * self.width + f)
+            else:
+                ring.append(-1)
+        return ring
+
+    def update(self, index: int):
+        """Brings a cell's region up to date after its passability changed."""
+        if self.passable[index] and self.labels[index] < 0:
+            self._open(index)
+        elif not self.passable[index] and self.labels[index] >= 0:
+            self._close(index)
+
+    def _open(self, index):
+        around = {int(self.labels[n]) for n in self._ring(index) if n >= 0 and self.labels[n] >= 0}
+        if not around:
+            self.labels[index] = self._next_label
+            self._next_label += 1
+            return
+        keep = min(around)
+        if len(around) > 1:
+            self.labels[_np.isin(self.labels, list(around - {keep}))] = keep
+        self.labels[index] = keep
+
+    def _close(self, index):
+        label = int(self.labels[index])
+        self.labels[index] = -1
+        ring = self._ring(index)
+        open_ = [n >= 0 and self.labels[n] >= 0 for n in ring]
+        if self._ring_groups(open_) <= 1:
+            return
+        members = self.labels == label
+        sub = label_regions(members, self.height, self.width)
+        # The largest piece keeps the label and the others get new ones.
+        pieces = _np.bincount(sub[members])
+        keep = int(pieces.argmax())
+        relabel = _np.arange(len(pieces)) - (_np.arange(len(pieces)) > keep) + self._next_label
+        relabel[keep] = label
+        self.labels[members] = relabel[sub[members]]
+        self._next_label += len(pieces) - 1
+
+    @staticmethod
+    def _ring_groups(open_):
+        # Neighbours next to each other in the ring touch, and so do the orthogonal ones a quarter turn
+        # apart, N-E, E-S, S-W and W-N, which are diagonal to each other.
+        parent = list(range(8))
+
+        def find(i):
+            while parent[i] != i:
+                i = parent[i]
+            return i
+        pairs = [(i, (i + 1) % 8) for i in range(8)] + [(1, 3), (3, 5), (5, 7), (7, 1)]
+        for i, j in pairs:
+            if open_[i] and open_[j]:
+                parent[find(i)] = find(j)
+        return len({find(i) for i in range(8) if open_[i]})
@@ -0,0 +1,44 @@
+import numpy as _np
+
+
+def cells_at(xs, ys, cell_size: int, height: int, width: int):
+    """Returns the cell index under each (x, y) point of a `height` x `width` grid of `cell_size` cells,
+    or -1 for points off the grid."""
+    xs = _np.asarray(xs)
+    ys = _np.asarray(ys)
+    ranks = _np.floor_divide(ys, cell_size).astype(_np.int64)
+    files = _np.floor_divide(xs, cell_size).astype(_np.int64)
+    inside = (ranks >= 0) & (ranks < height) & (files >= 0) & (files < width)
+    return _np.where(inside, ranks * width + files, -1)
+
+
+def rect_indices(left: float, top: float, right: float, bottom: float, cell_size: int, height: int, width: int):
+    """Returns the indices, in cell index order, of the cells overlapping the rectangle spanning x in
+    [left, right] and y in [top, bottom]."""
+    left, right = min(left, right), max(left, right)
+    top, bottom = min(top, bottom), max(top, bottom)
+    r0 = max(int(top // cell_size), 0)
+    r1 = min(int(bottom // cell_size) + 1, height)
+    f0 = max(int(left // cell_size), 0)
+    f1 = min(int(right // cell_size) + 1, width)
+    if r0 >= r1 or f0 >= f1:
+        return _np.empty(0, dtype=_np.int64)
+    return (_np.arange(r0, r1)[:, None] * width + _np.arange(f0, f1)).ravel()
+
+
+def points_in_polygon(xs, ys, polygon):
+    """Returns a mask of the (x, y) points inside a polygon given as a sequence of (x, y) vertices,
+    by the even-odd rule."""
+    xs = _np.asarray(xs, dtype=_np.float64)
+    ys = _np.asarray(ys, dtype=_np.float64)
+    vertices = _np.asarray(polygon, dtype=_np.float64)
+    inside = _np.zeros(xs.shape, dtype=bool)
+    x0, y0 = vertices[-1]
+    for x1, y1 in vertices:
+        # Toggle every point whose rightward ray crosses the edge (x0, y0)-(x1, y1).
+        crosses = (y1 > ys) != (y0 > ys)
+        with _np.errstate(divide='ignore', invalid='ignore'):
+            at = x1 + (ys - y1) * (x0 - x1) / (y0 - y1)
+        inside ^= crosses & (xs < at)
+        x0, y0 = x1, y1
+    return inside
@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from multiprocessing import shared_memory as _shared_memory
+from typing import Callable as _Callable, Optional as _Optional, Sequence as _Sequence
+
+import numpy as _np
+
+
+def quadrant_tiles(height: int, width: int, span: int):
+    """Returns the (row start, row stop, file start, file stop) bounds of the `span` x `span` cell tiles
+    covering a `height` x `width` map, in cell index order. The tiles at the bottom and right edges are
+    cut short by the map."""
+    return [(r, min(r + span, height), f, min(f + span, width))
+            for r in range(0, height, span) for f in range(0, width, span)]
+
+
+def _attach(specs):
+    blocks = [_shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    arrays = [_np.ndarray(shape, dtype=dtype, buffer=block.buf) for block, (_, shape, dtype) in zip(blocks, specs)]
+    return blocks, arrays
+
+
+def _call_shared(function, specs, tile, args):
+    blocks, arrays = _attach(specs)
+    try:
+        return function(*arrays, tile, *args)
+    finally:
+        del arrays
+        for block in blocks:
+            block.close()
+
+
+class TilePool:
+    """
+    Runs a function over the tiles of a map, in worker processes when more than one worker is asked for.
+
+    The arrays a function works on are copied into shared memory for the duration of a call to `map`,
+    so every worker reads and writes the same buffers, and are copied back once all tiles are done.
+    With one worker the tiles run in order in the calling process on the arrays themselves.
+
+    Args:
+        workers (int): The number of worker processes, or None or 1 to work in-process.
+    """
+
+    def __init__(self, workers: _Optional[int] = None):
+        self.workers = workers if workers is not None else 1
+        self._executor = _ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def map(self, function: _Callable, arrays: _Sequence[_np.ndarray], tiles: _Sequence[tuple], args: tuple = ()):
+        """Calls `function(*arrays, tile, *args)` for every tile and returns the results in tile order.
+        `function` must be importable by the workers, i.e. defined at module level."""
+        if self._executor is None:
+            return [function(*arrays, tile, *args) for tile in tiles]
+        blocks, specs, shared = [], [], []
+        try:
+            for array in arrays:
+                block = _shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                view = _np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                view[...] = array
+                shared.append(view)
+                specs.append((block.name, array.shape, array.dtype.str))
+            futures = [self._executor.submit(_call_shared, function, specs, tile, args) for tile in tiles]
+            results = [future.result() for future in futures]
+            for array, view in zip(arrays, shared):
+                array[...] = view
+            return results
+        finally:
+            view = None
+            del shared[:]
+            for block in blocks:
+                block.close()
+                block.unlink()
@@ -0,0 +1,83 @@
+# Plain reference searches and random maps for checking the pathfinding engines against.
+import heapq as _heapq
+import math as _math
+from collections import deque as _deque
+
+import numpy as _np
+
+from src.components.map import pathfinding as _pathfinding
+
+
+def random_map(seed, height=24, width=32, density=0.3):
+    """Returns a random passable column of a `height` x `width` map, about `density` of it blocked."""
+    rng = _np.random.default_rng(seed)
+    return rng.random(height * width) >= density
+
+
+def bitmap(passable):
+    return bytearray(_np.asarray(passable, dtype=_np.uint8).tobytes())
+
+
+def neighbors(index, height, width):
+    rank, file = divmod(index, width)
+    for dr in (-1, 0, 1):
+        for df in (-1, 0, 1):
+            r, f = rank + dr, file + df
+            if (dr or df) and 0 <= r < height and 0 <= f < width:
+                yield r * width + f
+
+
+def dijkstra(enterable, source, height, width, expandable=None):
+    """Returns the octile path cost from `source` to every cell, infinite where unreached. Only cells in
+    `enterable` are entered, and only cells in `expandable`, all entered cells if omitted, are left."""
+    expandable = enterable if expandable is None else expandable
+    cost = [_math.inf] * (height * width)
+    cost[source] = 0.0
+    frontier = [(0.0, source)]
+    while frontier:
+        base, current = _heapq.heappop(frontier)
+        if base > cost[current] or (current != source and not expandable[current]):
+            continue
+        for neighbor in neighbors(current, height, width):
+            if enterable[neighbor]:
+                g = base + _pathfinding.step_cost(current, neighbor, width)
+                if g < cost[neighbor] - 1e-12:
+                    cost[neighbor] = g
+                    _heapq.heappush(frontier, (g, neighbor))
+    return _np.array(cost)
+
+
+def bfs_steps(enterable, source, height, width):
+    """Returns the fewest 8-connected steps from `source` to every cell, -1 where unreached."""
+    steps = _np.full(height * width, -1)
+    steps[source] = 0
+    queue = _deque([source])
+    while queue:
+        current = queue.popleft()
+        for neighbor in neighbors(current, height, width):
+            if enterable[neighbor] and steps[neighbor] < 0:
+                steps[neighbor] = steps[current] + 1
+                queue.append(neighbor)
+    return steps
+
+
+def path_cost(path, width):
+    return sum(_pathfinding.step_cost(a, b, width) for a, b in zip(path, path[1:]))
+
+
+def is_valid_path(path, start, goal, enterable, width):
+    """Checks that a path runs from start to goal in single steps through enterable cells."""
+    if path[0] != start or path[-1] != goal:
+        return False
+    for a, b in zip(path, path[1:]):
+        (ra, fa), (rb, fb) = divmod(a, width), divmod(b, width)
+        if a == b or abs(ra - rb) > 1 or abs(fa - fb) > 1 or not enterable[b]:
+            return False
+    return True
+
+
+def random_pairs(passable, count, seed):
+    """Returns `count` random (start, goal) pairs of passable cells."""
+    rng = _np.random.default_rng(seed)
+    cells = _np.flatnonzero(passable)
+    return [tuple(int(cell) for cell in rng.choice(cells, 2)) for _ in range(count)]
@@ -0,0 +1,24 @@
+import numpy as _np
+
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+import reference as _reference
+
+
+def test_neighbors_match_the_eight_neighbourhood():
+    for height, width in ((1, 1), (1, 5), (6, 1), (7, 9)):
+        graph = _AdjacencyGraph(height, width)
+        offsets, indices = graph.lists()
+        for index in range(height * width):
+            expected = sorted(_reference.neighbors(index, height, width))
+            assert sorted(graph.neighbors(index).tolist()) == expected
+            assert sorted(indices[offsets[index]:offsets[index + 1]]) == expected
+            assert graph.degree(index) == len(expected)
+            assert all(graph.is_adjacent(index, neighbor) for neighbor in expected)
+            assert not graph.is_adjacent(index, index)
+
+
+def test_from_arrays_keeps_the_graph():
+    graph = _AdjacencyGraph(7, 9)
+    copy = _AdjacencyGraph.from_arrays(7, 9, graph.offsets.copy(), graph.indices.copy())
+    assert _np.array_equal(copy.offsets, graph.offsets) and _np.array_equal(copy.indices, graph.indices)
+    assert copy.is_adjacent(0, 10) and not copy.is_adjacent(0, 2)
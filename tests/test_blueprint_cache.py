@@ -0,0 +1,53 @@
+import os as _os
+
+import numpy as _np
+
+from src.components.map.blueprint_cache import BlueprintCache as _BlueprintCache
+from src.components.map.grid import Grid as _Grid
+
+_PARAMETERS = {'cell_size': 60, 'seed': 11}
+
+
+def test_miss_then_hit(tmp_path):
+    cache = _BlueprintCache(str(tmp_path))
+    generated = cache.load_or_generate(**_PARAMETERS)
+    assert len(cache._index) == 1
+    cached = cache.get(generated.parameters)
+    assert cached is not None
+    assert _np.array_equal(cached._terrain_int, generated._terrain_int)
+    assert _np.array_equal(cached._passable, generated._passable)
+    assert _BlueprintCache(str(tmp_path)).get(generated.parameters) is not None
+    assert cache.get(dict(generated.parameters, seed=12)) is None
+
+
+def test_changed_file_is_discarded(tmp_path):
+    cache = _BlueprintCache(str(tmp_path))
+    parameters = cache.load_or_generate(**_PARAMETERS).parameters
+    key = cache.key(parameters)
+    with open(cache._path(key), 'ab') as file:
+        file.write(b'\0')
+    assert cache.get(parameters) is None
+    assert key not in cache._index and not _os.path.exists(cache._path(key))
+
+
+def test_unseeded_worlds_are_not_cached(tmp_path):
+    cache = _BlueprintCache(str(tmp_path))
+    cache.load_or_generate(cell_size=60)
+    assert not cache._index and not _os.listdir(tmp_path)
+
+
+def test_unseeded_grid_keeps_no_journal(tmp_path):
+    grid = _Grid(cell_size=60, cache=_BlueprintCache(str(tmp_path)))
+    assert grid._journal is None
+    grid.get_cell(0).passable = False
+    grid.close()
+    assert not _os.listdir(tmp_path)
+
+
+def test_seeded_grids_keep_separate_journals(tmp_path):
+    cache = _BlueprintCache(str(tmp_path))
+    grids = [_Grid(cell_size=60, seed=seed, cache=cache) for seed in (1, 2)]
+    assert grids[0]._journal.path != grids[1]._journal.path
+    assert all(_os.path.dirname(grid._journal.path) == str(tmp_path) for grid in grids)
+    for grid in grids:
+        grid.close()
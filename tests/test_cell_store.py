@@ -0,0 +1,33 @@
+import numpy as _np
+
+from src.components.map.blueprint_cache import BlueprintCache as _BlueprintCache
+from src.components.map.cell_store import CellStore as _CellStore
+from src.components.map.grid import Grid as _Grid
+from src.components.map.grid_blueprint import GridBlueprint as _GridBlueprint
+
+
+def test_walkable_follows_occupancy_and_obstruction():
+    store = _CellStore(_GridBlueprint(cell_size=60, seed=4))
+    index = int(_np.flatnonzero(store.terrain_passable)[0])
+    store.occupy(index, 'Player')
+    assert store.passable[index] and not store.walkable[index]
+    store.obstruct(index, 'Wall')
+    store.vacate(index)
+    assert not store.passable[index] and not store.walkable[index]
+    store.destruct(index)
+    assert store.passable[index] and store.walkable[index]
+    assert store.occupant == {} and store.obstruction == {}
+
+
+def test_cached_grid_columns_are_writable(tmp_path):
+    cache = _BlueprintCache(str(tmp_path))
+    _Grid(cell_size=60, seed=4, cache=cache).close()
+    grid = _Grid(cell_size=60, seed=4, cache=cache)
+    assert isinstance(grid._blueprint._coordinates, _np.memmap)
+    cell = grid.get_cell(5)
+    cell.quadrant_index = 3
+    assert cell.quadrant_index == 3
+    cell._set_quadrant()
+    assert cell.quadrant_index == grid._blueprint._quadrant_index[5]
+    cell.passable = not cell.passable
+    grid.close()
@@ -0,0 +1,37 @@
+import numpy as _np
+import pytest
+
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.cooperative import CooperativePlanner as _CooperativePlanner
+import reference as _reference
+
+HEIGHT, WIDTH = 16, 20
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_team_paths_never_meet(seed):
+    rng = _np.random.default_rng(seed)
+    walkable = _reference.random_map(seed, HEIGHT, WIDTH, density=0.15)
+    cells = rng.choice(_np.flatnonzero(walkable), 12, replace=False).tolist()
+    moves = list(zip(cells[:6], cells[6:]))
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    planner = _CooperativePlanner(graph, walkable, window=8)
+    paths = planner.plan(moves)
+    enterable = walkable.copy()
+    enterable[cells] = True
+    # Actors without a path stay where they are.
+    positions = [path if path is not None else [start] for path, (start, _) in zip(paths, moves)]
+    for path, (start, goal) in zip(paths, moves):
+        if path is not None:
+            assert path[0] == start and path[-1] == goal
+            waits_removed = [cell for i, cell in enumerate(path) if i == 0 or cell != path[i - 1]]
+            assert waits_removed == [start] or _reference.is_valid_path(waits_removed, start, goal, enterable, WIDTH)
+    at = lambda path, step: path[min(step, len(path) - 1)]
+    # Reservations cover the cells at the first `window` steps and the moves between them.
+    for step in range(planner.window):
+        occupied = [at(path, step) for path in positions]
+        assert len(set(occupied)) == len(occupied)
+        if step == planner.window - 1:
+            break
+        moved = {(at(path, step), at(path, step + 1)) for path in positions if at(path, step) != at(path, step + 1)}
+        assert not any((b, a) in moved for a, b in moved)
@@ -0,0 +1,29 @@
+import pytest
+
+from src.components.map.designation import DesignationCodec as _DesignationCodec, file_names as _file_names, \
+    rank_names as _rank_names
+
+
+def test_codec_round_trip():
+    codec = _DesignationCodec(_rank_names(30), _file_names(40))
+    designations = codec.designations()
+    assert len(designations) == len(codec) == 1200 and len(set(designations)) == 1200
+    for index, designation in enumerate(designations):
+        assert codec.from_index(index) == designation
+        assert codec.to_index(designation) == index
+        rank_index, file_index = codec.decode(designation)
+        assert codec.encode(rank_index, file_index) == designation
+        assert codec.index(rank_index, file_index) == index == rank_index * 40 + file_index
+
+
+@pytest.mark.parametrize('designation', ['zz00001', 'a00041', 'a00000', 'a0001', 'a', '', 'aXXXXX'])
+def test_foreign_designations_raise_key_error(designation):
+    codec = _DesignationCodec(_rank_names(30), _file_names(40))
+    with pytest.raises(KeyError):
+        codec.decode(designation)
+
+
+def test_foreign_index_raises_key_error():
+    codec = _DesignationCodec(_rank_names(3), _file_names(4))
+    with pytest.raises(KeyError):
+        codec.from_index(12)
@@ -0,0 +1,40 @@
+import numpy as _np
+import pytest
+
+from src.components.map import pathfinding as _pathfinding
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.dstar_lite import DStarLite as _DStarLite
+import reference as _reference
+
+HEIGHT, WIDTH = 24, 32
+
+
+def _check(planner, graph, walkable):
+    bitmap = _pathfinding.walkable_bitmap(walkable, planner.start, planner.goal)
+    expected = _pathfinding.astar(graph, bitmap, planner.start, planner.goal)
+    path = planner.path()
+    assert (path is None) == (expected is None)
+    if path is not None:
+        assert _reference.is_valid_path(path, planner.start, planner.goal, bitmap, WIDTH)
+        assert _reference.path_cost(path, WIDTH) == pytest.approx(_reference.path_cost(expected, WIDTH))
+    return path
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_repaired_paths_stay_shortest(seed):
+    rng = _np.random.default_rng(seed)
+    walkable = _reference.random_map(seed, HEIGHT, WIDTH, density=0.2)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    start, goal = _reference.random_pairs(walkable, 1, seed)[0]
+    planner = _DStarLite(graph, walkable, start, goal)
+    for turn in range(12):
+        path = _check(planner, graph, walkable)
+        # Cells open and close in place, the actor steps along its path and the goal steps aside.
+        walkable[rng.integers(0, HEIGHT * WIDTH, 6)] ^= True
+        if path is not None and len(path) > 2:
+            planner.move_start(path[1])
+        if turn % 3 == 2:
+            neighbors = graph.neighbors(planner.goal)
+            planner.move_goal(int(rng.choice(neighbors)))
+        if turn == 7:
+            planner.move_goal(int(rng.choice(_np.flatnonzero(walkable))))
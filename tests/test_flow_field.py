@@ -0,0 +1,73 @@
+import math as _math
+
+import numpy as _np
+import pytest
+
+from src.components.map import pathfinding as _pathfinding
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.flow_field import FlowField as _FlowField
+import reference as _reference
+
+HEIGHT, WIDTH = 24, 32
+
+
+def _assert_field(field, passable, walkable):
+    expected = _reference.dijkstra(passable, field.target, HEIGHT, WIDTH, expandable=walkable)
+    assert _np.allclose(field.distances, expected)
+    for cell in _np.flatnonzero(_np.isfinite(expected))[::7].tolist():
+        path = field.path_from(cell)
+        assert _reference.is_valid_path(path[::-1], field.target, cell, passable, WIDTH)
+        assert _reference.path_cost(path, WIDTH) == pytest.approx(expected[cell])
+        assert all(walkable[step] for step in path[1:-1])
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_field_matches_dijkstra(seed):
+    passable = _reference.random_map(seed, HEIGHT, WIDTH)
+    # Occupied cells get a cost but are never stepped through.
+    walkable = passable & (_np.random.default_rng(seed).random(HEIGHT * WIDTH) > 0.1)
+    target = int(_np.flatnonzero(walkable)[seed * 5])
+    field = _FlowField(_AdjacencyGraph(HEIGHT, WIDTH), passable, target, walkable=walkable)
+    _assert_field(field, passable, walkable)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_repairs_match_a_fresh_field(seed):
+    rng = _np.random.default_rng(seed)
+    passable = _reference.random_map(seed, HEIGHT, WIDTH, density=0.2)
+    walkable = passable.copy()
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    field = _FlowField(graph, passable, int(_np.flatnonzero(walkable)[0]), walkable=walkable)
+    for target in rng.choice(_np.flatnonzero(walkable), 5).tolist():
+        field.retarget(target)
+        _assert_field(field, passable, walkable)
+    for cell in rng.choice(_np.flatnonzero(passable), 10).tolist():
+        walkable[cell] = False
+        field.recompute()
+        walkable[cell] = True
+        field.open(cell)
+        _assert_field(field, passable, walkable)
+
+
+def test_flow_path_costs_as_much_as_astar():
+    passable = _reference.random_map(9, HEIGHT, WIDTH)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    target = int(_np.flatnonzero(passable)[-1])
+    field = _FlowField(graph, passable, target)
+    for start, _ in _reference.random_pairs(passable, 20, 9):
+        expected = _pathfinding.astar(graph, _reference.bitmap(passable), start, target)
+        path = field.path_from(start)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert _reference.path_cost(path, WIDTH) == pytest.approx(_reference.path_cost(expected, WIDTH))
+
+
+def test_radius_bounds_the_field():
+    passable = _np.ones(HEIGHT * WIDTH, dtype=bool)
+    field = _FlowField(_AdjacencyGraph(HEIGHT, WIDTH), passable, 0, radius=5.0)
+    expected = _reference.dijkstra(passable, 0, HEIGHT, WIDTH)
+    assert _np.array_equal(_np.isfinite(field.distances), expected <= 5.0)
+    field.retarget(10)
+    expected = _reference.dijkstra(passable, 10, HEIGHT, WIDTH)
+    assert _np.array_equal(_np.isfinite(field.distances), expected <= 5.0)
+    assert field.path_from(HEIGHT * WIDTH - 1) is None and field.distances[HEIGHT * WIDTH - 1] == _math.inf
@@ -0,0 +1,80 @@
+import json as _json
+import os as _os
+
+import numpy as _np
+
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.blueprint_cache import BlueprintCache as _BlueprintCache
+from src.components.map.grid import Grid as _Grid
+from src.components.map.grid_blueprint import GridBlueprint as _GridBlueprint, load_grid as _load_grid
+
+
+class _Piece:
+    def __init__(self, name):
+        self.name = name
+
+
+def _write_legacy(path, passable, terrain=True, height=4, width=5):
+    """Writes a grid in the old `._json` format, with terrain ints that do not match its passability."""
+    graph = _AdjacencyGraph(height, width)
+    name = lambda index: f'{chr(97 + index // width)}{index % width + 1:03d}'
+    cells = {}
+    for index in range(height * width):
+        cells[name(index)] = {
+            'coordinates': [index % width * 10, index // width * 10],
+            'cell_index': index,
+            'rank_index': index // width,
+            'file_index': index % width,
+            'terrain_raw': 0.5 if terrain else None,
+            'terrain_int': 0 if terrain else None,
+            'passable': bool(passable[index]),
+            'adjacent': [name(neighbor) for neighbor in graph.neighbors(index).tolist()],
+            'occupied': False,
+            'occupant': None,
+            'obstructed': index == 7,
+            'obstruction': None,
+            'groups': {},
+        }
+    with open(path, 'w') as file:
+        _json.dump(cells, file)
+
+
+def test_legacy_grid_keeps_its_passability(tmp_path):
+    path = str(tmp_path / 'old._json')
+    passable = _np.arange(20) % 3 != 0
+    _write_legacy(path, passable)
+    blueprint = _GridBlueprint.from_file(path)
+    assert _np.array_equal(blueprint._passable, passable)
+    assert _os.path.exists(path + '.grid')
+    assert _load_grid(path).columns['obstructed'][7]
+
+
+def test_legacy_grid_without_terrain_loads(tmp_path):
+    path = str(tmp_path / 'empty._json')
+    _write_legacy(path, _np.ones(20, dtype=bool), terrain=False)
+    blueprint = _GridBlueprint.from_file(path)
+    assert blueprint._passable.all()
+    assert not blueprint._terrain_int.any()
+    grid = _Grid.from_file(path)
+    assert grid.get_cell(7).obstructed and not grid.get_cell(7).passable
+    assert grid.get_path(0, 19) is not None
+    grid.close()
+
+
+def test_save_round_trip_keeps_obstructions_removable(tmp_path):
+    grid = _Grid(cell_size=60, seed=3, cache=_BlueprintCache(str(tmp_path / 'cache')))
+    index = int(_np.flatnonzero(grid._store.passable)[0])
+    closed = int(_np.flatnonzero(grid._store.passable)[1])
+    grid.get_cell(index).on_obstruct(_Piece('Wall'))
+    grid.get_cell(closed).passable = False
+    path = str(tmp_path / 'saved.grid')
+    grid.save(path)
+    grid.close()
+
+    loaded = _Grid.from_file(path)
+    assert loaded.get_cell(index).obstructed and not loaded.get_cell(index).passable
+    assert not loaded.get_cell(closed).passable
+    loaded.get_cell(index).on_destruct()
+    assert loaded.get_cell(index).passable
+    assert _np.array_equal(loaded._store.terrain_int, grid._store.terrain_int)
+    loaded.close()
@@ -0,0 +1,55 @@
+import numpy as _np
+
+from src.components.map import pathfinding as _pathfinding
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.hierarchical import HierarchicalPlanner as _HierarchicalPlanner
+import reference as _reference
+
+
+def _bitmap(passable):
+    return bytearray(passable.astype(_np.uint8).tobytes())
+
+
+def test_single_column_of_clusters():
+    # A map no wider than a cluster numbers the cluster below one after the cluster above.
+    height, width = 40, 8
+    passable = _np.ones(height * width, dtype=bool)
+    passable[15 * width:15 * width + 6] = False
+    graph = _AdjacencyGraph(height, width)
+    planner = _HierarchicalPlanner(graph, passable, cluster_size=10)
+    start, goal = 1, (height - 1) * width + 2
+    path = planner.find_path(_bitmap(passable), start, goal)
+    expected = _pathfinding.astar(graph, _bitmap(passable), start, goal)
+    assert path[0] == start and path[-1] == goal
+    assert all(graph.is_adjacent(a, b) and passable[b] for a, b in zip(path, path[1:]))
+    assert len(path) == len(expected)
+
+
+def test_single_row_of_clusters():
+    height, width = 8, 40
+    passable = _np.ones(height * width, dtype=bool)
+    graph = _AdjacencyGraph(height, width)
+    planner = _HierarchicalPlanner(graph, passable, cluster_size=10)
+    path = planner.find_path(_bitmap(passable), 0, width - 1)
+    assert path[0] == 0 and path[-1] == width - 1
+    assert len(path) == width
+
+
+def test_random_maps_match_flat_search():
+    # HPA* paths are not always shortest, but one must be found exactly when flat A* finds one.
+    height, width = 40, 50
+    graph = _AdjacencyGraph(height, width)
+    for seed in range(4):
+        passable = _reference.random_map(seed, height, width)
+        planner = _HierarchicalPlanner(graph, passable, cluster_size=10)
+        for round in range(2):
+            for start, goal in _reference.random_pairs(passable, 20, seed):
+                path = planner.find_path(_bitmap(passable), start, goal)
+                expected = _pathfinding.astar(graph, _bitmap(passable), start, goal)
+                assert (path is None) == (expected is None)
+                if path is not None:
+                    assert _reference.is_valid_path(path, start, goal, passable, width)
+            # Close a few cells in place and check again against the rebuilt clusters.
+            for cell in _reference.random_pairs(passable, 10, seed + 100):
+                passable[cell[0]] = False
+                planner.mark_dirty(cell[0])
@@ -0,0 +1,66 @@
+from src.components.map.blueprint_cache import BlueprintCache as _BlueprintCache
+from src.components.map.grid import Grid as _Grid
+from src.components.map.journal import GridJournal as _GridJournal
+
+
+class _Piece:
+    def __init__(self, name):
+        self.name = name
+
+
+def _grid(tmp_path):
+    return _Grid(cell_size=60, seed=7, cache=_BlueprintCache(str(tmp_path / 'cache')),
+                 journal_path=str(tmp_path / 'state.json'))
+
+
+def test_recover_replays_records_after_a_crash(tmp_path):
+    path = str(tmp_path / 'state.json')
+    journal = _GridJournal(path, meta={'seed': 1}, interval=60)
+    journal.record('obstruct', 3, 'Wall')
+    journal.record('obstruct', 4, 'Wall')
+    journal.record('destruct', 3)
+    journal.record('passable', 5, False)
+    # No close: the records are only in the journal file, as after a crash.
+    state = _GridJournal.recover(path)
+    assert state['obstructed'] == {4: 'Wall'}
+    assert state['passable'] == {5: False}
+    assert _GridJournal(path, meta={'seed': 1}).recovered == {'obstructed': {4: 'Wall'}, 'passable': {5: False}}
+
+
+def test_journal_of_another_grid_is_discarded(tmp_path):
+    path = str(tmp_path / 'state.json')
+    journal = _GridJournal(path, meta={'seed': 1})
+    journal.record('obstruct', 3, 'Wall')
+    journal.close()
+    assert _GridJournal(path, meta={'seed': 2}).recovered is None
+
+
+def test_restart_restores_obstructions_but_not_occupants(tmp_path):
+    grid = _grid(tmp_path)
+    passable = grid._store.passable.nonzero()[0]
+    occupied, obstructed, closed = (int(index) for index in passable[:3])
+    grid.get_cell(occupied).on_occupy(_Piece('Player'))
+    grid.get_cell(obstructed).on_obstruct(_Piece('Wall'))
+    grid.get_cell(closed).passable = False
+    grid.close()
+
+    grid = _grid(tmp_path)
+    cell = grid.get_cell(occupied)
+    assert not cell.occupied and cell.occupant is None and cell.passable
+    assert grid._store.walkable[occupied]
+    cell = grid.get_cell(obstructed)
+    assert cell.obstructed and cell.obstruction == 'Wall' and not grid._store.walkable[obstructed]
+    assert not grid.get_cell(closed).passable
+    grid.close()
+
+
+def test_restart_forgets_what_was_undone(tmp_path):
+    grid = _grid(tmp_path)
+    index = int(grid._store.passable.nonzero()[0][0])
+    grid.get_cell(index).on_obstruct(_Piece('Wall'))
+    grid.get_cell(index).on_destruct()
+    grid.close()
+
+    grid = _grid(tmp_path)
+    assert not grid.get_cell(index).obstructed and grid._store.walkable[index]
+    grid.close()
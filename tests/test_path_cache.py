@@ -0,0 +1,62 @@
+import numpy as _np
+
+from src.components.map import pathfinding as _pathfinding
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.path_cache import PathCache as _PathCache
+import reference as _reference
+
+HEIGHT, WIDTH = 24, 32
+
+
+def test_hits_and_misses():
+    cache = _PathCache(capacity=2, width=WIDTH)
+    key = (0, 33, None, 'astar')
+    assert cache.get(key) == (False, None)
+    cache.put(key, [0, 33])
+    cache.put((5, 6, None, 'astar'), None)
+    assert cache.get(key) == (True, (0, 33))
+    assert cache.get((5, 6, None, 'astar')) == (True, None)
+    assert (cache.hits, cache.misses) == (2, 1)
+    # The least recently used entry is evicted first.
+    cache.get(key)
+    cache.put((1, 2, None, 'astar'), [1, 2])
+    assert key in cache and (5, 6, None, 'astar') not in cache and len(cache) == 2
+    assert cache.hit_rate == 0.75
+
+
+def test_invalidation_keeps_served_paths_shortest():
+    # A cache invalidated on every change must serve what a fresh search would find.
+    rng = _np.random.default_rng(2)
+    walkable = _reference.random_map(2, HEIGHT, WIDTH)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    cache = _PathCache(width=WIDTH)
+    pairs = _reference.random_pairs(walkable, 25, 2)
+    for round in range(15):
+        for start, goal in pairs:
+            key = (start, goal, None, 'astar')
+            bitmap = _pathfinding.walkable_bitmap(walkable, start, goal)
+            expected = _pathfinding.astar(graph, bitmap, start, goal)
+            hit, path = cache.get(key)
+            if not hit:
+                path = expected
+                cache.put(key, path)
+            assert (path is None) == (expected is None)
+            if path is not None:
+                assert _reference.is_valid_path(list(path), start, goal, bitmap, WIDTH)
+                assert abs(_reference.path_cost(path, WIDTH) - _reference.path_cost(expected, WIDTH)) < 1e-9
+        for cell in rng.integers(0, HEIGHT * WIDTH, 8).tolist():
+            walkable[cell] = not walkable[cell]
+            cache.invalidate(cell, opened=bool(walkable[cell]))
+    assert cache.hits and cache.misses and cache.invalidated
+
+
+def test_opening_a_cell_drops_unreachable_results():
+    cache = _PathCache(width=WIDTH)
+    cache.put((0, 5, None, 'astar'), None)
+    cache.put((40, 41, None, 'astar'), [40, 41])
+    cache.invalidate(300)
+    assert len(cache) == 2
+    cache.invalidate(300, opened=True)
+    assert (0, 5, None, 'astar') not in cache and (40, 41, None, 'astar') in cache
+    cache.invalidate(41)
+    assert not len(cache) and cache.invalidated == 2
@@ -0,0 +1,53 @@
+import pytest
+
+from src.components.map import pathfinding as _pathfinding
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.path_pool import PathPool as _PathPool
+from src.components.map.path_service import PathService as _PathService
+import reference as _reference
+
+HEIGHT, WIDTH = 24, 32
+
+
+def _expected(graph, walkable, pairs):
+    return [_pathfinding.astar(graph, _pathfinding.walkable_bitmap(walkable, start, goal), start, goal)
+            for start, goal in pairs]
+
+
+def _assert_same_costs(paths, expected):
+    for path, reference in zip(paths, expected):
+        assert (path is None) == (reference is None)
+        if path is not None:
+            assert _reference.path_cost(path, WIDTH) == pytest.approx(_reference.path_cost(reference, WIDTH))
+
+
+def test_service_answers_like_astar():
+    walkable = _reference.random_map(5, HEIGHT, WIDTH)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    pairs = _reference.random_pairs(walkable, 20, 5)
+    service = _PathService(graph, walkable)
+    futures = [service.submit(start, goal, strategy) for start, goal in pairs for strategy in ('astar', 'jps')]
+    # Each request searches the walkable column as it was when submitted.
+    walkable[:] = False
+    paths = [future.result(timeout=30) for future in futures]
+    walkable[:] = _reference.random_map(5, HEIGHT, WIDTH)
+    _assert_same_costs(paths[0::2], _expected(graph, walkable, pairs))
+    _assert_same_costs(paths[1::2], _expected(graph, walkable, pairs))
+    with pytest.raises(ValueError):
+        service.submit(0, 1, 'dijkstra')
+    service.close()
+    assert service.submit(0, 1).cancelled()
+
+
+def test_pool_answers_like_astar():
+    walkable = _reference.random_map(6, HEIGHT, WIDTH)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    pairs = _reference.random_pairs(walkable, 30, 6)
+    pool = _PathPool(graph, walkable, workers=2)
+    try:
+        _assert_same_costs(pool.map(pairs), _expected(graph, walkable, pairs))
+        # The walkable column is copied to the workers before every batch.
+        walkable[::3] = False
+        _assert_same_costs(pool.map(pairs, 'jps'), _expected(graph, walkable, pairs))
+    finally:
+        pool.close()
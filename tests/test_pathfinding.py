@@ -0,0 +1,59 @@
+import math as _math
+
+import numpy as _np
+import pytest
+
+from src.components.map import pathfinding as _pathfinding
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+import reference as _reference
+
+HEIGHT, WIDTH = 24, 32
+
+
+@pytest.mark.parametrize('search', [_pathfinding.astar, _pathfinding.jps])
+@pytest.mark.parametrize('seed', range(6))
+def test_searches_find_shortest_paths(search, seed):
+    passable = _reference.random_map(seed, HEIGHT, WIDTH)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    for start, goal in _reference.random_pairs(passable, 15, seed):
+        expected = _reference.dijkstra(passable, start, HEIGHT, WIDTH)[goal]
+        path = search(graph, _reference.bitmap(passable), start, goal)
+        if expected == _math.inf:
+            assert path is None
+        else:
+            assert _reference.is_valid_path(path, start, goal, passable, WIDTH)
+            assert _reference.path_cost(path, WIDTH) == pytest.approx(expected)
+
+
+def test_octile_is_exact_on_open_ground():
+    passable = _np.ones(HEIGHT * WIDTH, dtype=bool)
+    costs = _reference.dijkstra(passable, 37, HEIGHT, WIDTH)
+    assert _np.allclose(costs, [_pathfinding.octile(37, cell, WIDTH) for cell in range(HEIGHT * WIDTH)])
+
+
+def test_walkable_bitmap_opens_start_and_goal():
+    walkable = _np.zeros(10, dtype=bool)
+    walkable[4] = True
+    assert list(_pathfinding.walkable_bitmap(walkable, 1, 7)) == [0, 1, 0, 0, 1, 0, 0, 1, 0, 0]
+
+
+def test_search_batch_matches_single_searches():
+    passable = _reference.random_map(3, HEIGHT, WIDTH)
+    # Some start and goal cells are closed, as occupied cells are; each search opens only its own.
+    walkable = passable & (_np.arange(HEIGHT * WIDTH) % 7 != 0)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    pairs = _reference.random_pairs(passable, 30, 3)
+    for strategy in _pathfinding.SEARCHES:
+        paths = _pathfinding.search_batch(graph, walkable, pairs, strategy)
+        for (start, goal), path in zip(pairs, paths):
+            expected = _pathfinding.astar(graph, _pathfinding.walkable_bitmap(walkable, start, goal), start, goal)
+            assert (path is None) == (expected is None)
+            if path is not None:
+                assert _reference.path_cost(path, WIDTH) == pytest.approx(_reference.path_cost(expected, WIDTH))
+
+
+def test_cancelled_search_gives_up():
+    graph = _AdjacencyGraph(100, 100)
+    passable = _np.ones(100 * 100, dtype=bool)
+    passable[50 * 100:50 * 100 + 99] = False
+    assert _pathfinding.astar(graph, _reference.bitmap(passable), 0, 100 * 100 - 1, cancelled=lambda: True) is None
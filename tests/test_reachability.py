@@ -0,0 +1,37 @@
+import numpy as _np
+import pytest
+
+from src.components.map.adjacency import AdjacencyGraph as _AdjacencyGraph
+from src.components.map.reachability import reachable as _reachable
+import reference as _reference
+
+HEIGHT, WIDTH = 24, 32
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_costs_match_breadth_first_search(seed):
+    passable = _reference.random_map(seed, HEIGHT, WIDTH)
+    graph = _AdjacencyGraph(HEIGHT, WIDTH)
+    start = int(_np.flatnonzero(passable)[seed * 13])
+    budget = 6
+    result = _reachable(graph, _reference.bitmap(passable), start, budget)
+    steps = _reference.bfs_steps(passable, start, HEIGHT, WIDTH)
+    expected = _np.flatnonzero((steps >= 0) & (steps <= budget))
+    assert _np.array_equal(result.indices, expected)
+    assert _np.array_equal(result.costs, steps[expected])
+    assert _np.array_equal(result.within(3), _np.flatnonzero((steps >= 0) & (steps <= 3)))
+    for cell in expected.tolist():
+        path = result.path_to(cell)
+        assert _reference.is_valid_path(path, start, cell, passable, WIDTH) or path == [start] == [cell]
+        assert len(path) - 1 == result.cost_to(cell)
+    outside = _np.flatnonzero(steps > budget)
+    if len(outside):
+        assert outside[0] not in result and result.path_to(int(outside[0])) is None
+
+
+def test_ties_keep_the_shortest_path():
+    # Two steps reach (2, 2) either straight along the diagonal or with a dog-leg; the diagonal is shorter.
+    graph = _AdjacencyGraph(5, 5)
+    result = _reachable(graph, bytearray([1] * 25), 0, 2)
+    assert result.path_to(12) == [0, 6, 12]
+    assert result.path_to(2) == [0, 1, 2]
@@ -0,0 +1,34 @@
+import numpy as _np
+import pytest
+
+from src.components.map.regions import RegionIndex as _RegionIndex, label_regions as _label_regions
+import reference as _reference
+
+HEIGHT, WIDTH = 24, 32
+
+
+def _assert_components(labels, passable):
+    # Two passable cells share a label exactly when a breadth-first search joins them.
+    assert _np.array_equal(labels >= 0, passable)
+    for source in _np.flatnonzero(passable)[::11].tolist():
+        joined = _reference.bfs_steps(passable, source, HEIGHT, WIDTH) >= 0
+        assert _np.array_equal(labels == labels[source], joined)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_labels_match_breadth_first_search(seed):
+    passable = _reference.random_map(seed, HEIGHT, WIDTH, density=0.45)
+    _assert_components(_label_regions(passable, HEIGHT, WIDTH), passable)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_updates_match_fresh_labels(seed):
+    rng = _np.random.default_rng(seed)
+    passable = _reference.random_map(seed, HEIGHT, WIDTH, density=0.45)
+    regions = _RegionIndex(passable, HEIGHT, WIDTH)
+    for cell in rng.integers(0, HEIGHT * WIDTH, 200).tolist():
+        passable[cell] = not passable[cell]
+        regions.update(cell)
+    _assert_components(regions.labels, passable)
+    start, goal = _reference.random_pairs(passable, 1, seed)[0]
+    assert regions.connected(start, goal) == (_reference.bfs_steps(passable, start, HEIGHT, WIDTH)[goal] >= 0)
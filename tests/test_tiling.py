@@ -0,0 +1,26 @@
+import numpy as _np
+
+from src.components.map import grid_blueprint as _grid_blueprint
+from src.components.map.grid_blueprint import GridBlueprint as _GridBlueprint
+from src.components.map.tiling import quadrant_tiles as _quadrant_tiles
+
+
+def test_quadrant_tiles_cover_the_map_once():
+    covered = _np.zeros((65, 47), dtype=int)
+    for r0, r1, f0, f1 in _quadrant_tiles(65, 47, 30):
+        covered[r0:r1, f0:f1] += 1
+    assert (covered == 1).all()
+
+
+def test_small_maps_are_generated_in_process():
+    assert _GridBlueprint(cell_size=60, seed=2, workers=4)._pool_workers() == 1
+
+
+def test_tiled_generation_matches_serial(monkeypatch):
+    serial = _GridBlueprint(cell_size=60, seed=2)
+    monkeypatch.setitem(_grid_blueprint._PARALLEL_MIN_SAMPLES, 'numpy', 0)
+    monkeypatch.setattr(_grid_blueprint.os, 'cpu_count', lambda: 2)
+    tiled = _GridBlueprint(cell_size=60, seed=2, workers=2)
+    assert tiled._pool_workers() == 2
+    assert _np.array_equal(tiled._terrain_raw, serial._terrain_raw)
+    assert _np.array_equal(tiled._terrain_int, serial._terrain_int)